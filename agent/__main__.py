@@ -1,6 +1,7 @@
 # Generic UI Builder - Main Entry Point
 # Demo for Generative Frontend / Server-Driven UI session
 
+import json
 import logging
 import os
 import sys
@@ -9,15 +10,10 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
 
 import click
-from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
-from a2a.types import AgentCapabilities, AgentCard, AgentSkill
-from a2ui.extension import get_a2ui_agent_extension
-from agent import UIBuilderAgent
-from agent_executor import UIBuilderAgentExecutor
+import uvicorn
+from api_keys import missing_api_key
 from dotenv import load_dotenv
-from starlette.middleware.cors import CORSMiddleware
+from startup import SERVER_CONFIG_ENV, LazyApp
 
 load_dotenv()
 
@@ -37,32 +33,11 @@ def get_model_and_check_api_key() -> str:
     """
     model = os.getenv("LITELLM_MODEL", "gemini/gemini-2.5-flash")
 
-    # Check for the appropriate API key based on the model
-    if model.startswith("gemini/") or model.startswith("google/"):
-        if not os.getenv("GOOGLE_GENAI_USE_VERTEXAI") == "TRUE":
-            if not os.getenv("GEMINI_API_KEY"):
-                raise MissingAPIKeyError(
-                    f"Model '{model}' requires GEMINI_API_KEY environment variable. "
-                    "Get one at https://aistudio.google.com/apikey"
-                )
-    elif model.startswith("gpt-") or model.startswith("openai/"):
-        if not os.getenv("OPENAI_API_KEY"):
-            raise MissingAPIKeyError(
-                f"Model '{model}' requires OPENAI_API_KEY environment variable. "
-                "Get one at https://platform.openai.com/api-keys"
-            )
-    elif model.startswith("claude-") or model.startswith("anthropic/"):
-        if not os.getenv("ANTHROPIC_API_KEY"):
-            raise MissingAPIKeyError(
-                f"Model '{model}' requires ANTHROPIC_API_KEY environment variable. "
-                "Get one at https://console.anthropic.com/settings/keys"
-            )
-    elif model.startswith("azure/"):
-        if not os.getenv("AZURE_API_KEY"):
-            raise MissingAPIKeyError(
-                f"Model '{model}' requires AZURE_API_KEY environment variable."
-            )
-    # For other models, LiteLLM will handle the API key check
+    # Check for the appropriate API key based on the model; for other
+    # models, LiteLLM will handle the API key check
+    reason = missing_api_key(model)
+    if reason:
+        raise MissingAPIKeyError(reason)
 
     return model
 
@@ -70,68 +45,59 @@ def get_model_and_check_api_key() -> str:
 @click.command()
 @click.option("--host", default="localhost")
 @click.option("--port", default=10003)
-def main(host, port):
+@click.option(
+    "--task-store",
+    type=click.Choice(["bounded", "sqlite", "memory"]),
+    default="bounded",
+    show_default=True,
+    help="Where A2A tasks are kept: bounded in-memory, SQLite on disk, or unbounded in-memory.",
+)
+@click.option("--task-db", default="data/tasks.db", show_default=True, help="SQLite file for --task-store=sqlite.")
+@click.option("--task-max", default=10000, show_default=True, help="Maximum number of tasks kept.")
+@click.option("--task-ttl", default=3600.0, show_default=True, help="Seconds before an idle input_required task is evicted.")
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    help=(
+        "Worker processes. With more than one, sessions and tasks are shared through SQLite (WAL) so any worker "
+        "can continue any context, and turns of a context run one at a time across workers. The per-process "
+        "response and semantic caches, list pagination and surface diffs are turned off."
+    ),
+)
+@click.option("--session-db", default="data/sessions.db", show_default=True, help="Shared SQLite session file used when --workers > 1.")
+@click.option("--graceful-timeout", default=30.0, show_default=True, help="Seconds to drain in-flight requests on SIGTERM.")
+@click.option(
+    "--lazy-startup/--eager-startup",
+    default=True,
+    show_default=True,
+    help="Bind the port first and load the agents in the background (GET /ready flips when done), or load them before binding.",
+)
+def main(host, port, task_store, task_db, task_max, task_ttl, workers, session_db, graceful_timeout, lazy_startup):
     try:
         # Check for API key based on model
         model = get_model_and_check_api_key()
         logger.info(f"Using LLM model: {model}")
 
-        capabilities = AgentCapabilities(
-            streaming=True,
-            extensions=[get_a2ui_agent_extension()],
-        )
-
-        skill = AgentSkill(
-            id="build_ui",
-            name="Generic UI Builder",
-            description="Creates any type of UI from natural language descriptions using A2UI.",
-            tags=["ui", "builder", "generator", "a2ui"],
-            examples=[
-                "Create a welcome headline for Basta conference",
-                "Build a KPI dashboard with user metrics",
-                "Make a comparison table between Product A and Product B",
-                "Generate a contact form",
-                "Add a stepper for user onboarding",
-            ],
-        )
-
-        base_url = f"http://{host}:{port}"
-
-        agent_card = AgentCard(
-            name="UI Builder Agent",
-            description="A generic UI builder that creates rich, interactive interfaces from natural language using A2UI. Perfect for demos of Generative Frontend / Server-Driven UI.",
-            url=base_url,
-            version="1.0.0",
-            default_input_modes=UIBuilderAgent.SUPPORTED_CONTENT_TYPES,
-            default_output_modes=UIBuilderAgent.SUPPORTED_CONTENT_TYPES,
-            capabilities=capabilities,
-            skills=[skill],
-        )
-
-        agent_executor = UIBuilderAgentExecutor()
-
-        request_handler = DefaultRequestHandler(
-            agent_executor=agent_executor,
-            task_store=InMemoryTaskStore(),
-        )
-
-        server = A2AStarletteApplication(
-            agent_card=agent_card, http_handler=request_handler
-        )
-
-        import uvicorn
-
-        app = server.build()
-
-        app.add_middleware(
-            CORSMiddleware,
-            allow_origin_regex=r"http://localhost:\d+",
-            allow_credentials=True,
-            allow_methods=["*"],
-            allow_headers=["*"],
-        )
-
-        logger.info(f"Starting UI Builder Agent on {base_url}")
+        if workers > 1:
+            # Every worker must see every session and task.
+            if task_store != "sqlite":
+                logger.info(f"--workers {workers}: using the SQLite task store instead of '{task_store}'.")
+                task_store = "sqlite"
+            os.environ.setdefault("SESSION_DB_PATH", session_db)
+            os.environ["SESSION_SHARED"] = "true"
+            os.environ["AGENT_WORKERS"] = str(workers)
+
+        config = {
+            "host": host,
+            "port": port,
+            "task_store": task_store,
+            "task_db": task_db,
+            "task_max": task_max,
+            "task_ttl": task_ttl,
+        }
+
+        logger.info(f"Starting UI Builder Agent on http://{host}:{port} ({workers} worker(s))")
         logger.info(f"LLM Provider: {model}")
         logger.info("Demo commands to try:")
         logger.info("  - 'Create a headline for my startup'")
@@ -139,7 +105,30 @@ def main(host, port):
         logger.info("  - 'Make a comparison table'")
         logger.info("  - 'Add a contact form'")
 
-        uvicorn.run(app, host=host, port=port)
+        if workers > 1:
+            # Pre-forked workers rebuild the app from the same options.
+            os.environ[SERVER_CONFIG_ENV] = json.dumps(config)
+            uvicorn.run(
+                "startup:create_app" if lazy_startup else "server:create_app",
+                factory=True,
+                host=host,
+                port=port,
+                workers=workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)),
+                timeout_graceful_shutdown=graceful_timeout,
+            )
+        else:
+            if lazy_startup:
+                app = LazyApp(config)
+            else:
+                from server import build_app
+                app = build_app(**config)
+            uvicorn.run(
+                app,
+                host=host,
+                port=port,
+                timeout_graceful_shutdown=graceful_timeout,
+            )
 
     except MissingAPIKeyError as e:
         logger.error(f"Error: {e}")
@@ -2,47 +2,139 @@
 # Pre-built templates that generate valid A2UI JSON from structured data.
 # The AI picks a template name + provides data; this code does the rest.
 
+import hashlib
+import json
 import logging
+import os
+from collections import OrderedDict, deque
+
+from metrics import REGISTRY
 
 logger = logging.getLogger(__name__)
 
+SKELETON_CACHE_REQUESTS = REGISTRY.counter(
+    "ui_builder_skeleton_cache_requests_total",
+    "Bound-mode skeleton lookups, by result.",
+    ("result",),
+)
+
+# "sequential": t1, b2, card3, ... (cheapest); "content": ids hashed from
+# component type + content, stable across renders and processes, which only
+# pays off for clients that receive surface diffs (the executor asks for it).
+DEFAULT_ID_STRATEGY = os.getenv("A2UI_ID_STRATEGY", "sequential")
+
+# "literal": every value inlined as literalString; "bound": a cached component
+# skeleton bound to data model paths, plus a dataModelUpdate with the values.
+DEFAULT_RENDER_MODE = os.getenv("A2UI_RENDER_MODE", "literal")
+SKELETON_CACHE_SIZE = int(os.getenv("A2UI_SKELETON_CACHE_SIZE", "256"))
+# Lists longer than this are rendered one page at a time (see paginate()).
+PAGE_SIZE = int(os.getenv("A2UI_PAGE_SIZE", "20"))
+
+
+def _digest(text, size=5):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=size).hexdigest()
+
+
+# Id prefixes of components that never have children.
+_LEAF_PREFIXES = frozenset(("t", "i", "d", "tf", "dt", "mc"))
+
+
+def _bound(value):
+    """A data binding as-is, anything else as a literal string."""
+    if isinstance(value, dict) and "path" in value:
+        return value
+    return {"literalString": str(value)}
+
+
+def _children(children):
+    """An explicit list of child ids, or a template from A2UIBuilder.template()."""
+    if isinstance(children, dict):
+        return {"template": children}
+    return {"explicitList": list(children)}
+
+
+def _child_refs(props):
+    """(container, key) pairs of every child reference in a component's props."""
+    refs = [(props, key) for key in ("child", "entryPointChild", "contentChild") if key in props]
+    children = props.get("children")
+    if children:
+        explicit = children.get("explicitList")
+        if explicit:
+            refs.extend((explicit, i) for i in range(len(explicit)))
+        template = children.get("template")
+        if template and "componentId" in template:
+            refs.append((template, "componentId"))
+    for item in props.get("tabItems", ()):
+        refs.append((item, "child"))
+    return refs
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class Node:
+    """One component: id, type name and its properties.
+
+    Stored without the {"id": ..., "component": {type: props}} wrapper dicts
+    of the wire format; build() adds them, build_bytes() never allocates them.
+    """
+
+    __slots__ = ("id", "type", "props")
+
+    def __init__(self, cid, type_name, props):
+        self.id = cid
+        self.type = type_name
+        self.props = props
+
 
 class A2UIBuilder:
-    """Helper to build A2UI component trees in the correct wire format."""
+    """Helper to build A2UI component trees in the correct wire format.
+
+    With the "content" id strategy a component's id is a hash of its type and
+    content, children included by their (already content-derived) ids, so an
+    unchanged subtree keeps its ids when other items are inserted or removed.
+    Identical subtrees are told apart in build() by their parent and position.
+    """
 
-    def __init__(self):
-        self._components = []
+    def __init__(self, id_strategy=None):
+        self._nodes = []
         self._n = 0
+        self.id_strategy = id_strategy or DEFAULT_ID_STRATEGY
+        if self.id_strategy not in ("content", "sequential"):
+            raise ValueError(f"Unknown id strategy: {self.id_strategy}")
 
     def _id(self, prefix):
         self._n += 1
         return f"{prefix}{self._n}"
 
+    def _add(self, prefix, type_name, props):
+        if self.id_strategy == "content":
+            # The text of repr({type_name: props}), without building that dict;
+            # repr() of JSON-like dicts is deterministic and cheaper than json.dumps.
+            cid = f"{prefix}-{_digest(prefix + '{' + repr(type_name) + ': ' + repr(props) + '}')}"
+        else:
+            cid = self._id(prefix)
+        self._nodes.append(Node(cid, type_name, props))
+        return cid
+
     # ── Leaf components ──
 
     def text(self, value, hint="body"):
-        cid = self._id("t")
-        comp = {"Text": {"text": {"literalString": str(value)}}}
+        props = {"text": _bound(value)}
         if hint:
-            comp["Text"]["usageHint"] = hint
-        self._components.append({"id": cid, "component": comp})
-        return cid
+            props["usageHint"] = hint
+        return self._add("t", "Text", props)
 
     def icon(self, name):
-        cid = self._id("i")
-        self._components.append({"id": cid, "component": {"Icon": {"name": {"literalString": name}}}})
-        return cid
+        return self._add("i", "Icon", {"name": _bound(name)})
 
     def divider(self):
-        cid = self._id("d")
-        self._components.append({"id": cid, "component": {"Divider": {}}})
-        return cid
+        return self._add("d", "Divider", {})
 
     # ── Interactive components ──
 
     def button(self, label, action_name, context=None):
         label_id = self.text(label)
-        cid = self._id("b")
         action = {"name": action_name}
         if context:
             action["context"] = []
@@ -51,107 +143,123 @@ class A2UIBuilder:
                     action["context"].append({"key": k, "value": v})
                 else:
                     action["context"].append({"key": k, "value": {"literalString": str(v)}})
-        self._components.append({
-            "id": cid,
-            "component": {"Button": {"child": label_id, "action": action}}
-        })
-        return cid
+        return self._add("b", "Button", {"child": label_id, "action": action})
 
     def text_field(self, label, data_path, placeholder=""):
-        cid = self._id("tf")
-        comp = {
-            "TextField": {
-                "label": {"literalString": label},
-                "text": {"path": data_path},
-            }
+        props = {
+            "label": {"literalString": label},
+            "text": {"path": data_path},
         }
         if placeholder:
-            comp["TextField"]["placeholder"] = {"literalString": placeholder}
-        self._components.append({"id": cid, "component": comp})
-        return cid
+            props["placeholder"] = {"literalString": placeholder}
+        return self._add("tf", "TextField", props)
 
     def date_input(self, label, data_path):
-        cid = self._id("dt")
-        self._components.append({
-            "id": cid,
-            "component": {
-                "DateTimeInput": {
-                    "label": {"literalString": label},
-                    "value": {"path": data_path},
-                }
-            }
+        return self._add("dt", "DateTimeInput", {
+            "label": {"literalString": label},
+            "value": {"path": data_path},
         })
-        return cid
 
     def multiple_choice(self, label, options, data_path, max_selections=1):
         """options: list of (display_label, value) tuples."""
-        cid = self._id("mc")
-        self._components.append({
-            "id": cid,
-            "component": {
-                "MultipleChoice": {
-                    "selections": {"path": data_path},
-                    "options": [
-                        {"label": {"literalString": lbl}, "value": val}
-                        for lbl, val in options
-                    ],
-                    "maxAllowedSelections": max_selections,
-                }
-            }
+        return self._add("mc", "MultipleChoice", {
+            "selections": {"path": data_path},
+            "options": [
+                {"label": {"literalString": lbl}, "value": val}
+                for lbl, val in options
+            ],
+            "maxAllowedSelections": max_selections,
         })
-        return cid
 
     # ── Layout components ──
 
+    def template(self, component_id, data_binding):
+        """Children spec repeating `component_id` once per item of a list.
+
+        Paths inside the repeated component resolve relative to the item.
+        """
+        return {"componentId": component_id, "dataBinding": data_binding}
+
     def column(self, children, alignment=None):
-        cid = self._id("col")
-        comp = {"Column": {"children": {"explicitList": children}}}
+        props = {"children": _children(children)}
         if alignment:
-            comp["Column"]["alignment"] = alignment
-        self._components.append({"id": cid, "component": comp})
-        return cid
+            props["alignment"] = alignment
+        return self._add("col", "Column", props)
 
     def row(self, children, distribution="start"):
-        cid = self._id("row")
-        comp = {"Row": {"children": {"explicitList": children}}}
+        props = {"children": _children(children)}
         if distribution != "start":
-            comp["Row"]["distribution"] = distribution
-        self._components.append({"id": cid, "component": comp})
-        return cid
+            props["distribution"] = distribution
+        return self._add("row", "Row", props)
+
+    def list(self, children, direction="vertical"):
+        return self._add("list", "List", {"children": _children(children), "direction": direction})
 
     def card(self, children):
-        """Card wrapping a list of child IDs (auto-wrapped in Column)."""
+        """Card wrapping child IDs or a template (auto-wrapped in Column)."""
         inner = self.column(children)
-        cid = self._id("card")
-        self._components.append({
-            "id": cid,
-            "component": {"Card": {"child": inner}}
-        })
-        return cid
+        return self._add("card", "Card", {"child": inner})
 
     def tabs(self, items):
         """items: list of (title_str, child_component_id) tuples."""
-        cid = self._id("tabs")
-        self._components.append({
-            "id": cid,
-            "component": {
-                "Tabs": {
-                    "tabItems": [
-                        {"title": {"literalString": title}, "child": child_id}
-                        for title, child_id in items
-                    ]
-                }
-            }
+        return self._add("tabs", "Tabs", {
+            "tabItems": [
+                {"title": {"literalString": title}, "child": child_id}
+                for title, child_id in items
+            ]
         })
-        return cid
 
     # ── Build ──
 
+    def _resolve_duplicates(self, root_id):
+        """Give every copy of a repeated content id a unique, positional id.
+
+        Walks the tree from the root; the n-th reference to a repeated id
+        takes its n-th copy (copies are identical, so any pairing is valid)
+        and renames it after its parent's id and its index in the parent.
+        This also covers the (unlikely) case of two different components
+        hashing to the same id.
+        """
+        by_id = {}
+        for node in self._nodes:
+            by_id.setdefault(node.id, []).append(node)
+        copies = {cid: deque(nodes) for cid, nodes in by_id.items() if len(nodes) > 1}
+        if not copies or root_id not in by_id:
+            return
+        used = set(by_id)
+        stack = [by_id[root_id][0]]
+        while stack:
+            node = stack.pop()
+            for index, (container, key) in enumerate(_child_refs(node.props)):
+                child_id = container[key]
+                if child_id in copies:
+                    if not copies[child_id]:
+                        continue
+                    child = copies[child_id].popleft()
+                    position = f"{node.id}/{index}"
+                    new_id = f"{child_id}-{_digest(position, 3)}"
+                    n = 1
+                    while new_id in used:
+                        n += 1
+                        new_id = f"{child_id}-{_digest(f'{position}/{n}', 3)}"
+                    used.add(new_id)
+                    child.id = container[key] = new_id
+                else:
+                    child = by_id.get(child_id, (None,))[0]
+                if child is not None and child_id.split("-", 1)[0] not in _LEAF_PREFIXES:
+                    stack.append(child)
+
     def build(self, root_id, data_model=None):
         """Return list of A2UI server messages."""
+        if self.id_strategy == "content":
+            self._resolve_duplicates(root_id)
+        components = [
+            {"id": node.id, "component": {node.type: node.props}}
+            for node in self._nodes
+        ]
         msgs = [
             {"beginRendering": {"surfaceId": "default", "root": root_id}},
-            {"surfaceUpdate": {"surfaceId": "default", "components": self._components}},
+            {"surfaceUpdate": {"surfaceId": "default", "components": components}},
         ]
         if data_model:
             msgs.append({
@@ -163,13 +271,54 @@ class A2UIBuilder:
             })
         return msgs
 
+    def build_bytes(self, root_id, data_model=None):
+        """The messages of build() as compact UTF-8 JSON (one array).
+
+        Writes straight into a byte buffer: the wire dicts are never built,
+        only each node's props are encoded. Ids and type names come from the
+        builder and need no escaping.
+        """
+        if self.id_strategy == "content":
+            self._resolve_duplicates(root_id)
+        out = bytearray(b'[{"beginRendering":{"surfaceId":"default","root":"')
+        out += root_id.encode()
+        out += b'"}},{"surfaceUpdate":{"surfaceId":"default","components":['
+        separator = b""
+        for node in self._nodes:
+            out += separator
+            out += f'{{"id":"{node.id}","component":{{"{node.type}":'.encode()
+            out += _encode(node.props).encode()
+            out += b"}}"
+            separator = b","
+        out += b"]}}"
+        if data_model:
+            out += b',{"dataModelUpdate":{"surfaceId":"default","path":"/","contents":'
+            out += _encode(data_model).encode()
+            out += b"}}"
+        out += b"]"
+        return bytes(out)
+
 
 # ═══════════════════════════════════════════════════════════════
 #  TEMPLATE FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
 
-def render_template(name, data):
-    """Dispatch to the correct template function. Returns A2UI messages or None."""
+def render_template(name, data, mode=None, ids=None):
+    """Dispatch to the correct template function. Returns A2UI messages or None.
+
+    In "bound" mode templates that support it are rendered by
+    _render_bound(); the others, and data a skeleton cannot express, fall
+    back to literal rendering. `ids` is the component id strategy (see
+    A2UIBuilder), by default A2UI_ID_STRATEGY.
+    """
+    if (mode or DEFAULT_RENDER_MODE) == "bound" and name in _BOUND_TEMPLATES:
+        try:
+            messages = _render_bound(name, data or {}, ids=ids)
+        except Exception as e:
+            logger.error(f"Bound template '{name}' failed: {e}")
+            messages = None
+        if messages is not None:
+            return messages
     templates = {
         "policy_list": _render_policy_list,
         "policy_detail": _render_policy_detail,
@@ -183,7 +332,7 @@ def render_template(name, data):
         logger.warning(f"Unknown template: {name}")
         return None
     try:
-        return fn(data or {})
+        return fn(data or {}, ids)
     except Exception as e:
         logger.error(f"Template '{name}' failed: {e}")
         return None
@@ -191,8 +340,8 @@ def render_template(name, data):
 
 # ── policy_list ──
 
-def _render_policy_list(data):
-    b = A2UIBuilder()
+def _render_policy_list(data, ids=None, page_model=None):
+    b = A2UIBuilder(ids)
     title = b.text(data.get("title", "Available Policies"), "h2")
 
     card_ids = []
@@ -208,7 +357,7 @@ def _render_policy_list(data):
         children.append(b.divider())
         children.append(b.button("Select", "select_policy", {
             "policyName": p["name"],
-            "policyId": p.get("id", p["name"].lower().replace(" ", "-")),
+            "policyId": p.get("id") or p["name"].lower().replace(" ", "-"),
         }))
         card_ids.append(b.card(children))
 
@@ -217,14 +366,17 @@ def _render_policy_list(data):
     else:
         body = b.column(card_ids)
 
-    root = b.column([title, body])
+    children = [title, body]
+    if page_model is not None:
+        children.append(_pager_row(b, page_model))
+    root = b.column(children)
     return b.build(root)
 
 
 # ── policy_detail ──
 
-def _render_policy_detail(data):
-    b = A2UIBuilder()
+def _render_policy_detail(data, ids=None):
+    b = A2UIBuilder(ids)
     children = [
         b.text(data.get("name", "Policy Details"), "h2"),
         b.text(data.get("type", ""), "caption"),
@@ -269,8 +421,8 @@ def _render_policy_detail(data):
 
 # ── comparison ──
 
-def _render_comparison(data):
-    b = A2UIBuilder()
+def _render_comparison(data, ids=None):
+    b = A2UIBuilder(ids)
     title = b.text(data.get("title", "Plan Comparison"), "h2")
 
     card_ids = []
@@ -290,7 +442,7 @@ def _render_comparison(data):
         children.append(b.divider())
         children.append(b.button("Select", "select_policy", {
             "policyName": plan["name"],
-            "policyId": plan.get("id", plan["name"].lower().replace(" ", "-")),
+            "policyId": plan.get("id") or plan["name"].lower().replace(" ", "-"),
         }))
         card_ids.append(b.card(children))
 
@@ -301,8 +453,8 @@ def _render_comparison(data):
 
 # ── dashboard ──
 
-def _render_dashboard(data):
-    b = A2UIBuilder()
+def _render_dashboard(data, ids=None):
+    b = A2UIBuilder(ids)
     title = b.text(data.get("title", "Dashboard"), "h2")
 
     card_ids = []
@@ -322,8 +474,8 @@ def _render_dashboard(data):
 
 # ── form ──
 
-def _render_form(data):
-    b = A2UIBuilder()
+def _render_form(data, ids=None):
+    b = A2UIBuilder(ids)
     children = [b.text(data.get("title", "Form"), "h2")]
 
     if data.get("description"):
@@ -367,8 +519,8 @@ def _render_form(data):
 
 # ── info_list ──
 
-def _render_info_list(data):
-    b = A2UIBuilder()
+def _render_info_list(data, ids=None, page_model=None):
+    b = A2UIBuilder(ids)
     title = b.text(data.get("title", "List"), "h2")
 
     card_ids = []
@@ -404,5 +556,426 @@ def _render_info_list(data):
 
         card_ids.append(b.card(children))
 
+    if page_model is not None:
+        card_ids.append(_pager_row(b, page_model))
     root = b.column([title] + card_ids)
     return b.build(root)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  BOUND TEMPLATES
+#  The component tree is a skeleton that depends only on the data's
+#  shape (list-length bucket, which optional parts are present, static
+#  action names); every value lives in the data model. Skeletons are
+#  cached per (template, shape), and a client that already holds the
+#  skeleton only needs the new dataModelUpdate (see surface_diff.py).
+#  Lists are sent as JSON strings, which the renderer parses into arrays
+#  so that children.template gives every item a unique id.
+# ═══════════════════════════════════════════════════════════════
+
+_skeletons = OrderedDict()
+skeleton_stats = {"hits": 0, "misses": 0}
+
+
+def _bucket(items):
+    """List-length bucket: 0, 1 or 2 (two or more)."""
+    return min(len(items), 2)
+
+
+def _slug(name):
+    return name.lower().replace(" ", "-")
+
+
+def _price_label(price, period="month"):
+    return f"\u20ac{price}/{period}"
+
+
+def _model_contents(model):
+    """dataModelUpdate contents for a flat dict of strings and lists."""
+    contents = []
+    for key, value in model.items():
+        if isinstance(value, str):
+            stripped = value.strip()
+            if stripped[:1] + stripped[-1:] in ("[]", "{}"):
+                # The renderer would parse it as JSON; render literally instead.
+                raise ValueError(f"'{key}' looks like JSON")
+        else:
+            value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        contents.append({"key": key, "valueString": value})
+    return contents
+
+
+def _render_bound(name, data, page_data=None, page_model=None, ids=None):
+    """Cached skeleton + dataModelUpdate, or None if the data doesn't fit one.
+
+    With `page_data` (the same data with one page of items) the skeleton is
+    the paged variant, shaped by the whole list so that every page shares it,
+    and the data model holds that page plus `page_model`.
+    """
+    shape_fn, skeleton_fn, model_fn = _BOUND_TEMPLATES[name]
+    shape = shape_fn(data)
+    if shape is None:
+        return None
+    paged = page_data is not None
+    model = model_fn(page_data if paged else data)
+    if paged:
+        model.update(page_model or {})
+    contents = _model_contents(model)
+    ids = ids or DEFAULT_ID_STRATEGY
+    key = (name, paged, ids) + shape
+    skeleton = _skeletons.get(key)
+    if skeleton is None:
+        skeleton_stats["misses"] += 1
+        SKELETON_CACHE_REQUESTS.inc(result="miss")
+        if paged:
+            skeleton = _skeletons[key] = skeleton_fn(*shape, paged=True, ids=ids)
+        else:
+            skeleton = _skeletons[key] = skeleton_fn(*shape, ids=ids)
+        while len(_skeletons) > SKELETON_CACHE_SIZE:
+            _skeletons.popitem(last=False)
+    else:
+        skeleton_stats["hits"] += 1
+        SKELETON_CACHE_REQUESTS.inc(result="hit")
+        _skeletons.move_to_end(key)
+    # Cached messages are shared between renders and must not be mutated.
+    return skeleton + [{
+        "dataModelUpdate": {"surfaceId": "default", "path": "/", "contents": contents}
+    }]
+
+
+def _pager_row(b, page_model=None):
+    """Previous/next buttons around the page label, bound to the data model
+    or, for a literal render, with the values of `page_model`."""
+    if page_model is None:
+        context = {"listId": {"path": "/listId"}, "page": {"path": "/page"}}
+        label = {"path": "/pageLabel"}
+    else:
+        context = {"listId": page_model["listId"], "page": page_model["page"]}
+        label = page_model["pageLabel"]
+    return b.row([
+        b.button("Previous", "previous_page", context),
+        b.text(label, "caption"),
+        b.button("Next", "next_page", context),
+    ], "spaceBetween")
+
+
+def _feature_row(b, icon_name="check_circle"):
+    return b.row([b.icon(icon_name), b.text({"path": "text"})], "start")
+
+
+def _select_button(b):
+    return b.button("Select", "select_policy", {
+        "policyName": {"path": "name"},
+        "policyId": {"path": "id"},
+    })
+
+
+# ── policy_list ──
+
+def _shape_policy_list(data):
+    return (_bucket(data.get("policies", [])),)
+
+
+def _skeleton_policy_list(bucket, paged=False, ids=None):
+    b = A2UIBuilder(ids)
+    title = b.text({"path": "/title"}, "h2")
+    card = b.card([
+        b.text({"path": "name"}, "h3"),
+        b.text({"path": "priceLabel"}, "h4"),
+        b.column(b.template(_feature_row(b), "features")),
+        b.divider(),
+        _select_button(b),
+    ])
+    cards = b.template(card, "/policies")
+    if paged:
+        return b.build(b.column([title, b.list(cards, "horizontal"), _pager_row(b)]))
+    body = b.row(cards, "spaceEvenly") if bucket > 1 else b.column(cards)
+    return b.build(b.column([title, body]))
+
+
+def _model_policy_list(data):
+    return {
+        "title": data.get("title", "Available Policies"),
+        "policies": [{
+            "name": p["name"],
+            "priceLabel": _price_label(p["price"]),
+            "features": [{"text": str(f)} for f in p.get("features", [])],
+            "id": p.get("id") or _slug(p["name"]),
+        } for p in data.get("policies", [])],
+    }
+
+
+# ── policy_detail ──
+
+def _shape_policy_detail(data):
+    return (
+        data.get("deductible") is not None,
+        bool(data.get("maxCoverage")),
+        bool(data.get("benefits")),
+        data.get("actionName", "activate_policy"),
+    )
+
+
+def _skeleton_policy_detail(has_deductible, has_max_coverage, has_benefits, action_name, ids=None):
+    b = A2UIBuilder(ids)
+    children = [
+        b.text({"path": "/name"}, "h2"),
+        b.text({"path": "/type"}, "caption"),
+        b.text({"path": "/priceLabel"}, "h3"),
+        b.divider(),
+    ]
+    if has_deductible:
+        children.append(
+            b.row([b.text("Deductible:", "h5"), b.text({"path": "/deductible"})], "start")
+        )
+    if has_max_coverage:
+        children.append(
+            b.row([b.text("Max Coverage:", "h5"), b.text({"path": "/maxCoverage"})], "start")
+        )
+    children.append(b.divider())
+    children.append(b.text("Included Coverage", "h4"))
+    children.append(b.column(b.template(_feature_row(b), "/coverages")))
+    if has_benefits:
+        children.append(b.divider())
+        children.append(b.text("Benefits", "h4"))
+        children.append(b.column(b.template(_feature_row(b, "star"), "/benefits")))
+    children.append(b.divider())
+    children.append(b.button({"path": "/actionLabel"}, action_name, {
+        "policyName": {"path": "/name"},
+        "policyId": {"path": "/id"},
+    }))
+    return b.build(b.card(children))
+
+
+def _model_policy_detail(data):
+    model = {
+        "name": data.get("name", "Policy Details"),
+        "type": data.get("type", ""),
+        "priceLabel": _price_label(data.get("price", 0), data.get("period", "month")),
+        "coverages": [{"text": str(c)} for c in data.get("coverages", [])],
+        "benefits": [{"text": str(c)} for c in data.get("benefits") or []],
+        "actionLabel": data.get("actionLabel", "Activate this policy"),
+        "id": data.get("id", ""),
+    }
+    if data.get("deductible") is not None:
+        model["deductible"] = f"\u20ac{data['deductible']}"
+    if data.get("maxCoverage"):
+        model["maxCoverage"] = str(data["maxCoverage"])
+    return model
+
+
+# ── comparison ──
+
+def _shape_comparison(data):
+    plans = data.get("plans", [])
+    return (_bucket(plans), any(plan.get("highlighted") for plan in plans))
+
+
+def _skeleton_comparison(bucket, has_highlight, ids=None):
+    b = A2UIBuilder(ids)
+    title = b.text({"path": "/title"}, "h2")
+    children = []
+    if has_highlight:
+        # Empty icon and text on the plans that are not highlighted.
+        children.append(b.row([
+            b.icon({"path": "badgeIcon"}),
+            b.text({"path": "badge"}, "caption"),
+        ], "start"))
+    children += [
+        b.text({"path": "name"}, "h3"),
+        b.text({"path": "priceLabel"}, "h4"),
+        b.divider(),
+        b.column(b.template(_feature_row(b), "features")),
+        b.divider(),
+        _select_button(b),
+    ]
+    body = b.row(b.template(b.card(children), "/plans"), "spaceEvenly")
+    return b.build(b.column([title, body]))
+
+
+def _model_comparison(data):
+    return {
+        "title": data.get("title", "Plan Comparison"),
+        "plans": [{
+            "badgeIcon": "star" if plan.get("highlighted") else "",
+            "badge": "Recommended" if plan.get("highlighted") else "",
+            "name": plan["name"],
+            "priceLabel": _price_label(plan["price"], plan.get("period", "month")),
+            "features": [{"text": str(f)} for f in plan.get("features", [])],
+            "id": plan.get("id") or _slug(plan["name"]),
+        } for plan in data.get("plans", [])],
+    }
+
+
+# ── dashboard ──
+
+def _shape_dashboard(data):
+    kpis = data.get("kpis", [])
+    return (_bucket(kpis), any(kpi.get("description") for kpi in kpis))
+
+
+def _skeleton_dashboard(bucket, has_description, ids=None):
+    b = A2UIBuilder(ids)
+    title = b.text({"path": "/title"}, "h2")
+    children = [
+        b.text({"path": "value"}, "h2"),
+        b.text({"path": "label"}, "caption"),
+    ]
+    if has_description:
+        children.append(b.text({"path": "description"}, "body"))
+    body = b.row(b.template(b.card(children), "/kpis"), "spaceEvenly")
+    return b.build(b.column([title, body]))
+
+
+def _model_dashboard(data):
+    return {
+        "title": data.get("title", "Dashboard"),
+        "kpis": [{
+            "value": str(kpi.get("value", "—")),
+            "label": str(kpi.get("label", "")),
+            "description": str(kpi.get("description") or ""),
+        } for kpi in data.get("kpis", [])],
+    }
+
+
+# ── info_list ──
+
+def _shape_info_list(data):
+    items = data.get("items", [])
+    actions = {
+        item["actionName"] for item in items
+        if item.get("actionLabel") and item.get("actionName")
+    }
+    if len(actions) > 1 or (actions and any(not item.get("actionName") for item in items)):
+        # A button cannot be hidden per item, nor change its action name.
+        return None
+    return (
+        _bucket(items),
+        any(item.get("status") for item in items),
+        any(item.get("subtitle") for item in items),
+        next(iter(actions), None),
+    )
+
+
+def _skeleton_info_list(bucket, has_status, has_subtitle, action_name, paged=False, ids=None):
+    b = A2UIBuilder(ids)
+    title = b.text({"path": "/title"}, "h2")
+    header_parts = [b.text({"path": "title"}, "h4")]
+    if has_status:
+        header_parts.append(b.text({"path": "status"}, "caption"))
+    children = [b.row(header_parts, "spaceBetween")]
+    if has_subtitle:
+        children.append(b.text({"path": "subtitle"}, "body"))
+    detail = b.row([
+        b.text({"path": "label"}, "h5"),
+        b.text({"path": "value"}),
+    ], "spaceBetween")
+    children.append(b.column(b.template(detail, "details")))
+    if action_name:
+        children.append(b.button({"path": "actionLabel"}, action_name, {
+            "itemTitle": {"path": "title"},
+            "itemId": {"path": "id"},
+        }))
+    cards = b.template(b.card(children), "/items")
+    if paged:
+        return b.build(b.column([title, b.list(cards), _pager_row(b)]))
+    return b.build(b.column([title, b.column(cards)]))
+
+
+def _model_info_list(data):
+    return {
+        "title": data.get("title", "List"),
+        "items": [{
+            "title": str(item.get("title", "")),
+            "status": str(item.get("status") or ""),
+            "subtitle": str(item.get("subtitle") or ""),
+            "details": [{
+                "label": str(detail.get("label", "")),
+                "value": str(detail.get("value", "")),
+            } for detail in item.get("details", [])],
+            "actionLabel": str(item.get("actionLabel") or ""),
+            "id": str(item.get("id", "")),
+        } for item in data.get("items", [])],
+    }
+
+
+# The form template stays literal: its field paths and submit context keys
+# are derived from the labels, so the skeleton would change with every form.
+_BOUND_TEMPLATES = {
+    "policy_list": (_shape_policy_list, _skeleton_policy_list, _model_policy_list),
+    "policy_detail": (_shape_policy_detail, _skeleton_policy_detail, _model_policy_detail),
+    "comparison": (_shape_comparison, _skeleton_comparison, _model_comparison),
+    "dashboard": (_shape_dashboard, _skeleton_dashboard, _model_dashboard),
+    "info_list": (_shape_info_list, _skeleton_info_list, _model_info_list),
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  PAGINATION
+#  Long lists are rendered one page at a time from a "pager": the
+#  template name, the full data and the page size. The executor keeps
+#  pagers in a process-wide store (pager_store) under their listId and
+#  serves next/previous page actions from it without calling the LLM; the
+#  buttons carry the listId and the page shown. Every page shares one bound
+#  skeleton, so a client that keeps its surface receives a page flip as
+#  data only.
+# ═══════════════════════════════════════════════════════════════
+
+# Template -> key of the list that is paginated.
+PAGED_TEMPLATES = {"info_list": "items", "policy_list": "policies"}
+_PAGED_LITERAL = {"info_list": _render_info_list, "policy_list": _render_policy_list}
+
+
+def paginate(name, data, page_size=None):
+    """Pager for a list longer than one page, or None.
+
+    Lists a bound skeleton cannot express are not paginated.
+    """
+    page_size = page_size or PAGE_SIZE
+    key = PAGED_TEMPLATES.get(name)
+    if key is None or not isinstance(data, dict) or len(data.get(key) or []) <= page_size:
+        return None
+    if _BOUND_TEMPLATES[name][0](data) is None:
+        return None
+    logger.info(f"'{name}' list of {len(data[key])} items shown in pages of {page_size}")
+    list_id = _digest(json.dumps([name, data], sort_keys=True, default=str), 8)
+    return {"id": list_id, "template": name, "data": data, "page_size": page_size}
+
+
+def page_count(pager):
+    items = pager["data"][PAGED_TEMPLATES[pager["template"]]]
+    return max(1, -(-len(items) // pager["page_size"]))
+
+
+def render_page(pager, page, ids=None):
+    """A2UI messages for one page (clamped to the valid range) of a pager.
+
+    Like render_template, falls back to a literal render (with a literal
+    pager row) when the data does not fit the bound skeleton.
+    """
+    name, data, size = pager["template"], pager["data"], pager["page_size"]
+    key = PAGED_TEMPLATES[name]
+    pages = page_count(pager)
+    page = min(max(page, 0), pages - 1)
+    total = len(data[key])
+    first, last = page * size, min((page + 1) * size, total)
+    page_data = dict(data, **{key: data[key][first:last]})
+    # The label says how many items the page hides, so a list cut to one
+    # page never reads as the whole list.
+    label = f"Page {page + 1} of {pages}: items {first + 1}–{last} of {total}"
+    if total > last:
+        label += f" (+{total - last} more)"
+    logger.info(f"'{name}' page {page + 1} of {pages} shows items {first + 1}-{last} of {total}")
+    page_model = {"listId": pager["id"], "page": str(page), "pageLabel": label}
+    try:
+        messages = _render_bound(name, data, page_data, page_model, ids)
+    except Exception as e:
+        logger.error(f"Bound page of '{name}' failed: {e}")
+        messages = None
+    if messages is not None:
+        return messages
+    try:
+        return _PAGED_LITERAL[name](page_data, ids, page_model)
+    except Exception as e:
+        logger.error(f"Template '{name}' failed: {e}")
+        return None
@@ -0,0 +1,278 @@
+# A2UI Message Validator
+# Single-pass validation of A2UI server messages (beginRendering, surfaceUpdate,
+# dataModelUpdate, deleteSurface). Checks the same contract as A2UI_SCHEMA plus
+# the component graph, and reports problems as jsonschema ValidationErrors so
+# callers can keep catching a single exception type.
+
+from jsonschema.exceptions import ValidationError
+
+# Component properties that hold a single child component id.
+CHILD_KEYS = ("child", "entryPointChild", "contentChild")
+
+_TYPES = {"string": str, "object": dict, "array": list}
+_NO_REFS = ()
+
+
+def _fail(message, validator, path, instance):
+    raise ValidationError(message, validator=validator, path=path, instance=instance)
+
+
+def _check_type(value, type_name, path):
+    if type_name == "number":
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, _TYPES[type_name])
+    if not ok:
+        _fail(f"{value!r} is not of type {type_name!r}", "type", path, value)
+
+
+def _check_required(body, keys, path):
+    for key in keys:
+        if key not in body:
+            _fail(f"{key!r} is a required property", "required", path, body)
+
+
+class _Surface:
+    __slots__ = ("components", "refs", "roots", "updated")
+
+    def __init__(self):
+        self.components = {}  # id -> (entry, entry_path)
+        self.refs = {}        # id -> referenced child ids
+        self.roots = []       # [(root_id, path), ...]
+        self.updated = False
+
+
+def _iter_refs(component, path):
+    """Yield (child_id, path) for every component id a component references.
+
+    Only the properties that can hold component ids are inspected (child,
+    children.explicitList, children.template, tabItems[].child, ...), so
+    literal values and actions are never walked.
+    """
+    for type_name, props in component.items():
+        if not isinstance(props, dict):
+            continue
+        props_path = path + (type_name,)
+        for key in CHILD_KEYS:
+            if key in props:
+                yield props[key], props_path + (key,)
+        children = props.get("children")
+        if isinstance(children, dict):
+            explicit = children.get("explicitList")
+            if explicit is not None:
+                list_path = props_path + ("children", "explicitList")
+                _check_type(explicit, "array", list_path)
+                for j, child_id in enumerate(explicit):
+                    yield child_id, list_path + (j,)
+            template = children.get("template")
+            if isinstance(template, dict) and "componentId" in template:
+                yield template["componentId"], props_path + ("children", "template", "componentId")
+        tab_items = props.get("tabItems")
+        if isinstance(tab_items, list):
+            for j, tab in enumerate(tab_items):
+                if isinstance(tab, dict) and "child" in tab:
+                    yield tab["child"], props_path + ("tabItems", j, "child")
+
+
+def _collect_refs(component, entry_path):
+    """Fast path of _iter_refs: ids only, no per-reference path tuples."""
+    refs = None
+    malformed = False
+    for props in component.values():
+        if not isinstance(props, dict):
+            continue
+        for key in CHILD_KEYS:
+            if key in props:
+                refs = refs or []
+                refs.append(props[key])
+        children = props.get("children")
+        if isinstance(children, dict):
+            explicit = children.get("explicitList")
+            if explicit is not None:
+                if not isinstance(explicit, list):
+                    malformed = True
+                    break
+                refs = refs or []
+                refs.extend(explicit)
+            template = children.get("template")
+            if isinstance(template, dict) and "componentId" in template:
+                refs = refs or []
+                refs.append(template["componentId"])
+        tab_items = props.get("tabItems")
+        if isinstance(tab_items, list):
+            for tab in tab_items:
+                if isinstance(tab, dict) and "child" in tab:
+                    refs = refs or []
+                    refs.append(tab["child"])
+
+    if refs is None and not malformed:
+        return _NO_REFS
+    if not malformed and all(type(child_id) is str for child_id in refs):
+        return refs
+    # Something is malformed: take the slow path so the error carries a path.
+    for child_id, child_path in _iter_refs(component, entry_path + ("component",)):
+        _check_type(child_id, "string", child_path)
+    return refs or _NO_REFS
+
+
+def _ref_path(surface, parent_id, child_id):
+    entry, entry_path = surface.components[parent_id]
+    for ref_id, ref_path in _iter_refs(entry["component"], entry_path + ("component",)):
+        if ref_id == child_id:
+            return ref_path
+    return entry_path
+
+
+# ── Per-message checks ──
+
+def _check_begin_rendering(body, path, surfaces):
+    _check_type(body, "object", path)
+    _check_required(body, ("root", "surfaceId"), path)
+    _check_type(body["surfaceId"], "string", path + ("surfaceId",))
+    _check_type(body["root"], "string", path + ("root",))
+    styles = body.get("styles")
+    if styles is not None:
+        _check_type(styles, "object", path + ("styles",))
+        if "font" in styles:
+            _check_type(styles["font"], "string", path + ("styles", "font"))
+        color = styles.get("primaryColor")
+        if color is not None:
+            color_path = path + ("styles", "primaryColor")
+            _check_type(color, "string", color_path)
+            if not (
+                len(color) == 7
+                and color[0] == "#"
+                and all(c in "0123456789abcdefABCDEF" for c in color[1:])
+            ):
+                _fail(f"{color!r} does not match '^#[0-9a-fA-F]{{6}}$'", "pattern", color_path, color)
+    surfaces.setdefault(body["surfaceId"], _Surface()).roots.append(
+        (body["root"], path + ("root",))
+    )
+
+
+def _check_surface_update(body, path, surfaces):
+    _check_type(body, "object", path)
+    _check_required(body, ("surfaceId", "components"), path)
+    _check_type(body["surfaceId"], "string", path + ("surfaceId",))
+    components = body["components"]
+    components_path = path + ("components",)
+    _check_type(components, "array", components_path)
+    if not components:
+        _fail("[] should be non-empty", "minItems", components_path, components)
+
+    surface = surfaces.setdefault(body["surfaceId"], _Surface())
+    surface.updated = True
+    known = surface.components
+    refs = surface.refs
+    for j, entry in enumerate(components):
+        entry_path = components_path + (j,)
+        # Cheap exact-type checks first; build error details only on failure.
+        if (
+            type(entry) is not dict
+            or type(entry.get("id")) is not str
+            or type(entry.get("component")) is not dict
+        ):
+            _check_type(entry, "object", entry_path)
+            _check_required(entry, ("id", "component"), entry_path)
+            _check_type(entry["id"], "string", entry_path + ("id",))
+            _check_type(entry["component"], "object", entry_path + ("component",))
+        if "weight" in entry:
+            _check_type(entry["weight"], "number", entry_path + ("weight",))
+        cid = entry["id"]
+        if cid in known:
+            first_path = known[cid][1]
+            _fail(
+                f"Duplicate component id {cid!r} (first defined at "
+                f"{'/'.join(map(str, first_path))})",
+                "uniqueIds", entry_path + ("id",), cid,
+            )
+        known[cid] = (entry, entry_path)
+        refs[cid] = _collect_refs(entry["component"], entry_path)
+
+
+def _check_data_model_update(body, path, surfaces):
+    _check_type(body, "object", path)
+    _check_required(body, ("contents", "surfaceId"), path)
+    _check_type(body["surfaceId"], "string", path + ("surfaceId",))
+    if "path" in body:
+        _check_type(body["path"], "string", path + ("path",))
+    _check_type(body["contents"], "array", path + ("contents",))
+
+
+def _check_delete_surface(body, path, surfaces):
+    _check_type(body, "object", path)
+    _check_required(body, ("surfaceId",), path)
+    _check_type(body["surfaceId"], "string", path + ("surfaceId",))
+
+
+_MESSAGE_CHECKS = {
+    "beginRendering": _check_begin_rendering,
+    "surfaceUpdate": _check_surface_update,
+    "dataModelUpdate": _check_data_model_update,
+    "deleteSurface": _check_delete_surface,
+}
+
+
+# ── Component graph ──
+
+def _check_graph(surface_id, surface):
+    components = surface.components
+    refs = surface.refs
+    for root_id, root_path in surface.roots:
+        if root_id not in components:
+            _fail(
+                f"Root component {root_id!r} is not defined on surface {surface_id!r}",
+                "rootExists", root_path, root_id,
+            )
+
+    # Iterative DFS; every component is entered and left exactly once and
+    # every reference is resolved as it is followed.
+    visiting, done = 1, 2
+    state = {}
+    for start in components:
+        if start in state:
+            continue
+        state[start] = visiting
+        stack = [(start, iter(refs[start]))]
+        while stack:
+            cid, children = stack[-1]
+            for child_id in children:
+                child_state = state.get(child_id)
+                if child_state is None:
+                    if child_id not in components:
+                        _fail(
+                            f"Component {child_id!r} is referenced but not defined on surface {surface_id!r}",
+                            "childExists", _ref_path(surface, cid, child_id), child_id,
+                        )
+                    state[child_id] = visiting
+                    stack.append((child_id, iter(refs[child_id])))
+                    break
+                if child_state == visiting:
+                    _fail(
+                        f"Component {child_id!r} is part of a cycle on surface {surface_id!r}",
+                        "acyclic", _ref_path(surface, cid, child_id), child_id,
+                    )
+            else:
+                state[cid] = done
+                stack.pop()
+
+
+def validate_a2ui_messages(messages) -> None:
+    """Validate a list of A2UI server messages.
+
+    Raises jsonschema.exceptions.ValidationError on the first problem found.
+    The component graph is only checked for surfaces that received a
+    surfaceUpdate in this batch, since the client may already hold the rest.
+    """
+    _check_type(messages, "array", ())
+    surfaces: dict[str, _Surface] = {}
+    for i, message in enumerate(messages):
+        _check_type(message, "object", (i,))
+        for key, body in message.items():
+            check = _MESSAGE_CHECKS.get(key)
+            if check is not None:
+                check(body, (i, key), surfaces)
+
+    for surface_id, surface in surfaces.items():
+        if surface.updated:
+            _check_graph(surface_id, surface)
@@ -1,23 +1,46 @@
 # Insurance Assistant Agent
 # Template-based architecture: AI picks templates, Python generates A2UI.
 
+import hashlib
 import json
 import logging
 import os
-from collections.abc import AsyncIterable
+import time
+from collections.abc import AsyncIterable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass, field, replace
 from typing import Any
 
 import jsonschema
 from google.adk.agents.llm_agent import LlmAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.agents.invocation_context import new_invocation_context_id
 from google.adk.artifacts import InMemoryArtifactService
+from google.adk.events.event import Event
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+from google.adk.models.base_llm import BaseLlm
 from google.adk.models.lite_llm import LiteLlm
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
-from prompt_builder import A2UI_SCHEMA, get_text_prompt, get_template_prompt
-from a2ui_templates import render_template
+from prompt_builder import get_text_prompt, get_template_prompt
+from a2ui_validator import validate_a2ui_messages
+from json_repair import repair_json
+from model_router import FAST, STRONG, ModelRouter
+from provider_pool import STREAM_RESTART, HedgedLlm
+from http_pool import http_pool
+from metrics import (
+    JSON_REPAIRS,
+    LLM_RETRIES,
+    RENDER_SECONDS,
+    STAGE_SECONDS,
+    TEXT_FALLBACKS,
+    VALIDATION_FAILURES,
+)
+from session_store import BoundedSessionService
+from a2ui_templates import page_count, paginate, render_page, render_template
+from streaming_json import EnvelopeStreamParser
+from template_schemas import TEMPLATE_MODELS, Envelope, structured_output_enabled, validate_envelope
 
 logger = logging.getLogger(__name__)
 
@@ -51,61 +74,298 @@ KNOWLEDGE:
 """
 
 
+@dataclass
+class AgentResponse:
+    """Final reply of UIBuilderAgent.stream, consumed by the executor as-is.
+
+    Carrying the rendered A2UI messages as Python objects avoids dumping the
+    envelope to JSON in the agent only to parse it again in the executor.
+    """
+
+    message: str
+    ui: list[dict] | None = None
+    metadata: dict[str, Any] = field(default_factory=dict)
+    # The model's own reply text, as stored in the session history.
+    raw: str = field(default="", repr=False)
+    # Full item set of a paginated list (see a2ui_templates.paginate).
+    pager: dict | None = field(default=None, repr=False)
+
+
+# Stands in for the reply of a turn whose generation was canceled.
+CANCELED_REPLY = "(Canceled before a reply was sent.)"
+
+
 class UIBuilderAgent:
     """Insurance assistant that uses templates for UI generation."""
 
     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
 
-    def __init__(self, use_ui: bool = False):
+    def __init__(
+        self,
+        use_ui: bool = False,
+        streaming: bool | None = None,
+        model_factory: Callable[[str], BaseLlm] | None = None,
+    ):
         self.use_ui = use_ui
-        self._agent = self._build_agent(use_ui)
+        # Builds the model from its LiteLLM name (once per provider when
+        # LLM_FALLBACK_MODELS is set) on the shared HTTP pool; benchmarks swap
+        # in a fake.
+        self._model_factory = model_factory or (
+            lambda name: LiteLlm(model=name, **http_pool().litellm_args(name))
+        )
+        # Token-level streaming: forward the "message" text as it is generated
+        # and render the template as soon as its "data" object closes.
+        if streaming is None:
+            streaming = os.getenv("AGENT_STREAMING", "true").lower() != "false"
+        self.streaming = streaming
+        self._run_config = RunConfig(
+            streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE
+        )
+        LITELLM_MODEL = os.getenv("LITELLM_MODEL", "gemini/gemini-2.5-flash")
+        self.router = ModelRouter.from_env(LITELLM_MODEL)
+        models = self.router.models if self.router else {STRONG: LITELLM_MODEL}
+
+        if use_ui:
+            instruction = AGENT_INSTRUCTION + get_template_prompt()
+        else:
+            instruction = get_text_prompt()
+        self._agent = self._build_agent(use_ui, LITELLM_MODEL, instruction)
+        # Identifies the prompt in cache keys, so editing it invalidates them.
+        signature = "\n".join(
+            f"{model}:{use_ui and structured_output_enabled(model)}" for model in models.values()
+        )
+        self.prompt_version = hashlib.sha256(
+            f"{signature}\n{instruction}".encode("utf-8")
+        ).hexdigest()[:16]
+
         self._user_id = "ui_builder_user"
         self._runner = Runner(
             app_name=self._agent.name,
             agent=self._agent,
             artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
+            session_service=BoundedSessionService.from_env(
+                namespace="ui" if use_ui else "text"
+            ),
             memory_service=InMemoryMemoryService(),
         )
+        # Runner per route; the fast one shares the strong one's sessions, so
+        # either model continues the same conversation.
+        self._runners = {STRONG: self._runner}
+        if self.router:
+            self._runners[FAST] = Runner(
+                app_name=self._agent.name,
+                agent=self._build_agent(use_ui, models[FAST], instruction),
+                artifact_service=self._runner.artifact_service,
+                session_service=self._runner.session_service,
+                memory_service=self._runner.memory_service,
+            )
 
-        # Load schema for optional validation of template output
-        try:
-            single_message_schema = json.loads(A2UI_SCHEMA)
-            self.a2ui_schema_object = {"type": "array", "items": single_message_schema}
-            logger.info("A2UI_SCHEMA successfully loaded.")
-        except json.JSONDecodeError as e:
-            logger.error(f"CRITICAL: Failed to parse A2UI_SCHEMA: {e}")
-            self.a2ui_schema_object = None
+    async def close(self):
+        """Flush session state that is still waiting to be written."""
+        await self._runner.session_service.close()
 
     def get_processing_message(self) -> str:
         return "Generating your response..."
 
-    def _build_agent(self, use_ui: bool) -> LlmAgent:
+    def _build_agent(self, use_ui: bool, model_name: str, instruction: str) -> LlmAgent:
         """Builds the LLM agent.
 
         Supported models via LiteLLM:
         - Gemini: gemini/gemini-2.5-flash, gemini/gemini-2.5-pro
         - OpenAI: gpt-4o, gpt-4o-mini
         - Anthropic: claude-3-5-sonnet-20241022
-        Set via LITELLM_MODEL env var.
+        Set via LITELLM_MODEL env var (and LITELLM_FAST_MODEL, see model_router).
         """
-        LITELLM_MODEL = os.getenv("LITELLM_MODEL", "gemini/gemini-2.5-flash")
-        logger.info(f"Using LLM model: {LITELLM_MODEL}")
+        logger.info(f"Using LLM model: {model_name}")
 
-        if use_ui:
-            instruction = AGENT_INSTRUCTION + get_template_prompt()
-        else:
-            instruction = get_text_prompt()
+        # Constrain the reply to the envelope schema where the provider
+        # supports it; otherwise the prompt alone describes the format.
+        structured_output = use_ui and structured_output_enabled(model_name)
+        if structured_output:
+            logger.info(f"Structured output: {model_name} replies constrained to the envelope schema.")
 
+        # Both routes share the name: session history is authored by it.
         return LlmAgent(
-            model=LiteLlm(model=LITELLM_MODEL),
+            model=HedgedLlm.from_env(model_name, self._model_factory, usable=self._reply_is_usable),
             name="ui_builder_agent",
             description="An insurance assistant that creates rich interfaces from templates.",
             instruction=instruction,
+            output_schema=Envelope if structured_output else None,
             tools=[],
         )
 
-    async def stream(self, query, session_id) -> AsyncIterable[dict[str, Any]]:
+    def _reply_is_usable(self, text: str) -> bool:
+        """Cheap check that picks between hedged provider replies: an
+        envelope (after local repair) whose data fits the template it names,
+        or any text for the text agent. The rendered A2UI is still validated
+        on the winner."""
+        if not self.use_ui:
+            return bool(text.strip())
+        try:
+            envelope, _ = repair_json(text)
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(envelope, dict):
+            return False
+        try:
+            validate_envelope(envelope)
+        except ValueError:
+            return False
+        return True
+
+    def _render_ui(
+        self, template_name: str, data: dict, pager: dict | None = None, ids: str | None = None,
+    ) -> list | None:
+        """Render a template (or the first page of a pager) with component id
+        strategy `ids` and validate the resulting A2UI messages."""
+        logger.info(f"Rendering template: {template_name}")
+        with RENDER_SECONDS.time(template=template_name):
+            if pager is not None:
+                a2ui_messages = render_page(pager, 0, ids)
+            else:
+                a2ui_messages = render_template(template_name, data, ids=ids)
+        if not a2ui_messages:
+            logger.warning(f"Template '{template_name}' returned None, falling back to text-only.")
+            TEXT_FALLBACKS.inc(reason="render_empty")
+            return None
+        logger.info(f"Template '{template_name}' rendered {len(a2ui_messages)} A2UI messages.")
+        with STAGE_SECONDS.time(stage="validate"):
+            validate_a2ui_messages(a2ui_messages)
+        logger.info("A2UI validation passed.")
+        return a2ui_messages
+
+    def render_whole(self, response: AgentResponse, ids: str | None = None) -> AgentResponse:
+        """`response` with its paginated list rendered in full, for when the
+        other pages could not be served; unchanged if that does not render."""
+        pager = response.pager
+        logger.warning(f"Pages of '{pager['template']}' list {pager['id']} cannot be served; rendering it whole")
+        ui = self._render_ui(pager["template"], pager["data"], None, ids)
+        if ui is None:
+            return response
+        return replace(response, ui=ui, pager=None)
+
+    def _process_ui_response(
+        self, response_text: str, streamed: EnvelopeStreamParser | None = None,
+        streamed_ui: list | None = None, paginate_lists: bool = False, ids: str | None = None,
+    ) -> AgentResponse:
+        """Parse the LLM envelope, render its template and validate the output.
+
+        When the template was already rendered while streaming, the streamed
+        A2UI messages are reused instead of rendering the same data twice.
+        With `paginate_lists` long lists are rendered one page at a time;
+        `ids` is the component id strategy.
+        Raises ValueError, json.JSONDecodeError or jsonschema ValidationError.
+        """
+        with STAGE_SECONDS.time(stage="json_parse"):
+            if not response_text.strip():
+                raise ValueError("Response is empty.")
+            # Small faults are fixed locally; anything else raises and costs
+            # an LLM retry.
+            parsed, faults = repair_json(response_text)
+        if faults:
+            logger.info(f"Repaired LLM JSON locally: {', '.join(faults)}")
+            for fault in faults:
+                JSON_REPAIRS.inc(fault=fault)
+
+        if not isinstance(parsed, dict):
+            raise ValueError("Response must be a JSON object.")
+
+        # ── Template rendering ──
+        template_name = parsed.get("template")
+        if template_name:
+            # The provider schema pairs template and data where structured
+            # output is on; without it (or after a failover) only this does.
+            with STAGE_SECONDS.time(stage="validate"):
+                validate_envelope(parsed)
+            pager = paginate(template_name, parsed.get("data")) if paginate_lists else None
+            if (
+                streamed_ui
+                and streamed is not None
+                and streamed.template == template_name
+                and streamed.data == parsed.get("data")
+            ):
+                a2ui_messages = streamed_ui
+            else:
+                a2ui_messages = self._render_ui(template_name, parsed.get("data", {}), pager, ids)
+            return AgentResponse(
+                message=parsed.get("message", ""),
+                ui=a2ui_messages or None,
+                metadata={"template": template_name},
+                pager=pager if a2ui_messages else None,
+            )
+
+        # ── Validate raw A2UI output (if present) ──
+        elif "ui" in parsed:
+            ui_array = parsed["ui"]
+            if not isinstance(ui_array, list):
+                raise ValueError("'ui' field must be an array.")
+            with STAGE_SECONDS.time(stage="validate"):
+                validate_a2ui_messages(ui_array)
+            logger.info("A2UI validation passed.")
+
+        # Must have at least a message
+        if "message" not in parsed:
+            raise ValueError("Response must have a 'message' field.")
+
+        return AgentResponse(message=parsed["message"], ui=parsed.get("ui"))
+
+    def _stream_partial(
+        self, chunk: str, parser: EnvelopeStreamParser | None, state: dict,
+        paginate_lists: bool = False, ids: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Turn one partial LLM chunk into working-status stream items."""
+        if parser is None:
+            # Text agent: the whole reply is the message.
+            state["sent"] = state.get("sent", 0) + len(chunk)
+            return [{"is_task_complete": False, "updates": chunk}]
+
+        items = []
+        for kind, _ in parser.feed(chunk):
+            if kind == "message":
+                continue
+            if (
+                kind in ("template", "data")
+                and state.get("ui") is None
+                and parser.template
+                and parser.data is not None
+            ):
+                try:
+                    model = TEMPLATE_MODELS.get(parser.template)
+                    if model is None:
+                        raise ValueError(f"Unknown template '{parser.template}'")
+                    model.model_validate(parser.data)
+                    pager = paginate(parser.template, parser.data) if paginate_lists else None
+                    state["ui"] = self._render_ui(parser.template, parser.data, pager, ids) or []
+                except (ValueError, jsonschema.exceptions.ValidationError) as e:
+                    # Not rendered early; the final reply is checked again.
+                    logger.warning(f"Streamed template failed validation: {e}")
+                    state["ui"] = []
+                if state["ui"]:
+                    items.append({
+                        "is_task_complete": False,
+                        "updates": "",
+                        "ui": state["ui"],
+                    })
+
+        delta = parser.message[state.get("sent", 0):]
+        if delta:
+            state["sent"] = len(parser.message)
+            items.insert(0, {"is_task_complete": False, "updates": delta})
+        return items
+
+    @staticmethod
+    def _reset_item(state: dict) -> dict[str, Any] | None:
+        """Working item that takes back what an attempt streamed (message
+        text, rendered surfaces) before another attempt replaces it; None
+        when it streamed nothing."""
+        surfaces = sorted({
+            message["beginRendering"]["surfaceId"] for message in state.get("ui") or () if "beginRendering" in message
+        })
+        if not state.get("sent") and not surfaces:
+            return None
+        return {"is_task_complete": False, "updates": "", "reset": True, "surfaces": surfaces}
+
+    async def _get_or_create_session(self, session_id):
         session = await self._runner.session_service.get_session(
             app_name=self._agent.name,
             user_id=self._user_id,
@@ -118,118 +378,195 @@ class UIBuilderAgent:
                 state={},
                 session_id=session_id,
             )
+        return session
+
+    async def record_turn(self, query: str, session_id: str, response: AgentResponse) -> None:
+        """Add a turn answered without the LLM (e.g. from a cache) to the
+        session history, so follow-up requests still see it."""
+        session = await self._get_or_create_session(session_id)
+        invocation_id = new_invocation_context_id()
+        for author, role, text in (
+            ("user", "user", query),
+            (self._agent.name, "model", response.raw or response.message),
+        ):
+            await self._runner.session_service.append_event(
+                session,
+                Event(
+                    invocation_id=invocation_id,
+                    author=author,
+                    content=types.Content(role=role, parts=[types.Part.from_text(text=text)]),
+                ),
+            )
+
+    async def close_canceled_turn(self, session_id: str) -> None:
+        """Answer a user turn left open by a canceled generation, so the
+        history keeps alternating and the model knows it went unanswered."""
+        session = await self._runner.session_service.get_session(
+            app_name=self._agent.name,
+            user_id=self._user_id,
+            session_id=session_id,
+        )
+        if session is None or not session.events or session.events[-1].author != "user":
+            return
+        await self._runner.session_service.append_event(
+            session,
+            Event(
+                invocation_id=session.events[-1].invocation_id,
+                author=self._agent.name,
+                content=types.Content(role="model", parts=[types.Part.from_text(text=CANCELED_REPLY)]),
+            ),
+        )
+
+    async def turn_page(
+        self, query: str, session_id: str, pager: dict, page: int, ids: str | None = None,
+    ) -> AgentResponse | None:
+        """Render `page` (clamped) of a stored pager and record the turn.
+
+        Returns None when the page does not render.
+        """
+        pages = page_count(pager)
+        page = min(max(page, 0), pages - 1)
+        with RENDER_SECONDS.time(template=pager["template"]):
+            ui = render_page(pager, page, ids)
+        if not ui:
+            return None
+        response = AgentResponse(
+            message="",
+            ui=ui,
+            metadata={"template": pager["template"], "page": page},
+            raw=f"(Showing page {page + 1} of {pages} of the list.)",
+        )
+        await self.record_turn(query, session_id, response)
+        return response
+
+    async def stream(
+        self, query, session_id, paginate_lists: bool = False, ids: str | None = None,
+    ) -> AsyncIterable[dict[str, Any]]:
+        """Yield working updates, then one final item whose "response" is an
+        AgentResponse. With `paginate_lists` long lists come one page at a
+        time (the response then carries the pager); `ids` is the component
+        id strategy of rendered templates. Before a retry or a provider
+        failover replaces a reply that was partly streamed, a "reset" item
+        lists what to take back."""
+        session = await self._get_or_create_session(session_id)
 
         max_retries = 1
         attempt = 0
         current_query_text = query
+        route = self.router.route(query) if self.router else None
+        stream_state: dict[str, Any] = {}
 
         while attempt <= max_retries:
+            reset = self._reset_item(stream_state)
+            if reset:
+                yield reset
             attempt += 1
             logger.info(f"Attempt {attempt}/{max_retries + 1} for session {session_id}")
+            if route and attempt > 1:
+                route = self.router.escalate(route)
+            runner = self._runners[route.model if route else STRONG]
 
             current_message = types.Content(
                 role="user", parts=[types.Part.from_text(text=current_query_text)]
             )
             final_response_content = None
+            parser = EnvelopeStreamParser() if self.use_ui else None
+            stream_state: dict[str, Any] = {}
+            llm_start = time.perf_counter()
+            first_token = True
 
             # ── LLM call with retry on failure ──
             try:
-                async for event in self._runner.run_async(
+                # Closed on break or cancellation, which also closes the
+                # provider stream instead of leaving it to the GC.
+                async with aclosing(runner.run_async(
                     user_id=self._user_id,
                     session_id=session.id,
                     new_message=current_message,
-                ):
-                    if event.is_final_response():
-                        if (
-                            event.content
-                            and event.content.parts
-                            and event.content.parts[0].text
-                        ):
-                            final_response_content = "\n".join(
-                                [p.text for p in event.content.parts if p.text]
-                            )
-                        break
-                    else:
-                        yield {
-                            "is_task_complete": False,
-                            "updates": self.get_processing_message(),
-                        }
+                    run_config=self._run_config,
+                )) as events:
+                    async for event in events:
+                        if first_token and (event.partial or event.is_final_response()):
+                            first_token = False
+                            STAGE_SECONDS.observe(time.perf_counter() - llm_start, stage="llm_first_token")
+                        if event.partial:
+                            if event.custom_metadata and event.custom_metadata.get(STREAM_RESTART):
+                                # Another provider's reply follows.
+                                reset = self._reset_item(stream_state)
+                                if reset:
+                                    yield reset
+                                parser = EnvelopeStreamParser() if self.use_ui else None
+                                stream_state = {}
+                                continue
+                            parts = event.content.parts if event.content and event.content.parts else []
+                            chunk = "".join(p.text for p in parts if p.text)
+                            if chunk:
+                                for item in self._stream_partial(chunk, parser, stream_state, paginate_lists, ids):
+                                    yield item
+                            continue
+                        if event.is_final_response():
+                            if (
+                                event.content
+                                and event.content.parts
+                                and event.content.parts[0].text
+                            ):
+                                final_response_content = "\n".join(
+                                    [p.text for p in event.content.parts if p.text]
+                                )
+                            break
+                        else:
+                            yield {
+                                "is_task_complete": False,
+                                "updates": self.get_processing_message(),
+                            }
             except Exception as e:
                 logger.error(f"LLM call failed (Attempt {attempt}): {e}")
                 if attempt <= max_retries:
+                    LLM_RETRIES.inc(reason="error")
                     current_query_text = f"Please retry: '{query}'"
                     continue
                 else:
+                    TEXT_FALLBACKS.inc(reason="llm_error")
+                    reset = self._reset_item(stream_state)
+                    if reset:
+                        yield reset
                     yield {
                         "is_task_complete": True,
-                        "content": json.dumps({"message": "Sorry, I'm having trouble right now. Please try again."}),
+                        "response": AgentResponse(message="Sorry, I'm having trouble right now. Please try again."),
                     }
                     return
 
+            llm_seconds = time.perf_counter() - llm_start
+            STAGE_SECONDS.observe(llm_seconds, stage="llm_total")
+            if route:
+                self.router.observe(route, llm_seconds)
+
             if final_response_content is None:
                 logger.warning(f"No final response content (Attempt {attempt})")
                 if attempt <= max_retries:
+                    LLM_RETRIES.inc(reason="empty")
                     current_query_text = f"Please retry: '{query}'"
                     continue
                 else:
+                    TEXT_FALLBACKS.inc(reason="llm_empty")
+                    reset = self._reset_item(stream_state)
+                    if reset:
+                        yield reset
                     yield {
                         "is_task_complete": True,
-                        "content": json.dumps({"message": "Sorry, I couldn't process your request."}),
+                        "response": AgentResponse(message="Sorry, I couldn't process your request."),
                     }
                     return
 
             # ── Parse and process response ──
-            is_valid = False
+            response = None
             error_message = ""
 
             if self.use_ui:
                 try:
-                    json_string_cleaned = (
-                        final_response_content.strip()
-                        .lstrip("```json").lstrip("```")
-                        .rstrip("```").strip()
+                    response = self._process_ui_response(
+                        final_response_content, parser, stream_state.get("ui"), paginate_lists, ids
                     )
-                    if not json_string_cleaned:
-                        raise ValueError("Cleaned JSON string is empty.")
-
-                    parsed = json.loads(json_string_cleaned)
-
-                    if not isinstance(parsed, dict):
-                        raise ValueError("Response must be a JSON object.")
-
-                    # ── Template rendering ──
-                    template_name = parsed.get("template")
-                    if template_name:
-                        logger.info(f"Rendering template: {template_name}")
-                        a2ui_messages = render_template(
-                            template_name, parsed.get("data", {})
-                        )
-                        if a2ui_messages:
-                            parsed = {
-                                "message": parsed.get("message", ""),
-                                "ui": a2ui_messages,
-                            }
-                            logger.info(f"Template '{template_name}' rendered {len(a2ui_messages)} A2UI messages.")
-                        else:
-                            logger.warning(f"Template '{template_name}' returned None, falling back to text-only.")
-                            parsed = {"message": parsed.get("message", "")}
-
-                    # ── Validate A2UI output (if present) ──
-                    if "ui" in parsed and self.a2ui_schema_object:
-                        ui_array = parsed["ui"]
-                        if not isinstance(ui_array, list):
-                            raise ValueError("'ui' field must be an array.")
-                        jsonschema.validate(
-                            instance=ui_array, schema=self.a2ui_schema_object
-                        )
-                        logger.info("A2UI validation passed.")
-
-                    # Must have at least a message
-                    if "message" not in parsed:
-                        raise ValueError("Response must have a 'message' field.")
-
-                    is_valid = True
-                    final_response_content = json.dumps(parsed)
 
                 except (
                     ValueError,
@@ -238,26 +575,43 @@ class UIBuilderAgent:
                 ) as e:
                     logger.warning(f"Validation failed (Attempt {attempt}): {e}")
                     error_message = f"Validation failed: {e}."
+                    if isinstance(e, json.JSONDecodeError):
+                        VALIDATION_FAILURES.inc(kind="json")
+                    elif isinstance(e, jsonschema.exceptions.ValidationError):
+                        VALIDATION_FAILURES.inc(kind="a2ui")
+                    else:
+                        VALIDATION_FAILURES.inc(kind="envelope")
             else:
-                is_valid = True
+                response = AgentResponse(message=final_response_content.strip())
 
-            if is_valid:
+            if response is not None:
                 logger.info(f"Response valid (Attempt {attempt}). Sending.")
+                response.metadata["attempts"] = attempt
+                if route:
+                    response.metadata["route"] = route.model
+                    if self.use_ui:
+                        self.router.record_outcome(route, response.metadata.get("template"))
+                response.raw = final_response_content
                 yield {
                     "is_task_complete": True,
-                    "content": final_response_content,
+                    "response": response,
                 }
                 return
 
             if attempt <= max_retries:
                 logger.warning(f"Retrying... ({attempt}/{max_retries + 1})")
+                LLM_RETRIES.inc(reason="invalid")
                 current_query_text = (
                     f"Your previous response was invalid JSON. {error_message} "
                     f"Please respond with valid JSON. Original request: '{query}'"
                 )
 
         logger.error("Max retries exhausted.")
+        TEXT_FALLBACKS.inc(reason="retries_exhausted")
+        reset = self._reset_item(stream_state)
+        if reset:
+            yield reset
         yield {
             "is_task_complete": True,
-            "content": json.dumps({"message": "Sorry, I'm having trouble generating a response. Please try again."}),
+            "response": AgentResponse(message="Sorry, I'm having trouble generating a response. Please try again."),
         }
@@ -1,10 +1,14 @@
 # Generic UI Builder Agent Executor
 # Demo for Generative Frontend / Server-Driven UI session
 
+import asyncio
 import json
 import logging
 import os
 import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 
 # Add lib directory to path for local a2ui module
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
@@ -18,36 +22,196 @@ from a2a.types import (
     Task,
     TaskState,
     TextPart,
-    UnsupportedOperationError,
 )
 from a2a.utils import (
     new_agent_parts_message,
     new_agent_text_message,
     new_task,
 )
-from a2a.utils.errors import ServerError
 from a2ui.extension import create_a2ui_part, try_activate_a2ui_extension
-from agent import UIBuilderAgent
+from agent import AgentResponse, UIBuilderAgent
+from json_repair import repair_json
+from metrics import STAGE_SECONDS, TEXT_FALLBACKS, TURNS_CANCELED
+from pager_store import PagerStore
+from response_cache import ResponseCache, cache_key
+from scheduler import BUSY_MESSAGE, SchedulerBusy, TurnScheduler
+from single_flight import SingleFlight, flight_key
+from surface_batches import SurfaceBatcher
+from surface_diff import SurfaceDiffer
 
 logger = logging.getLogger(__name__)
 
+# Pager buttons of paginated lists, served from the pager store.
+PAGE_STEPS = {"next_page": 1, "previous_page": -1}
+
+
+@dataclass
+class _RunningTurn:
+    """A turn of a conversation, queued behind an earlier one or executing,
+    so it can be stopped."""
+
+    task_id: str
+    task: asyncio.Task | None = None
+    # Set when stopped on purpose: "cancel" (tasks/cancel) or "preempted".
+    reason: str | None = None
+    # Whether the A2A task ends as canceled; a newer message on the same
+    # task continues it instead.
+    end_task: bool = True
+    # A task canceled before it starts never runs its cleanup, so it is
+    # only flagged until then.
+    started: bool = False
+    # Waiting for the conversation's earlier turns; cleared once it runs.
+    queued: bool = True
+    # Set once the turn has been stopped and cleaned up.
+    stopped: bool = False
+
+    def stop(self, reason: str, end_task: bool = True) -> None:
+        if self.reason is not None or self.task.done():
+            return
+        self.reason = reason
+        self.end_task = end_task
+        if self.started:
+            self.task.cancel()
+
 
 class UIBuilderAgentExecutor(AgentExecutor):
     """Generic UI Builder AgentExecutor."""
 
-    def __init__(self):
-        # Instantiate two agents: one for UI and one for text-only
-        self.ui_agent = UIBuilderAgent(use_ui=True)
-        self.text_agent = UIBuilderAgent(use_ui=False)
+    def __init__(self, model_factory=None):
+        # Two agents: one for UI and one for text-only. The text agent only
+        # serves clients without the A2UI extension and is built on first use.
+        self.ui_agent = UIBuilderAgent(use_ui=True, model_factory=model_factory)
+        self._model_factory = model_factory
+        self._text_agent: UIBuilderAgent | None = None
+        # The caches, pagers and surface mirrors below live in this process,
+        # while with --workers the next request of a conversation may reach
+        # another one: page flips would miss their list and diffs would be
+        # built against a mirror the client never got. They are off there.
+        self.worker_local = int(os.getenv("AGENT_WORKERS", "1")) == 1
+        if not self.worker_local:
+            logger.info("Multiple workers: response caches, pagination and surface diffs are off.")
+        # Opt-in exact-match cache for UI actions (RESPONSE_CACHE=true)
+        self.response_cache = ResponseCache.from_env() if self.worker_local else None
+        # Opt-in similarity cache for free-text UI queries (SEMANTIC_CACHE=true)
+        self.semantic_cache = None
+        if self.worker_local and os.getenv("SEMANTIC_CACHE", "false").lower() == "true":
+            # Imported lazily: NumPy is an optional dependency.
+            from semantic_cache import SemanticCache
+            self.semantic_cache = SemanticCache.from_env()
+        # Mirrors of client surfaces, for clients that ask for diffs.
+        self.surface_differ = SurfaceDiffer.from_env()
+        # Splits large renders for clients that read working updates.
+        self.surface_batcher = SurfaceBatcher.from_env()
+        # Per-session turn order and global LLM admission control.
+        self.scheduler = TurnScheduler.from_env()
+        # Duplicate requests await (or replay) the first one's final parts.
+        self.single_flight = SingleFlight.from_env()
+        # Paginated lists by listId, for page flips from any conversation.
+        self.pagers = PagerStore.from_env()
+        # context_id -> the turns of that conversation, queued or running.
+        self._running: dict[str, list[_RunningTurn]] = {}
+        # Sessions that opted out of the semantic cache (bounded, LRU).
+        self._semantic_opt_out: OrderedDict[str, None] = OrderedDict()
+
+    @property
+    def text_agent(self) -> UIBuilderAgent:
+        if self._text_agent is None:
+            self._text_agent = UIBuilderAgent(use_ui=False, model_factory=self._model_factory)
+        return self._text_agent
+
+    def _agents(self) -> list[UIBuilderAgent]:
+        """The agents built so far."""
+        return [agent for agent in (self.ui_agent, self._text_agent) if agent is not None]
+
+    async def close(self):
+        for agent in self._agents():
+            await agent.close()
 
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
+        with STAGE_SECONDS.time(stage="execute"):
+            key = self._flight_key(context)
+            final_parts = await self.single_flight.join(key) if key else None
+            if final_parts is not None:
+                logger.info("Duplicate request: replaying the final parts of the first one")
+                await self._send_replay(context, event_queue, final_parts)
+                return
+            try:
+                # A different message makes the queued and running turns of
+                # this conversation stale (duplicates were coalesced above).
+                self._preempt(context)
+                final_parts = await self._run_turn(context, event_queue)
+            finally:
+                if key:
+                    self.single_flight.finish(key, final_parts)
+
+    def _preempt(self, context: RequestContext) -> None:
+        for running in self._running.get(context.context_id, ()):
+            if running.task.done() or running.reason:
+                continue
+            state = "queued" if running.queued else "running"
+            logger.info(f"New message in context {context.context_id}: preempting {state} task {running.task_id}")
+            running.stop("preempted", end_task=running.task_id != context.task_id)
+
+    async def _run_turn(self, context: RequestContext, event_queue: EventQueue) -> list[Part] | None:
+        """Run the turn as its own asyncio task, which cancel() and newer
+        messages of the conversation can stop, while it waits for the
+        conversation's earlier turns as well as while it runs."""
+        running = _RunningTurn(context.task_id)
+        running.task = asyncio.create_task(self._stoppable_turn(context, event_queue, running))
+        turns = self._running.setdefault(context.context_id, [])
+        turns.append(running)
+        try:
+            return await running.task
+        finally:
+            turns.remove(running)
+            if not turns and self._running.get(context.context_id) is turns:
+                del self._running[context.context_id]
+
+    async def _stoppable_turn(
+        self, context: RequestContext, event_queue: EventQueue, running: _RunningTurn
+    ) -> list[Part] | None:
+        running.started = True
+        try:
+            if running.reason is None:
+                # Overlapping turns of one conversation (e.g. a double click)
+                # would interleave in the session history; run them in order.
+                async with self.scheduler.session(context.context_id):
+                    running.queued = False
+                    if running.reason is None:
+                        return await self._execute(context, event_queue)
+        except asyncio.CancelledError:
+            if running.reason is None:
+                raise
+        # Closing the LLM event stream has already closed the provider call
+        # and released the LLM slot; leave the session and task consistent.
+        # A turn stopped in the queue never touched the session, which an
+        # earlier turn may still be writing to.
+        logger.info(f"Task {running.task_id} stopped ({running.reason})")
+        TURNS_CANCELED.inc(reason=running.reason)
+        if not running.queued:
+            for agent in self._agents():
+                await agent.close_canceled_turn(context.context_id)
+        if running.end_task:
+            updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+            text = "Canceled." if running.reason == "cancel" else "Replaced by a newer message."
+            await updater.cancel(new_agent_text_message(text, context.context_id, context.task_id))
+        running.stopped = True
+        return None
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> list[Part] | None:
+        """Run one turn; returns the final parts if duplicates may reuse them."""
         query = ""
         ui_event_part = None
         action = None
+        ctx = None
 
         logger.info(f"Client requested extensions: {context.requested_extensions}")
         use_ui = try_activate_a2ui_extension(context)
@@ -60,6 +224,7 @@ class UIBuilderAgentExecutor(AgentExecutor):
             logger.info("A2UI extension not active. Using text agent.")
 
         # Process message parts
+        parse_start = time.perf_counter()
         if context.message and context.message.parts:
             logger.info(f"Processing {len(context.message.parts)} message parts")
             for i, part in enumerate(context.message.parts):
@@ -73,8 +238,10 @@ class UIBuilderAgentExecutor(AgentExecutor):
                     logger.info(f"Part {i}: TextPart (text: {part.root.text})")
                 else:
                     logger.info(f"Part {i}: Unknown part type ({type(part.root)})")
+        STAGE_SECONDS.observe(time.perf_counter() - parse_start, stage="parse_parts")
 
         # Handle UI events (button clicks, form submissions, etc.)
+        prompt_start = time.perf_counter()
         if ui_event_part:
             logger.info(f"Received A2UI ClientEvent: {ui_event_part}")
             # The client sends 'name', not 'actionName'
@@ -111,6 +278,7 @@ class UIBuilderAgentExecutor(AgentExecutor):
         else:
             logger.info("No A2UI UI event part found. Using text input.")
             query = context.get_user_input()
+        STAGE_SECONDS.observe(time.perf_counter() - prompt_start, stage="build_prompt")
 
         logger.info(f"Final query for LLM: '{query}'")
 
@@ -118,69 +286,331 @@ class UIBuilderAgentExecutor(AgentExecutor):
 
         if not task:
             task = new_task(context.message)
-            await event_queue.enqueue_event(task)
+            with STAGE_SECONDS.time(stage="enqueue"):
+                await event_queue.enqueue_event(task)
         updater = TaskUpdater(event_queue, task.id, task.context_id)
 
-        async for item in agent.stream(query, task.context_id):
+        # Clients that keep their surfaces between turns opt in to receiving
+        # only what changed; anyone else gets full renders on a clean mirror.
+        metadata = (context.message.metadata if context.message else None) or {}
+        diff_surfaces = use_ui and self.worker_local and metadata.get("a2uiSurfaceDiff") is True
+        if not diff_surfaces:
+            self.surface_differ.reset(task.context_id)
+        # Content-derived component ids keep unchanged components out of a
+        # diff; without diffs the cheaper sequential ids do.
+        ids = "content" if diff_surfaces else None
+        # Streaming clients can opt in to large surfaces arriving in batches.
+        progressive = use_ui and metadata.get("a2uiProgressive") is True
+        # Clients that render the pager row opt in to long lists in pages.
+        paginate_lists = use_ui and self.worker_local and metadata.get("a2uiPagination") is True
+
+        if use_ui and action in PAGE_STEPS:
+            pager = self.pagers.get((ctx or {}).get("listId"))
+            if pager is not None:
+                try:
+                    shown = int((ctx or {}).get("page", 0))
+                except (TypeError, ValueError):
+                    shown = 0
+                page = await agent.turn_page(query, task.context_id, pager, shown + PAGE_STEPS[action], ids)
+                if page is not None:
+                    logger.info(f"Served '{action}' from the stored list without the LLM")
+                    return await self._send_response(updater, task, page, diff_surfaces, progressive)
+
+        # Form submissions are writes, so they always reach the LLM.
+        key = None
+        cached = None
+        mode = "text"
+        if use_ui:
+            mode = "ui" + ("+pages" if paginate_lists else "") + ("+diff" if diff_surfaces else "")
+        if self.response_cache is not None and action and not action.startswith("submit"):
+            # Per user (the conversation, for anonymous clients): a reply
+            # can hold that user's data.
+            key = cache_key(self._user_key(context), mode, action, ctx, agent.prompt_version)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logger.info(f"Response cache hit for action '{action}'")
+
+        # Semantic cache entries are scoped to the authenticated user (all
+        # anonymous clients share one scope) and the kind of reply the client
+        # takes. Anonymous queries about "my" data are never cached.
+        semantic_scope = None
+        user = self._authenticated_user(context)
+        if (
+            self.semantic_cache is not None and use_ui and not action
+            and self._semantic_cache_allowed(context)
+            and (user is not None or not self.semantic_cache.is_personal(query))
+        ):
+            semantic_scope = f"{user or ''}:{mode}:{agent.prompt_version}"
+            cached = await asyncio.to_thread(self.semantic_cache.lookup, query, semantic_scope)
+
+        if cached is not None:
+            await agent.record_turn(query, task.context_id, cached)
+            if cached.pager:
+                self.pagers.put(cached.pager)
+            return await self._send_response(updater, task, cached, diff_surfaces, progressive)
+
+        try:
+            async with self.scheduler.llm_slot(self._user_key(context)):
+                return await self._stream_turn(
+                    agent, query, updater, task, key, semantic_scope, diff_surfaces, progressive,
+                    paginate_lists, ids,
+                )
+        except SchedulerBusy:
+            await self._send_final(updater, task, [Part(root=TextPart(text=BUSY_MESSAGE))])
+            return None
+
+    async def _stream_turn(
+        self, agent: UIBuilderAgent, query: str, updater: TaskUpdater, task: Task,
+        key: str | None, semantic_scope: str | None, diff_surfaces: bool, progressive: bool,
+        paginate_lists: bool = False, ids: str | None = None,
+    ) -> list[Part] | None:
+        """Run the LLM turn, forwarding working updates and the final response."""
+        async for item in agent.stream(query, task.context_id, paginate_lists, ids):
             is_task_complete = item["is_task_complete"]
+            if item.get("reset"):
+                await self._send_reset(updater, task, item["surfaces"], diff_surfaces)
+                continue
             if not is_task_complete:
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(item["updates"], task.context_id, task.id),
-                )
+                ui = self._client_ui(item.get("ui"), task.context_id, diff_surfaces, commit=False)
+                if ui and progressive:
+                    ui = await self._send_batches(updater, task, ui)
+                if ui:
+                    # Template rendered mid-stream: paint the canvas right away.
+                    with STAGE_SECONDS.time(stage="create_parts"):
+                        working_parts = [create_a2ui_part(msg) for msg in ui]
+                    if item["updates"]:
+                        working_parts.insert(0, Part(root=TextPart(text=item["updates"])))
+                    with STAGE_SECONDS.time(stage="enqueue"):
+                        await updater.update_status(
+                            TaskState.working,
+                            new_agent_parts_message(working_parts, task.context_id, task.id),
+                        )
+                elif item["updates"]:
+                    with STAGE_SECONDS.time(stage="enqueue"):
+                        await updater.update_status(
+                            TaskState.working,
+                            new_agent_text_message(item["updates"], task.context_id, task.id),
+                        )
                 continue
 
-            # For UI builder, always stay in input_required state to allow more interactions
-            final_state = TaskState.input_required
+            response = item.get("response")
+            if response is None:
+                return await self._send_final(updater, task, self._content_parts(item["content"], agent.use_ui))
 
-            content = item["content"]
-            final_parts = []
+            logger.info(f"Response metadata: {response.metadata}")
+            if response.pager and not self.pagers.put(response.pager):
+                # Its other pages would be unreachable.
+                response = agent.render_whole(response, ids)
+            # Only rendered UIs are cached; error replies are not.
+            if key is not None and response.ui:
+                size = len(json.dumps(response.ui)) + len(response.raw) + len(response.message)
+                self.response_cache.put(key, response, size)
+            # Paged replies only suit clients that render the pager row.
+            if semantic_scope is not None and response.ui and response.metadata.get("template") and not response.pager:
+                await asyncio.to_thread(self.semantic_cache.put, query, response, semantic_scope)
+            final_parts = await self._send_response(updater, task, response, diff_surfaces, progressive)
+            # Apologies after failed attempts carry no attempt count; a retry
+            # of the request should run again rather than replay them.
+            return final_parts if "attempts" in response.metadata else None
+        return None
 
-            try:
-                json_string_cleaned = content.strip().lstrip("```json").rstrip("```").strip()
-                json_data = json.loads(json_string_cleaned)
-
-                if isinstance(json_data, dict) and ("message" in json_data or "ui" in json_data):
-                    # Envelope format: {"message": "...", "ui": [...]}
-                    message_text = json_data.get("message", "")
-                    ui_messages = json_data.get("ui", [])
-                    if message_text:
-                        logger.info(f"Envelope: adding TextPart with message ({len(message_text)} chars)")
-                        final_parts.append(Part(root=TextPart(text=message_text)))
-                    if isinstance(ui_messages, list):
-                        logger.info(f"Envelope: adding {len(ui_messages)} A2UI DataParts.")
-                        for msg in ui_messages:
-                            final_parts.append(create_a2ui_part(msg))
-                elif isinstance(json_data, list):
-                    # Backward compatible: raw A2UI array
-                    logger.info(f"Found {len(json_data)} messages. Creating individual DataParts.")
-                    for message in json_data:
-                        final_parts.append(create_a2ui_part(message))
-                else:
-                    logger.info("Received single JSON object. Creating DataPart.")
-                    final_parts.append(create_a2ui_part(json_data))
-
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse UI JSON directly: {e}")
-                final_parts.append(Part(root=TextPart(text=content.strip())))
-
-            logger.info("--- FINAL PARTS TO BE SENT ---")
-            for i, part in enumerate(final_parts):
-                logger.info(f"  - Part {i}: Type = {type(part.root)}")
-                if isinstance(part.root, TextPart):
-                    logger.info(f"    - Text: {part.root.text[:200]}...")
-                elif isinstance(part.root, DataPart):
-                    logger.info(f"    - Data: {str(part.root.data)[:200]}...")
-            logger.info("-----------------------------")
+    async def _send_reset(self, updater: TaskUpdater, task: Task, surfaces: list[str], diff_surfaces: bool) -> None:
+        """Take back a partly streamed reply that a retry or another provider
+        replaces: a working update with message metadata {"streamReset": true}
+        (drop the message text streamed so far) that deletes the surfaces it
+        rendered."""
+        parts = [create_a2ui_part({"deleteSurface": {"surfaceId": surface}}) for surface in surfaces]
+        if surfaces and diff_surfaces:
+            # The client no longer holds what the mirror says: render in full.
+            self.surface_differ.reset(task.context_id)
+        message = new_agent_parts_message(parts, task.context_id, task.id)
+        message.metadata = {"streamReset": True}
+        with STAGE_SECONDS.time(stage="enqueue"):
+            await updater.update_status(TaskState.working, message)
+
+    @staticmethod
+    def _flight_key(context: RequestContext) -> str | None:
+        """Duplicate-detection key: the clicked action (name and context) or,
+        for text and page flips, the message id."""
+        message = context.message
+        if message is None:
+            return None
+        action = None
+        for part in message.parts:
+            if isinstance(part.root, DataPart) and "userAction" in part.root.data:
+                user_action = part.root.data["userAction"]
+                action = {"name": user_action.get("name"), "context": user_action.get("context") or {}}
+        # Page flips are cheap, and clicking Next twice means two pages.
+        if action is not None and action["name"] in PAGE_STEPS:
+            action = None
+        extra = {"extensions": sorted(context.requested_extensions), "metadata": message.metadata or {}}
+        return flight_key(context.context_id, message.message_id, action, extra)
+
+    async def _send_replay(self, context: RequestContext, event_queue: EventQueue, final_parts: list[Part]) -> None:
+        """Answer a duplicate request with the first request's final parts."""
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            with STAGE_SECONDS.time(stage="enqueue"):
+                await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await self._send_final(updater, task, final_parts)
+
+    @staticmethod
+    def _authenticated_user(context: RequestContext) -> str | None:
+        user = context.call_context.user if context.call_context else None
+        if user is not None and user.is_authenticated and user.user_name:
+            return user.user_name
+        return None
+
+    @classmethod
+    def _user_key(cls, context: RequestContext) -> str:
+        """Fair-queueing key: the authenticated user, else the conversation."""
+        return cls._authenticated_user(context) or context.context_id or ""
+
+    def _semantic_cache_allowed(self, context: RequestContext) -> bool:
+        """A session opts out (or back in) by sending message metadata
+        {"semanticCache": false|true}; the choice sticks for its context."""
+        context_id = context.context_id
+        metadata = (context.message.metadata if context.message else None) or {}
+        if metadata.get("semanticCache") is False:
+            self._semantic_opt_out[context_id] = None
+            while len(self._semantic_opt_out) > 10000:
+                self._semantic_opt_out.popitem(last=False)
+        elif metadata.get("semanticCache") is True:
+            self._semantic_opt_out.pop(context_id, None)
+        if context_id in self._semantic_opt_out:
+            self._semantic_opt_out.move_to_end(context_id)
+            return False
+        return True
+
+    async def _send_final(self, updater: TaskUpdater, task: Task, final_parts: list[Part]) -> list[Part]:
+        logger.info("--- FINAL PARTS TO BE SENT ---")
+        for i, part in enumerate(final_parts):
+            logger.info(f"  - Part {i}: Type = {type(part.root)}")
+            if isinstance(part.root, TextPart):
+                logger.info(f"    - Text: {part.root.text[:200]}...")
+            elif isinstance(part.root, DataPart):
+                logger.info(f"    - Data: {str(part.root.data)[:200]}...")
+        logger.info("-----------------------------")
 
+        # For UI builder, always stay in input_required state to allow more interactions
+        with STAGE_SECONDS.time(stage="enqueue"):
             await updater.update_status(
-                final_state,
+                TaskState.input_required,
                 new_agent_parts_message(final_parts, task.context_id, task.id),
                 final=False,  # Always allow more interactions
             )
-            break
+        return final_parts
+
+    def _client_ui(
+        self, ui: list | None, context_id: str, diff_surfaces: bool, commit: bool = True
+    ) -> list | None:
+        """The A2UI messages to send: all of them, or only what changed."""
+        if not ui or not diff_surfaces:
+            return ui
+        with STAGE_SECONDS.time(stage="surface_diff"):
+            return self.surface_differ.diff(context_id, ui, commit=commit)
+
+    async def _send_response(
+        self, updater: TaskUpdater, task: Task, response: AgentResponse,
+        diff_surfaces: bool, progressive: bool,
+    ) -> list[Part]:
+        """Send a typed response as the final update of the turn.
+
+        Returns the parts of the whole response (all batches), for replay.
+        """
+        ui = self._client_ui(response.ui, task.context_id, diff_surfaces)
+        with STAGE_SECONDS.time(stage="create_parts"):
+            all_parts = self._response_parts(response, ui)
+        if not progressive:
+            await self._send_final(updater, task, all_parts)
+            return all_parts
+        ui = await self._send_batches(updater, task, ui)
+        with STAGE_SECONDS.time(stage="create_parts"):
+            final_parts = self._response_parts(response, ui)
+        await self._send_final(updater, task, final_parts)
+        return all_parts
+
+    async def _send_batches(self, updater: TaskUpdater, task: Task, ui: list | None) -> list | None:
+        """Send all but the last batch of a large render as working updates.
+
+        Returns the messages still to be sent with the caller's update.
+        """
+        if not ui:
+            return ui
+        batches = self.surface_batcher.split(ui)
+        for batch in batches[:-1]:
+            with STAGE_SECONDS.time(stage="create_parts"):
+                parts = [create_a2ui_part(msg) for msg in batch]
+            with STAGE_SECONDS.time(stage="enqueue"):
+                await updater.update_status(
+                    TaskState.working,
+                    new_agent_parts_message(parts, task.context_id, task.id),
+                )
+        return batches[-1]
+
+    def _response_parts(self, response: AgentResponse, ui: list | None) -> list[Part]:
+        """Build message parts straight from the agent's typed response."""
+        parts = []
+        if response.message:
+            logger.info(f"Envelope: adding TextPart with message ({len(response.message)} chars)")
+            parts.append(Part(root=TextPart(text=response.message)))
+        if ui:
+            logger.info(f"Envelope: adding {len(ui)} A2UI DataParts.")
+            parts.extend(create_a2ui_part(msg) for msg in ui)
+        return parts
+
+    def _content_parts(self, content: str, use_ui: bool) -> list[Part]:
+        """Compatibility path for agents that still yield a JSON string."""
+        final_parts = []
+        try:
+            with STAGE_SECONDS.time(stage="decode_envelope"):
+                json_data, _ = repair_json(content)
+            create_start = time.perf_counter()
+
+            if isinstance(json_data, dict) and ("message" in json_data or "ui" in json_data):
+                # Envelope format: {"message": "...", "ui": [...]}
+                message_text = json_data.get("message", "")
+                ui_messages = json_data.get("ui", [])
+                if message_text:
+                    logger.info(f"Envelope: adding TextPart with message ({len(message_text)} chars)")
+                    final_parts.append(Part(root=TextPart(text=message_text)))
+                if isinstance(ui_messages, list):
+                    logger.info(f"Envelope: adding {len(ui_messages)} A2UI DataParts.")
+                    for msg in ui_messages:
+                        final_parts.append(create_a2ui_part(msg))
+            elif isinstance(json_data, list):
+                # Backward compatible: raw A2UI array
+                logger.info(f"Found {len(json_data)} messages. Creating individual DataParts.")
+                for message in json_data:
+                    final_parts.append(create_a2ui_part(message))
+            else:
+                logger.info("Received single JSON object. Creating DataPart.")
+                final_parts.append(create_a2ui_part(json_data))
+            STAGE_SECONDS.observe(time.perf_counter() - create_start, stage="create_parts")
+
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse UI JSON directly: {e}")
+            if use_ui:
+                TEXT_FALLBACKS.inc(reason="unparsed")
+            final_parts.append(Part(root=TextPart(text=content.strip())))
+        return final_parts
 
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
-        raise ServerError(error=UnsupportedOperationError())
+        """Stop the task's running turn (aborting its LLM stream), or end an
+        idle task, and report it as canceled."""
+        running = next(
+            (turn for turn in self._running.get(request.context_id, ()) if turn.task_id == request.task_id), None
+        )
+        if running is not None and not running.task.done():
+            running.stop("cancel")
+            # The turn reports `canceled` on its own queue, which this one taps.
+            await asyncio.wait({running.task})
+            if running.stopped and running.end_task:
+                return None
+        updater = TaskUpdater(event_queue, request.task_id, request.context_id)
+        await updater.cancel()
+        return None
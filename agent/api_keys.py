@@ -0,0 +1,26 @@
+# Provider API Keys
+# Which environment variable each LLM provider's key is read from. Kept free
+# of heavy imports: the server checks the key before anything else loads.
+
+import os
+
+# Provider model prefixes and the API key each needs.
+API_KEYS = (
+    (("gemini/", "google/"), "GEMINI_API_KEY", "Get one at https://aistudio.google.com/apikey"),
+    (("gpt-", "openai/"), "OPENAI_API_KEY", "Get one at https://platform.openai.com/api-keys"),
+    (("claude-", "anthropic/"), "ANTHROPIC_API_KEY", "Get one at https://console.anthropic.com/settings/keys"),
+    (("azure/",), "AZURE_API_KEY", ""),
+)
+
+
+def missing_api_key(model: str) -> str | None:
+    """Why `model` cannot be called (its API key is not set), or None.
+    Models of other providers are left to LiteLLM."""
+    if model.startswith(("gemini/", "google/")) and os.getenv("GOOGLE_GENAI_USE_VERTEXAI") == "TRUE":
+        return None
+    for prefixes, variable, hint in API_KEYS:
+        if model.startswith(prefixes):
+            if os.getenv(variable):
+                return None
+            return f"Model '{model}' requires {variable} environment variable. {hint}".strip()
+    return None
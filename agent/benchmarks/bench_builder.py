@@ -0,0 +1,84 @@
+# Builder Serialization Benchmark
+# Builds info_list-shaped component trees with A2UIBuilder and compares the
+# dict path (build() + json.dumps, what DataParts and the JSON-RPC response
+# go through) against build_bytes(), which encodes the slotted nodes
+# straight into a byte buffer. Reports best wall time and peak traced memory
+# of building the tree and of each serialization path.
+#
+# Usage: uv run python benchmarks/bench_builder.py [--components 1000 10000]
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from a2ui_templates import A2UIBuilder
+
+
+def make_tree(n_components):
+    """An info_list-like tree of about n_components components (13 per card)."""
+    b = A2UIBuilder()
+    cards = []
+    for i in range(max(1, n_components // 13)):
+        cards.append(b.card([
+            b.row([b.text(f"Case #{i:05d}", "h4"), b.text("In progress", "caption")], "spaceBetween"),
+            b.row([b.text("Type", "h5"), b.text("Collision")], "spaceBetween"),
+            b.row([b.text("Amount", "h5"), b.text(f"€{i * 10}")], "spaceBetween"),
+            b.button("View case", "view_claim", {"itemId": f"claim-{i}"}),
+        ]))
+    return b, b.column(cards)
+
+
+def dict_path(tree):
+    b, root = tree
+    return json.dumps(b.build(root), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def bytes_path(tree):
+    b, root = tree
+    return b.build_bytes(root)
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn, arg):
+    tracemalloc.start()
+    try:
+        fn(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A2UIBuilder serialization benchmark.")
+    parser.add_argument("--components", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'stage':<14} {'best ms':>9} {'peak KiB':>10}")
+    for n in args.components:
+        elapsed = best_of(make_tree, n, args.repeat)
+        print(f"{n:>10} {'tree':<14} {elapsed * 1000:>9.2f} {peak_memory(make_tree, n) / 1024:>10.0f}")
+        # The first build renames duplicate ids; later ones serialize only.
+        tree = make_tree(n)
+        assert dict_path(tree) == bytes_path(tree)
+        for name, fn in (("build+dumps", dict_path), ("build_bytes", bytes_path)):
+            elapsed = best_of(fn, tree, args.repeat)
+            peak = peak_memory(fn, tree)
+            print(f"{n:>10} {name:<14} {elapsed * 1000:>9.2f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
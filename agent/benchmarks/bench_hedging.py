@@ -0,0 +1,114 @@
+# Hedging and Failover Benchmark
+# Runs TEST_PROMPTS turns through UIBuilderAgent.stream with local fake
+# providers, once with the primary alone (failures are retried on the same
+# model, as before) and once with a secondary in LLM_FALLBACK_MODELS
+# (hedging, failover and circuit breaking). Scenarios:
+#   tail    - the primary is slow (--slow-latency) on --slow-rate of calls
+#   flaky   - the primary fails on --error-rate of calls
+#   outage  - the primary fails every call
+# Reports p50/p95/p99 turn latency, apologies (turns with no usable reply)
+# and the pool counters: hedges, failovers, hedge wins and breaker trips.
+#
+# Usage: uv run python benchmarks/bench_hedging.py [--turns 200 --concurrency 8]
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_llm import FakeCorpus, FakeLlm
+from provider_pool import BREAKER_TRANSITIONS, HEDGES
+from test_prompts import TEST_PROMPTS
+
+SCENARIOS = ("tail", "flaky", "outage")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def pool_counters(primary):
+    return (
+        HEDGES.value(outcome="hedge"),
+        HEDGES.value(outcome="failover"),
+        HEDGES.value(outcome="won"),
+        BREAKER_TRANSITIONS.value(provider=primary, state="open"),
+    )
+
+
+async def run_turns(agent, turns, concurrency):
+    latencies = []
+    apologies = 0
+    next_turn = iter(range(turns))
+
+    async def client():
+        nonlocal apologies
+        for turn in next_turn:
+            start = time.perf_counter()
+            async for item in agent.stream(TEST_PROMPTS[turn % len(TEST_PROMPTS)], f"bench-{turn}"):
+                if item.get("is_task_complete"):
+                    apologies += "attempts" not in item["response"].metadata
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, apologies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Same-model retry vs hedged provider pool.")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Normal first-token seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="Share of slow primary calls (tail)")
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="First-token seconds of a slow call")
+    parser.add_argument("--error-rate", type=float, default=0.3, help="Share of failing primary calls (flaky)")
+    args = parser.parse_args()
+
+    # The agent under test reads its models from the environment.
+    from agent import UIBuilderAgent
+
+    # Provider errors are the point of the run; keep them out of the table.
+    logging.disable(logging.CRITICAL)
+    os.environ.pop("LITELLM_FAST_MODEL", None)
+    os.environ["LLM_HEDGE_DELAY"] = str(args.latency * 3)
+    corpus = FakeCorpus()
+
+    print(f"{args.turns} turns, {args.concurrency} clients, first token {args.latency}s\n")
+    print(f"{'scenario':<8} {'setup':<7} {'p50 s':>6} {'p95 s':>6} {'p99 s':>6} {'sorry':>6} "
+          f"{'hedge':>6} {'failover':>9} {'won':>5} {'trips':>6}")
+    for scenario in SCENARIOS:
+        for setup in ("retry", "pool"):
+            # Fresh model names per run: provider state is per process.
+            primary, secondary = f"fake/{scenario}-{setup}-primary", f"fake/{scenario}-{setup}-secondary"
+            behaviour = {
+                "tail": dict(slow_rate=args.slow_rate, slow_latency=args.slow_latency),
+                "flaky": dict(error_rate=args.error_rate),
+                "outage": dict(error_rate=1.0),
+            }[scenario]
+
+            def factory(name):
+                extra = behaviour if name == primary else {}
+                return FakeLlm(model=name, corpus=corpus, first_token_latency=args.latency,
+                               tokens_per_second=1000.0, **extra)
+
+            os.environ["LITELLM_MODEL"] = primary
+            os.environ["LLM_FALLBACK_MODELS"] = secondary if setup == "pool" else ""
+            agent = UIBuilderAgent(use_ui=True, model_factory=factory)
+            before = pool_counters(primary)
+            latencies, apologies = asyncio.run(run_turns(agent, args.turns, args.concurrency))
+            hedges, failovers, won, trips = (a - b for a, b in zip(pool_counters(primary), before))
+            print(
+                f"{scenario:<8} {setup:<7} {statistics.median(latencies):>6.2f} {percentile(latencies, 95):>6.2f} "
+                f"{percentile(latencies, 99):>6.2f} {apologies:>6} {hedges:>6.0f} {failovers:>9.0f} "
+                f"{won:>5.0f} {trips:>6.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# HTTP Pool Benchmark
+# Gemini calls through ADK's LiteLlm against a local HTTPS stand-in for the
+# Gemini API (self-signed certificate, uvicorn). The stand-in sits behind a
+# TCP proxy that adds --rtt of network round trip: half each way, plus one
+# round trip before a new connection carries data, as the TCP handshake
+# would. Compared:
+#   litellm - LiteLLM's own per-provider client
+#   pooled  - the shared http_pool client, warmed at start and re-warmed
+#             after --rewarm-after idle seconds
+# Phases: the first call after start, --requests sequential calls, one call
+# after --idle seconds without traffic (longer than the stand-in's
+# keep-alive), then --concurrency parallel calls. Reports latency per phase,
+# the connections the proxy saw, connection reuse on the request path and
+# the mean connect and TLS time (pooled only, from the pool's trace). The
+# stand-in speaks HTTP/1.1 only, so the pool runs without HTTP/2 unless
+# --http2 is given.
+#
+# Usage: uv run python benchmarks/bench_http_pool.py [--rtt 0.05 --idle 8]
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+MODEL = "gemini/gemini-2.5-flash"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def write_certificate(directory: str) -> tuple[str, str]:
+    """Self-signed certificate for localhost; returns (certfile, keyfile)."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    certfile, keyfile = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(certfile, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(keyfile, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return certfile, keyfile
+
+
+def gemini_chunk(text: str, finish: bool) -> bytes:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    body = {
+        "candidates": [candidate],
+        "usageMetadata": {"promptTokenCount": 8, "candidatesTokenCount": 4, "totalTokenCount": 12},
+        "modelVersion": MODEL.split("/")[1],
+    }
+    return json.dumps(body).encode()
+
+
+async def stand_in(scope, receive, send):
+    """Gemini API stand-in: streamGenerateContent (SSE) and generateContent;
+    404 for anything else (the pool's warm-up HEAD)."""
+    if scope["type"] != "http":
+        return
+    while (await receive()).get("more_body"):
+        pass
+    path = scope["path"]
+    if path.endswith(":streamGenerateContent"):
+        chunks = [gemini_chunk("Hello ", False), gemini_chunk("from the stand-in.", True)]
+        body = b"".join(b"data: " + chunk + b"\r\n\r\n" for chunk in chunks)
+        content_type = b"text/event-stream"
+    elif path.endswith(":generateContent"):
+        body, content_type = gemini_chunk("Hello from the stand-in.", True), b"application/json"
+    else:
+        body, content_type = b"", b"text/plain"
+    status = 200 if body else 404
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class LatencyProxy:
+    """TCP proxy adding half of `rtt` each way, and one `rtt` before a new
+    connection carries data. Counts the connections it accepted."""
+
+    def __init__(self, upstream_port: int, rtt: float):
+        self.upstream_port = upstream_port
+        self.rtt = rtt
+        self.connections = 0
+        self.port = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", self.upstream_port)
+        await asyncio.sleep(self.rtt)
+        await asyncio.gather(self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer))
+
+    async def _pipe(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                deadline, data = await queue.get()
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+
+        delivery = asyncio.create_task(deliver())
+        try:
+            while True:
+                data = await reader.read(65536)
+                queue.put_nowait((loop.time() + self.rtt / 2, data))
+                if not data:
+                    break
+            await delivery
+        except ConnectionError:
+            delivery.cancel()
+        finally:
+            writer.close()
+
+
+async def call(llm) -> float:
+    from google.adk.models.llm_request import LlmRequest
+    from google.genai import types
+
+    request = LlmRequest(model=MODEL, contents=[types.Content(role="user", parts=[types.Part(text="Say hello")])])
+    start = time.perf_counter()
+    async for _ in llm.generate_content_async(request, stream=True):
+        pass
+    return time.perf_counter() - start
+
+
+def request_counters():
+    from http_pool import HANDSHAKE_SECONDS, HTTP_REQUESTS
+
+    new = sum(HTTP_REQUESTS.value(host="localhost", connection="new", http_version=v) for v in ("HTTP/1.1", "HTTP/2"))
+    reused = sum(HTTP_REQUESTS.value(host="localhost", connection="reused", http_version=v) for v in ("HTTP/1.1", "HTTP/2"))
+    handshake = sum(HANDSHAKE_SECONDS.sum(host="localhost", phase=phase) for phase in ("connect", "tls"))
+    return new, reused, handshake, HANDSHAKE_SECONDS.count(host="localhost", phase="tls")
+
+
+async def run_setup(setup, proxy, args):
+    from google.adk.models.lite_llm import LiteLlm
+    from http_pool import HttpPool
+
+    pool = None
+    extra = {}
+    if setup == "pooled":
+        pool = HttpPool(http2=args.http2, warm_urls=(f"https://localhost:{proxy.port}",),
+                        rewarm_after=args.rewarm_after, warm_connections=args.warm_connections)
+        extra = pool.litellm_args(MODEL)
+        await pool.start()
+    llm = LiteLlm(model=MODEL, **extra)
+    connections = proxy.connections
+    counters = request_counters()
+
+    latencies = {"first": [await call(llm)]}
+    latencies["warm"] = [await call(llm) for _ in range(args.requests)]
+    await asyncio.sleep(args.idle)
+    latencies["idle"] = [await call(llm)]
+    latencies["burst"] = await asyncio.gather(*(call(llm) for _ in range(args.concurrency)))
+
+    calls = sum(len(values) for values in latencies.values())
+    opened = proxy.connections - connections
+    new, reused, handshake, handshakes = (a - b for a, b in zip(request_counters(), counters))
+    if pool is None:
+        # Every connection LiteLLM opens is opened by a request.
+        on_path, mean_handshake = opened, "-"
+    else:
+        on_path, mean_handshake = new, f"{handshake / handshakes * 1000:.0f}" if handshakes else "-"
+        await pool.close()
+    medians = [statistics.median(latencies[phase]) * 1000 for phase in ("first", "warm", "idle", "burst")]
+    print(f"{setup:<8} " + " ".join(f"{value:>8.0f}" for value in medians)
+          + f" {opened:>7} {on_path:>8.0f} {1 - on_path / calls:>7.0%} {mean_handshake:>10}")
+
+
+async def main_async(args):
+    import uvicorn
+
+    directory = tempfile.mkdtemp()
+    certfile, keyfile = write_certificate(directory)
+    # Both LiteLLM's client and the pool trust the stand-in through this.
+    os.environ["SSL_CERT_FILE"] = certfile
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        stand_in, host="127.0.0.1", port=port, ssl_certfile=certfile, ssl_keyfile=keyfile,
+        timeout_keep_alive=args.server_keepalive, lifespan="off", log_level="error",
+    ))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    proxy = LatencyProxy(port, args.rtt)
+    await proxy.start()
+    os.environ["GEMINI_API_BASE"] = f"https://localhost:{proxy.port}/v1beta"
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+    # Load LiteLLM's lazily imported code paths outside the timed calls.
+    import litellm
+
+    response = await litellm.acompletion(model=MODEL, messages=[{"role": "user", "content": "hi"}],
+                                         stream=True, mock_response="warm-up")
+    async for _ in response:
+        pass
+
+    print(f"RTT {args.rtt * 1000:.0f}ms, stand-in keep-alive {args.server_keepalive:.0f}s, "
+          f"idle {args.idle:.0f}s, {args.requests} sequential and {args.concurrency} parallel calls\n")
+    print(f"{'setup':<8} {'first ms':>8} {'warm ms':>8} {'idle ms':>8} {'burst ms':>8} "
+          f"{'opened':>7} {'on path':>8} {'reuse':>7} {'handshake':>10}")
+    # litellm first: the pool replaces LiteLLM's process-wide clients.
+    for setup in ("litellm", "pooled"):
+        await run_setup(setup, proxy, args)
+    server.should_exit = True
+    await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteLLM's clients vs the shared, pre-warmed HTTP pool.")
+    parser.add_argument("--rtt", type=float, default=0.05, help="Simulated network round trip, seconds")
+    parser.add_argument("--requests", type=int, default=20, help="Sequential calls")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel calls at the end")
+    parser.add_argument("--idle", type=float, default=8.0, help="Seconds without traffic before one call")
+    parser.add_argument("--server-keepalive", type=float, default=5.0, help="Stand-in idle connection timeout")
+    parser.add_argument("--rewarm-after", type=float, default=2.0, help="Pool re-warm after idle seconds")
+    parser.add_argument("--warm-connections", type=int, default=1, help="Connections the pool warms per host")
+    # The stand-in speaks HTTP/1.1 only. With h2 offered, httpx queues parallel
+    # requests on a new connection until ALPN shows it is not HTTP/2.
+    parser.add_argument("--http2", action="store_true", help="Offer HTTP/2 (the stand-in answers HTTP/1.1)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+    os.environ["ADK_SUPPRESS_GEMINI_LITELLM_WARNINGS"] = "true"
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# JSON Repair Benchmark
+# Corrupts every example envelope of the fake LLM corpus with each fault
+# class of fake_llm.corrupt() and reports, per class, how many replies the
+# old cleanup (fence lstrip + json.loads) and repair_json() accept, how many
+# repairs give back the exact envelope or at least a template that renders
+# and validates, and the mean repair time. Every reply that is not accepted
+# costs an LLM retry. The newline fault adds text to the message, so its
+# repairs are never exact.
+#
+# Usage: uv run python benchmarks/bench_json_repair.py [--samples 50]
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from a2ui_templates import render_template
+from a2ui_validator import validate_a2ui_messages
+from fake_llm import FAULTS, corrupt, load_example_envelopes
+from json_repair import repair_json
+
+
+def old_cleanup(text):
+    """The agent's parsing before repair_json()."""
+    return json.loads(text.strip().lstrip("```json").lstrip("```").rstrip("```").strip())
+
+
+def renders(envelope):
+    """True when the envelope's template renders and validates (or it has none)."""
+    try:
+        template = envelope.get("template")
+        if template:
+            messages = render_template(template, envelope.get("data", {}))
+            if not messages:
+                return False
+            validate_a2ui_messages(messages)
+        return "message" in envelope
+    except Exception:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON repair vs LLM retry, by fault class.")
+    parser.add_argument("--samples", type=int, default=50, help="Corrupted replies per envelope and fault")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Repaired truncations may render with missing fields; that is counted.
+    logging.getLogger("a2ui_templates").setLevel(logging.CRITICAL)
+    rng = random.Random(args.seed)
+    envelopes = list(load_example_envelopes().values())
+    print(f"{len(envelopes)} envelopes x {args.samples} samples per fault class\n")
+    print(f"{'fault':<15} {'n':>5} {'old ok':>7} {'repaired':>9} {'exact':>6} {'renders':>8} {'mean us':>8}")
+
+    totals = Counter()
+    for fault in FAULTS:
+        counts = Counter()
+        elapsed = 0.0
+        for envelope in envelopes:
+            text = json.dumps(envelope, ensure_ascii=False)
+            for _ in range(args.samples):
+                broken = corrupt(text, rng, fault)
+                counts["n"] += 1
+                try:
+                    old_cleanup(broken)
+                    counts["old ok"] += 1
+                except json.JSONDecodeError:
+                    pass
+                start = time.perf_counter()
+                try:
+                    value, _ = repair_json(broken)
+                except json.JSONDecodeError:
+                    continue
+                finally:
+                    elapsed += time.perf_counter() - start
+                counts["repaired"] += 1
+                counts["exact"] += value == envelope
+                counts["renders"] += isinstance(value, dict) and renders(value)
+        totals.update(counts)
+        print(
+            f"{fault:<15} {counts['n']:>5} {counts['old ok']:>7} {counts['repaired']:>9} "
+            f"{counts['exact']:>6} {counts['renders']:>8} {elapsed / counts['n'] * 1e6:>8.1f}"
+        )
+
+    print(
+        f"\n{'total':<15} {totals['n']:>5} {totals['old ok']:>7} {totals['repaired']:>9} "
+        f"{totals['exact']:>6} {totals['renders']:>8}"
+    )
+    print(
+        f"LLM retries: {totals['n'] - totals['old ok']} before, "
+        f"{totals['n'] - totals['renders']} with local repair"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Offline Load Test
+# Drives the real A2AStarletteApplication with N concurrent A2A clients while
+# the LLM is replaced by FakeLlm, and reports throughput, latency percentiles
+# and retry rate per template. No provider quota is used.
+#
+# Usage: uv run python benchmarks/bench_load.py --clients 16 --requests 10 \
+#            --first-token-ms 300 --tokens-per-sec 200 --malformed-rate 0.1
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
+
+import httpx
+
+from a2ui.extension import A2UI_EXTENSION_URI
+from fake_llm import FakeCorpus, FakeLlm
+from server import build_app
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def send(client, prompt, timings, errors):
+    payload = {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": "message/send",
+        "params": {
+            "message": {
+                "role": "user",
+                "kind": "message",
+                "messageId": str(uuid.uuid4()),
+                "parts": [{"kind": "text", "text": prompt}],
+            }
+        },
+    }
+    start = time.perf_counter()
+    response = await client.post("/", json=payload, headers={"X-A2A-Extensions": A2UI_EXTENSION_URI})
+    elapsed = time.perf_counter() - start
+    body = response.json()
+    if response.status_code != 200 or "error" in body:
+        errors.append(body.get("error", response.status_code))
+    timings.append(elapsed)
+
+
+async def run_client(client, corpus, n_requests, offset, results, errors):
+    for i in range(n_requests):
+        prompt = corpus.prompts[(offset + i) % len(corpus.prompts)]
+        await send(client, prompt, results[corpus.template_for(prompt)], errors)
+
+
+async def main_async(args):
+    corpus = FakeCorpus()
+
+    def model_factory(name):
+        return FakeLlm(
+            corpus=corpus,
+            first_token_latency=args.first_token_ms / 1000,
+            tokens_per_second=args.tokens_per_sec,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed,
+        )
+
+    os.environ["AGENT_STREAMING"] = "false" if args.no_stream else "true"
+    app = build_app("localhost", 0, model_factory=model_factory)
+    transport = httpx.ASGITransport(app=app)
+    results = defaultdict(list)
+    errors = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_client(client, corpus, args.requests, c, results, errors)
+            for c in range(args.clients)
+        ))
+        wall = time.perf_counter() - start
+
+    total = sum(len(v) for v in results.values())
+    all_timings = [t for v in results.values() for t in v]
+    print(
+        f"\n{args.clients} clients x {args.requests} requests = {total} requests "
+        f"in {wall:.2f}s -> {total / wall:.1f} req/s, {len(errors)} errors"
+    )
+    print(f"{'template':<15} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'faults':>7} {'retry %':>8}")
+    for template in sorted(results):
+        timings = results[template]
+        retry_rate = 100 * corpus.retries[template] / len(timings)
+        print(
+            f"{template:<15} {len(timings):>5} {percentile(timings, 50) * 1000:>8.0f} "
+            f"{percentile(timings, 95) * 1000:>8.0f} {percentile(timings, 99) * 1000:>8.0f} "
+            f"{corpus.faults[template]:>7} {retry_rate:>7.1f}%"
+        )
+    print(
+        f"{'all':<15} {total:>5} {percentile(all_timings, 50) * 1000:>8.0f} "
+        f"{percentile(all_timings, 95) * 1000:>8.0f} {percentile(all_timings, 99) * 1000:>8.0f} "
+        f"{sum(corpus.faults.values()):>7} "
+        f"{100 * sum(corpus.retries.values()) / max(total, 1):>7.1f}%"
+    )
+    if errors:
+        print(f"First error: {errors[0]}")
+    print(f"Mean latency: {statistics.fmean(all_timings) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test with a fake LLM.")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent A2A clients")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per client")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-sec", type=float, default=200)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fault injection: share of first attempts returning broken JSON")
+    parser.add_argument("--no-stream", action="store_true", help="Disable token streaming in the agent")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        # a2a warns about dequeuing from closed queues after every blocking send.
+        logging.getLogger("a2a").setLevel(logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
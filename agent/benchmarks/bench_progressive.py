@@ -0,0 +1,149 @@
+# Progressive Delivery Benchmark
+# Serves the real A2A app on a local port (LLM replaced by FakeLlm answering
+# with an info_list of N items) and measures, as a streaming client sees it,
+# the time until the first Card can be painted and until the final update,
+# with and without {"a2uiProgressive": true}.
+#
+# Usage: uv run python benchmarks/bench_progressive.py --items 100 500 1000 \
+#            --batch-size 100
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
+
+import httpx
+import uvicorn
+
+from a2ui.extension import A2UI_EXTENSION_URI
+from fake_llm import FakeCorpus, FakeLlm
+
+PROMPT = "Show me the list of my claims"
+
+
+def claims_envelope(n_items):
+    return {
+        "message": f"Here are your {n_items} claims.",
+        "template": "info_list",
+        "data": {
+            "title": "Your Claims",
+            "items": [
+                {
+                    "title": f"Case #{i:05d}",
+                    "subtitle": "Auto Claim",
+                    "status": "In progress",
+                    "details": [
+                        {"label": "Incident date", "value": "March 15, 2024"},
+                        {"label": "Amount", "value": f"€{i * 10}"},
+                    ],
+                    "actionLabel": "View case",
+                    "actionName": "view_claim",
+                    "id": f"claim-{i}",
+                }
+                for i in range(n_items)
+            ],
+        },
+    }
+
+
+def has_card(event):
+    message = (event.get("result", {}).get("status") or {}).get("message") or {}
+    for part in message.get("parts", []):
+        update = part.get("data", {}).get("surfaceUpdate")
+        if update and any("Card" in c["component"] for c in update["components"]):
+            return True
+    return False
+
+
+async def request(client, progressive):
+    payload = {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": "message/stream",
+        "params": {
+            "message": {
+                "role": "user",
+                "kind": "message",
+                "messageId": str(uuid.uuid4()),
+                "parts": [{"kind": "text", "text": PROMPT}],
+                "metadata": {"a2uiProgressive": progressive},
+            }
+        },
+    }
+    start = time.perf_counter()
+    first_card = None
+    async with client.stream(
+        "POST", "/", json=payload, headers={"X-A2A-Extensions": A2UI_EXTENSION_URI}
+    ) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            if first_card is None and has_card(event):
+                first_card = time.perf_counter() - start
+    return first_card, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def main_async(args):
+    os.environ["A2UI_BATCH_SIZE"] = str(args.batch_size)
+    from server import build_app
+
+    corpus = FakeCorpus(prompts=[PROMPT])
+
+    def model_factory(name):
+        # Large chunks: the envelope streams in, but pacing is not measured here.
+        return FakeLlm(corpus=corpus, first_token_latency=0, tokens_per_second=1e6, chunk_tokens=4096)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        build_app("127.0.0.1", port, model_factory=model_factory),
+        host="127.0.0.1", port=port, log_level="warning",
+    ))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    print(f"{'items':>6} {'progressive':>12} {'first card ms':>14} {'final ms':>9}")
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+        for n in args.items:
+            corpus.envelopes["info_list"] = claims_envelope(n)
+            for progressive in (False, True):
+                runs = [await request(client, progressive) for _ in range(args.repeat)]
+                first = statistics.median(r[0] for r in runs)
+                total = statistics.median(r[1] for r in runs)
+                print(f"{n:>6} {str(progressive):>12} {first * 1000:>14.0f} {total * 1000:>9.0f}")
+
+    server.should_exit = True
+    await serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first card with progressive delivery.")
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--batch-size", type=int, default=100, help="Components per batch (A2UI_BATCH_SIZE)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        logging.getLogger("a2a").setLevel(logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
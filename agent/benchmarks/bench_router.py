@@ -0,0 +1,131 @@
+# Model Router Benchmark
+# 1. Classifier: leave-one-out over the labeled test prompts (trained on
+#    everything else, guidelines and examples included). Reports intent
+#    accuracy, route accuracy (fast vs strong against the route the label
+#    implies), turns that needed the strong model but went fast, and the
+#    classification time.
+# 2. End to end: every test prompt through UIBuilderAgent.stream with a fast
+#    and a slow FakeLlm, routed and all on the strong model. Reports turns,
+#    mean LLM time and prediction accuracy per route, as /metrics does.
+#
+# Usage: uv run python benchmarks/bench_router.py [--fast-latency 0.1 --strong-latency 0.6]
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_llm import FakeCorpus, FakeLlm
+from metrics import STAGE_SECONDS
+from model_router import (
+    DEFAULT_STRONG_INTENTS,
+    FAST,
+    ROUTE_PREDICTIONS,
+    ROUTE_SECONDS,
+    STRONG,
+    IntentClassifier,
+    ModelRouter,
+    training_examples,
+)
+from test_prompts import LABELED_PROMPTS, TEST_PROMPTS
+
+def implied_route(intent):
+    return STRONG if intent in DEFAULT_STRONG_INTENTS else FAST
+
+
+def bench_classifier():
+    examples = training_examples()
+    print(f"Classifier: leave-one-out over {len(LABELED_PROMPTS)} labeled prompts "
+          f"({len(examples)} training examples)\n")
+    intent_ok = route_ok = under = 0
+    elapsed = 0.0
+    for index, (prompt, label) in enumerate(LABELED_PROMPTS):
+        classifier = IntentClassifier([e for i, e in enumerate(examples) if i != index])
+        router = ModelRouter(FAST, STRONG, classifier=classifier)
+        start = time.perf_counter()
+        decision = router.route(prompt)
+        elapsed += time.perf_counter() - start
+        intent, confidence, route = decision.intent, decision.confidence, decision.model
+        intent_ok += intent == label
+        route_ok += route == implied_route(label)
+        under += route == FAST and implied_route(label) == STRONG
+        print(f"  {label:<14} {intent:<14} {confidence:4.2f} {route:<6} {prompt[:60]}")
+    n = len(LABELED_PROMPTS)
+    print(f"\nintent accuracy {intent_ok}/{n}, route accuracy {route_ok}/{n}, "
+          f"strong turns sent fast {under}, mean classify {elapsed / n * 1e6:.0f} us\n")
+
+
+async def run_prompts(agent, prompts):
+    for index, prompt in enumerate(prompts):
+        async for _ in agent.stream(prompt, f"bench-{index}"):
+            pass
+
+
+def snapshot():
+    """Cumulative LLM time and prediction counters, overall and per route."""
+    values = {"all": (STAGE_SECONDS.count(stage="llm_total"), STAGE_SECONDS.sum(stage="llm_total"), 0.0, 0.0)}
+    for route in (FAST, STRONG):
+        values[route] = (
+            ROUTE_SECONDS.count(route=route),
+            ROUTE_SECONDS.sum(route=route),
+            ROUTE_PREDICTIONS.value(route=route, outcome="correct"),
+            ROUTE_PREDICTIONS.value(route=route, outcome="wrong"),
+        )
+    return values
+
+
+def bench_end_to_end(args):
+    from agent import UIBuilderAgent
+
+    corpus = FakeCorpus()
+    timing = {
+        "fake/fast": (args.fast_latency, args.fast_tps),
+        "fake/strong": (args.strong_latency, args.strong_tps),
+    }
+
+    def factory(name):
+        first_token, tps = timing[name]
+        return FakeLlm(corpus=corpus, first_token_latency=first_token, tokens_per_second=tps)
+
+    os.environ["LITELLM_MODEL"] = "fake/strong"
+    print(
+        f"End to end: {len(TEST_PROMPTS)} prompts; fast {args.fast_latency}s + {args.fast_tps:.0f} tok/s, "
+        f"strong {args.strong_latency}s + {args.strong_tps:.0f} tok/s\n"
+    )
+    print(f"{'setup':<8} {'route':<7} {'turns':>6} {'mean s':>7} {'correct':>8}")
+    for setup, fast_model in (("strong", ""), ("routed", "fake/fast")):
+        os.environ["LITELLM_FAST_MODEL"] = fast_model
+        agent = UIBuilderAgent(use_ui=True, model_factory=factory)
+        before = snapshot()
+        asyncio.run(run_prompts(agent, TEST_PROMPTS))
+        after = snapshot()
+        routes = (FAST, STRONG, "all") if agent.router else ("all",)
+        for route in routes:
+            turns = after[route][0] - before[route][0]
+            seconds = after[route][1] - before[route][1]
+            correct = after[route][2] - before[route][2]
+            checked = correct + after[route][3] - before[route][3]
+            mean = f"{seconds / turns:.3f}" if turns else "-"
+            accuracy = f"{correct:.0f}/{checked:.0f}" if checked else "-"
+            print(f"{setup:<8} {route:<7} {turns:>6} {mean:>7} {accuracy:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent classifier accuracy and routed turn latency.")
+    parser.add_argument("--fast-latency", type=float, default=0.1, help="Fast model first-token seconds")
+    parser.add_argument("--fast-tps", type=float, default=600.0, help="Fast model tokens per second")
+    parser.add_argument("--strong-latency", type=float, default=0.6, help="Strong model first-token seconds")
+    parser.add_argument("--strong-tps", type=float, default=150.0, help="Strong model tokens per second")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    bench_classifier()
+    bench_end_to_end(args)
+
+
+if __name__ == "__main__":
+    main()
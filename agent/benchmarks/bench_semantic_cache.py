@@ -0,0 +1,126 @@
+# Semantic Cache Benchmark
+# Checks what the semantic cache serves and what it costs:
+#   - labeled query pairs: paraphrases that should hit the entry the first
+#     query stored, and pairs that differ in a content word, a negation or a
+#     possessive that must not. Reports hit and false-hit rates at the
+#     threshold, and that another scope (user or reply kind) never hits;
+#   - embedding and top-k lookup/put time as the index grows, with every
+#     entry in one scope (the worst case) and spread over --scopes scopes.
+#
+# Usage: uv run --extra semantic-cache python benchmarks/bench_semantic_cache.py [--sizes 1000 10000 100000]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from semantic_cache import SemanticCache, embed
+from test_prompts import TEST_PROMPTS
+
+# Same request in other words: should be served from the cache.
+SHOULD_HIT = [
+    ("Show me auto insurance policies", "show me the auto insurance policies"),
+    ("Compare home insurance plans", "compare the home insurance plans please"),
+    ("Show my insurance dashboard", "show my insurance dashboard!"),
+    ("show me auto policies", "show me the auto policy"),
+    ("show me auto policies", "what auto insurance do you have"),
+    ("What are the life insurance options?", "what are life insurance options"),
+    ("I want to file a claim for my auto insurance.", "I want to file a claim for my auto insurance please"),
+    ("Compare health plans: Bronze, Silver, and Gold", "compare the Bronze, Silver and Gold health plans"),
+    ("Create a form to update my contact details", "create a form to update my contact details please"),
+    ("List the available travel insurance policies", "list available travel insurance plans"),
+]
+# A different request: serving the first one's reply would be wrong.
+SHOULD_MISS = [
+    ("Show me auto insurance policies", "Show me home insurance policies"),
+    ("Compare home insurance plans", "Compare life insurance plans"),
+    ("show my active policies", "show my expired policies"),
+    ("policies with roadside assistance", "policies without roadside assistance"),
+    ("auto policies with a deductible", "auto policies with no deductible"),
+    ("show me policies that cover floods", "show me policies that don't cover floods"),
+    ("show my claims", "show your claims"),
+    ("show my claims", "show our claims"),
+    ("Show me a dashboard of my policies", "Show me a dashboard of their policies"),
+    ("Create a form to update my contact details", "Create a form to cancel my policy"),
+]
+
+WORDS = (
+    "show me my the auto home health life travel pet insurance policy policies plan "
+    "plans compare claim claims dashboard summary premium deductible coverage quote "
+    "form file update renew cancel details list options cheapest best family"
+).split()
+
+
+def synthetic_queries(n, rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))) + f" {i}" for i in range(n)]
+
+
+def fill(cache, queries, scopes=1):
+    for i, q in enumerate(queries):
+        cache.put(q, q, f"user-{i % scopes}")
+
+
+def time_per_call(fn, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def served(first, second, dim, store_scope="user-a:", lookup_scope="user-a:"):
+    """Whether `second` is served the entry `first` stored."""
+    cache = SemanticCache(max_entries=4, dim=dim)
+    cache.put(first, first, store_scope)
+    return cache.lookup(second, lookup_scope) == first
+
+
+def check_pairs(dim, threshold):
+    print(f"Labeled pairs (threshold {threshold}):")
+    rates = {}
+    for label, pairs in (("should hit", SHOULD_HIT), ("should miss", SHOULD_MISS)):
+        hits = 0
+        for a, b in pairs:
+            hit = served(a, b, dim)
+            hits += hit
+            score = float(embed(a, dim) @ embed(b, dim))
+            print(f"  {label:<11}  {score:.3f}  {'HIT ' if hit else 'miss'}  '{a}' ~ '{b}'")
+        rates[label] = hits / len(pairs)
+    # The same words from another user, or for another kind of reply, never hit.
+    other_scope = sum(served(a, a, dim, lookup_scope=scope) for a, _ in SHOULD_HIT for scope in ("user-b:", "user-a:ui+diff"))
+    print(f"\nhit rate {rates['should hit']:.0%}, false-hit rate {rates['should miss']:.0%}, "
+          f"hits across scopes {other_scope}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic cache accuracy and lookup benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--scopes", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    check_pairs(args.dim, SemanticCache().threshold)
+
+    embed_time = time_per_call(lambda q: embed(q, args.dim), [(q,) for q in TEST_PROMPTS])
+    print(f"\nembed: {embed_time * 1e6:.0f} us/query")
+
+    print(f"\n{'entries':>8} {'scopes':>7} {'fill s':>8} {'lookup ms':>10} {'put ms':>8}")
+    for size in args.sizes:
+        for scopes in (1, args.scopes):
+            cache = SemanticCache(max_entries=size, dim=args.dim)
+            queries = synthetic_queries(size, rng)
+            start = time.perf_counter()
+            fill(cache, queries, scopes)
+            fill_time = time.perf_counter() - start
+            probes = [(q, f"user-{i % scopes}") for i, q in rng.sample(list(enumerate(queries)), args.lookups)]
+            lookup = time_per_call(cache.lookup, probes)
+            put = time_per_call(cache.put, [(q, q, "user-0") for q in synthetic_queries(args.lookups, rng)])
+            print(f"{size:>8} {scopes:>7} {fill_time:>8.1f} {lookup * 1000:>10.3f} {put * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
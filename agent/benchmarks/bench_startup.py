@@ -0,0 +1,125 @@
+# Startup Benchmark
+# 1. Import time per module: `python -X importtime` over what the server
+#    loads (startup, the A2A app in server, litellm), by cumulative time, for
+#    the top-level modules and the modules they import directly.
+# 2. Time-to-bind and time-to-ready of `python __main__.py`, with
+#    --lazy-startup (the default) and --eager-startup: how long until the
+#    port accepts connections and until GET /ready answers 200. The lazy
+#    server reports its warm-up phases: "build" (imports, litellm included,
+#    and agents) and "warm" (app startup, which opens the LLM provider
+#    connections).
+#
+# Usage: uv run python benchmarks/bench_startup.py [--runs 3 --top 15]
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+AGENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def import_times(statement: str, depth: int = 0) -> list[tuple[str, float]]:
+    """(module, cumulative seconds) of the imports of `statement`, down to
+    `depth` levels of nesting (0: top-level only)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=AGENT_DIR, capture_output=True, text=True, env=bench_env(),
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self | cumulative | name", nested imports indented
+        # by two spaces per level.
+        _, cumulative, name = line.split("|")
+        if (len(name) - len(name.lstrip()) - 1) // 2 > depth:
+            continue
+        times.append((name.strip(), int(cumulative) / 1e6))
+    return times
+
+
+def bench_env() -> dict:
+    # A placeholder key passes the startup check; no LLM call is made.
+    return dict(os.environ, GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "bench"), LITELLM_LOCAL_MODEL_COST_MAP="True")
+
+
+def start_server(mode: str) -> tuple[float, float, dict]:
+    """Seconds until the port is bound and until /ready is 200, plus the
+    startup phases reported on /metrics."""
+    port = free_port()
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "__main__.py", "--port", str(port), mode],
+        cwd=AGENT_DIR, env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    bound = ready = None
+    try:
+        while ready is None:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with {process.returncode}")
+            if time.monotonic() - start > 120:
+                raise RuntimeError("server not ready after 120s")
+            try:
+                with urllib.request.urlopen(f"http://localhost:{port}/ready", timeout=5) as response:
+                    if response.status == 200:
+                        ready = time.monotonic() - start
+                if bound is None:
+                    bound = ready
+            except urllib.error.HTTPError:
+                bound = bound or time.monotonic() - start
+            except OSError:
+                pass
+            time.sleep(0.01)
+        with urllib.request.urlopen(f"http://localhost:{port}/metrics", timeout=5) as response:
+            metrics = response.read().decode()
+    finally:
+        process.terminate()
+        process.wait()
+    phases = {}
+    for line in metrics.splitlines():
+        if line.startswith("ui_builder_startup_seconds_sum"):
+            phases[line.split('phase="')[1].split('"')[0]] = float(line.split()[-1])
+    return bound, ready, phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time per module and time-to-ready.")
+    parser.add_argument("--runs", type=int, default=3, help="Server starts per mode (median reported)")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed by import time")
+    args = parser.parse_args()
+
+    statement = "import startup; import server; import litellm"
+    print("Import time per module (cumulative, seconds)\n")
+    for name, seconds in sorted(import_times(statement, depth=1), key=lambda item: -item[1])[: args.top]:
+        print(f"  {name:<40} {seconds:>6.3f}")
+    light = sum(seconds for _, seconds in import_times("import startup, click, uvicorn, dotenv, api_keys"))
+    print(f"\n  {'before binding (lazy)':<40} {light:>6.3f}")
+    print(f"  {'all':<40} {sum(seconds for _, seconds in import_times(statement)):>6.3f}\n")
+
+    print(f"Server start, median of {args.runs}\n")
+    print(f"{'mode':<8} {'bound s':>8} {'ready s':>8} {'build s':>8} {'warm s':>8}")
+    for mode in ("--eager-startup", "--lazy-startup"):
+        runs = [start_server(mode) for _ in range(args.runs)]
+        bound = statistics.median(run[0] for run in runs)
+        ready = statistics.median(run[1] for run in runs)
+        build = [run[2]["build"] for run in runs if "build" in run[2]]
+        warm = [run[2]["warm"] for run in runs if "warm" in run[2]]
+        build = f"{statistics.median(build):.2f}" if build else "-"
+        warm = f"{statistics.median(warm):.2f}" if warm else "-"
+        print(f"{mode[2:-8]:<8} {bound:>8.2f} {ready:>8.2f} {build:>8} {warm:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Validator Benchmark
+# Compares the per-request jsonschema.validate path against the native
+# single-pass A2UI validator on large info_list payloads.
+#
+# Usage: uv run python benchmarks/bench_validator.py [--items 100 1000 5000]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import jsonschema
+
+from a2ui_templates import render_template
+from a2ui_validator import validate_a2ui_messages
+from prompt_builder import A2UI_SCHEMA
+
+
+def make_info_list(n_items):
+    return render_template("info_list", {
+        "title": "Claims",
+        "items": [
+            {
+                "title": f"Case #{i:05d}",
+                "subtitle": "Auto Claim",
+                "status": "In progress",
+                "details": [
+                    {"label": "Incident date", "value": "March 15, 2024"},
+                    {"label": "Type", "value": "Collision"},
+                    {"label": "Amount", "value": f"€{i * 10}"},
+                    {"label": "Next step", "value": "Assessment within 48 hours"},
+                ],
+                "actionLabel": "View case",
+                "actionName": "view_claim",
+                "id": f"claim-{i}",
+            }
+            for i in range(n_items)
+        ],
+    })
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    schema = {"type": "array", "items": json.loads(A2UI_SCHEMA)}
+
+    print(f"{'items':>7} {'components':>11} {'jsonschema ms':>14} {'native ms':>10} {'speedup':>8}")
+    for n in args.items:
+        messages = make_info_list(n)
+        n_components = len(messages[1]["surfaceUpdate"]["components"])
+        # Same call the agent used to make per response: validator rebuilt each time.
+        baseline = best_of(
+            lambda: jsonschema.validate(instance=messages, schema=schema), args.repeat
+        )
+        native = best_of(lambda: validate_a2ui_messages(messages), args.repeat)
+        print(
+            f"{n:>7} {n_components:>11} {baseline * 1000:>14.2f} "
+            f"{native * 1000:>10.2f} {baseline / native:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Fake LLM for offline benchmarks
+# A drop-in replacement for the LiteLlm model that replays canned envelopes
+# with configurable latency and token pacing, so the agent can be load-tested
+# without provider calls. The corpus is the example envelopes from
+# get_template_prompt() matched against the TEST_PROMPTS list.
+
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+from collections import Counter
+from typing import Any, AsyncGenerator
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from prompt_builder import get_template_prompt
+from test_prompts import TEST_PROMPTS
+
+# Envelopes for templates that get_template_prompt() has no example for.
+EXTRA_ENVELOPES = [
+    {"message": "Here is a side-by-side comparison of the plans.", "template": "comparison", "data": {"title": "Home Insurance Plans", "plans": [{"name": "Base", "price": 19, "period": "month", "features": ["Fire", "Water damage"], "id": "home-base"}, {"name": "Plus", "price": 34, "period": "month", "features": ["Fire", "Water damage", "Theft"], "highlighted": True, "id": "home-plus"}, {"name": "Premium", "price": 59, "period": "month", "features": ["Fire", "Water damage", "Theft", "Natural disasters", "Legal protection"], "id": "home-premium"}]}},
+    {"message": "Please fill out the form below.", "template": "form", "data": {"title": "Request a Quote", "description": "We will get back to you within 24 hours.", "fields": [{"label": "Full name", "type": "text", "placeholder": "Jane Doe"}, {"label": "Email", "type": "email"}, {"label": "Start date", "type": "date"}, {"label": "Coverage", "type": "select", "options": ["Basic", "Standard", "Premium"]}], "submitLabel": "Get quote", "submitAction": "submit_quote"}},
+]
+
+# (template, keywords) checked in order; the first match picks the envelope.
+TEMPLATE_KEYWORDS = [
+    ("comparison", ("compar", "difference")),
+    ("form", ("form", "file a claim", "wizard", "quote", "update my")),
+    ("dashboard", ("dashboard", "summary", "portfolio", "kpi")),
+    ("policy_detail", ("details of",)),
+    ("info_list", ("list", "claim summary", "tabs")),
+    ("policy_list", ("policies", "options", "change my")),
+]
+
+_RETRY_PATTERN = re.compile(r"(?:Original request|Please retry): '(.*)'", re.S)
+
+
+def load_example_envelopes() -> dict[str, dict]:
+    """Parse the example envelopes out of the template prompt, by template."""
+    envelopes = {}
+    for line in get_template_prompt().splitlines():
+        if line.startswith('{"message"'):
+            envelope = json.loads(line)
+            envelopes[envelope.get("template", "text")] = envelope
+    for envelope in EXTRA_ENVELOPES:
+        envelopes[envelope["template"]] = envelope
+    return envelopes
+
+
+def classify_prompt(prompt: str) -> str:
+    lowered = prompt.lower()
+    for template, keywords in TEMPLATE_KEYWORDS:
+        if any(k in lowered for k in keywords):
+            return template
+    return "text"
+
+
+# Ways a reply can come back malformed (see corrupt()).
+FAULTS = ("truncate", "missing_brace", "trailing_comma", "newline", "prose", "single_quotes")
+
+
+def corrupt(text: str, rng: random.Random, fault: str | None = None) -> str:
+    """Return a malformed variant of a JSON envelope (a random fault by default)."""
+    fault = fault or rng.choice(FAULTS)
+    if fault == "truncate":
+        return text[: max(1, int(len(text) * rng.uniform(0.5, 0.95)))]
+    if fault == "missing_brace":
+        return text[:-1]
+    if fault == "trailing_comma":
+        return text[:-1] + ", }"
+    if fault == "newline":
+        # A raw line break inside the message string.
+        cut = text.index('"message": "') + len('"message": "')
+        return text[:cut] + "Sure!\n" + text[cut:]
+    if fault == "prose":
+        return "Sure! Here is the response:\n" + text
+    return text.replace('"', "'")
+
+
+class FakeCorpus:
+    """Canned replies shared by every FakeLlm instance, plus call counters."""
+
+    def __init__(self, prompts=TEST_PROMPTS):
+        self.envelopes = load_example_envelopes()
+        self.prompts = list(prompts)
+        self.calls = Counter()
+        self.retries = Counter()
+        self.faults = Counter()
+
+    def template_for(self, prompt: str) -> str:
+        template = classify_prompt(prompt)
+        return template if template in self.envelopes else "text"
+
+    def reply_for(self, prompt: str) -> str:
+        return json.dumps(self.envelopes[self.template_for(prompt)], ensure_ascii=False)
+
+
+class FakeLlm(BaseLlm):
+    """BaseLlm that answers from a FakeCorpus with simulated provider timing.
+
+    first_token_latency: seconds before the first chunk
+    tokens_per_second: output pacing (one token ~ 4 characters)
+    malformed_rate: probability that a first attempt returns broken JSON
+    error_rate: probability that a call fails before its first chunk
+    slow_rate, slow_latency: probability and first-token seconds of a
+        tail-latency call
+    """
+
+    model: str = "fake/replay"
+    corpus: Any = None
+    first_token_latency: float = 0.3
+    tokens_per_second: float = 200.0
+    chunk_tokens: int = 4
+    malformed_rate: float = 0.0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    seed: int = 0
+    _rng: random.Random | None = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        query = ""
+        for content in reversed(llm_request.contents or []):
+            if content.role == "user" and content.parts:
+                query = "".join(p.text or "" for p in content.parts)
+                break
+
+        retry = _RETRY_PATTERN.search(query)
+        prompt = retry.group(1) if retry else query
+        template = self.corpus.template_for(prompt)
+        self.corpus.calls[template] += 1
+        if retry:
+            self.corpus.retries[template] += 1
+
+        text = self.corpus.reply_for(prompt)
+        instruction = str(llm_request.config.system_instruction or "") if llm_request.config else ""
+        if "RESPONSE FORMAT" not in instruction:
+            text = json.loads(text)["message"]
+        elif not retry and self._rng.random() < self.malformed_rate:
+            self.corpus.faults[template] += 1
+            text = corrupt(text, self._rng)
+
+        slow = self.slow_rate > 0 and self._rng.random() < self.slow_rate
+        await asyncio.sleep(self.slow_latency if slow else self.first_token_latency)
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            raise ConnectionError(f"{self.model}: simulated provider error")
+        chunk_chars = 4 * self.chunk_tokens
+        delay = self.chunk_tokens / self.tokens_per_second
+        if stream:
+            for i in range(0, len(text), chunk_chars):
+                if i:
+                    await asyncio.sleep(delay)
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part.from_text(text=text[i:i + chunk_chars])]),
+                    partial=True,
+                )
+        else:
+            await asyncio.sleep(delay * (len(text) // chunk_chars))
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part.from_text(text=text)]),
+        )
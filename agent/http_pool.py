@@ -0,0 +1,264 @@
+# HTTP Pool
+# One pooled httpx.AsyncClient per process carries every LiteLLM request, for
+# the UI and text agents and every provider model. Connections are kept
+# alive, use HTTP/2 when the h2 package is installed, and are opened ahead of
+# the first request at startup and again after idle periods, so a turn does
+# not pay for DNS, TCP and TLS. A trace on every request records whether it
+# reused a connection and how long opening one took.
+#
+# LiteLLM is given the client in three places: litellm.aclient_session
+# (OpenAI-compatible providers), litellm.module_level_aclient (what Gemini
+# streaming calls use) and the `client` argument of litellm.acompletion for
+# Gemini and Anthropic models.
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+import httpx
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "ui_builder_http_requests_total",
+    "LLM HTTP requests per host, on a new or a reused connection, by HTTP version.",
+    ("host", "connection", "http_version"),
+)
+HANDSHAKE_SECONDS = REGISTRY.histogram(
+    "ui_builder_http_handshake_seconds",
+    "Time to open a connection: connect (DNS and TCP) and tls.",
+    ("host", "phase"),
+)
+PREWARMS = REGISTRY.counter(
+    "ui_builder_http_prewarms_total",
+    "Connections warmed ahead of requests, at startup and after idle periods, by outcome (ok, error).",
+    ("host", "outcome"),
+)
+
+# Provider model prefixes, the variable LiteLLM reads their base URL from and
+# the default, for the connections warmed at startup.
+PROVIDER_URLS = (
+    (("gemini/",), "GEMINI_API_BASE", "https://generativelanguage.googleapis.com"),
+    (("gpt-", "openai/"), "OPENAI_API_BASE", "https://api.openai.com"),
+    (("claude-", "anthropic/"), "ANTHROPIC_API_BASE", "https://api.anthropic.com"),
+)
+# Models whose LiteLLM handler takes the client as `client`; the others use
+# litellm.aclient_session (OpenAI SDK) or keep their own clients.
+_HANDLER_PREFIXES = ("gemini/", "claude-", "anthropic/")
+
+
+def provider_url(model: str) -> str | None:
+    """Origin (scheme, host and port) LiteLLM sends `model`'s requests to,
+    or None for providers without a known endpoint."""
+    for prefixes, variable, default in PROVIDER_URLS:
+        if model.startswith(prefixes):
+            url = httpx.URL(os.getenv(variable) or default)
+            return str(url.copy_with(path="/", query=None))
+    return None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ConnectionTrace:
+    """httpcore trace callback of one request: whether it opened a
+    connection, and the connect and TLS times when it did."""
+
+    def __init__(self, host: str, warm: bool = False):
+        self.host = host
+        self.warm = warm
+        self.new_connection = False
+        self._started: dict[str, float] = {}
+
+    async def __call__(self, event: str, info: dict) -> None:
+        for phase, name in (("connect", "connection.connect_tcp"), ("tls", "connection.start_tls")):
+            if event == f"{name}.started":
+                self.new_connection = True
+                self._started[phase] = time.perf_counter()
+            elif event == f"{name}.complete":
+                HANDSHAKE_SECONDS.observe(time.perf_counter() - self._started[phase], host=self.host, phase=phase)
+
+
+class HttpPool:
+    """The shared client, its limits and the warm-up of provider connections."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        http2: bool | None = None,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 600.0,
+        connect_timeout: float = 5.0,
+        warm: bool = True,
+        warm_urls: tuple[str, ...] = (),
+        warm_connections: int = 1,
+        rewarm_after: float = 30.0,
+    ):
+        self.enabled = enabled
+        self.http2 = _http2_available() if http2 is None else http2
+        self.warm = warm
+        self.warm_connections = warm_connections
+        self.rewarm_after = rewarm_after
+        self.connect_timeout = connect_timeout
+        # Origins to warm: HTTP_POOL_WARM_URLS plus the providers of the
+        # models built on the pool (see litellm_args).
+        self.warm_urls: dict[str, str] = {}
+        for url in warm_urls:
+            self._add_warm_url(url)
+        self._last_used: dict[str, float] = {}
+        self._warmed: set[str] = set()
+        self._failing: set[str] = set()
+        self._keep_warm: asyncio.Task | None = None
+        self._handler = None
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    @classmethod
+    def from_env(cls) -> "HttpPool":
+        """Build from HTTP_POOL, HTTP_POOL_HTTP2, HTTP_POOL_MAX_CONNECTIONS,
+        HTTP_POOL_MAX_KEEPALIVE, HTTP_POOL_KEEPALIVE_EXPIRY, HTTP_POOL_TIMEOUT,
+        HTTP_POOL_CONNECT_TIMEOUT, HTTP_POOL_WARM, HTTP_POOL_WARM_URLS,
+        HTTP_POOL_WARM_CONNECTIONS and HTTP_POOL_REWARM_AFTER."""
+        http2 = os.getenv("HTTP_POOL_HTTP2", "auto").lower()
+        return cls(
+            enabled=os.getenv("HTTP_POOL", "true").lower() != "false",
+            http2=None if http2 == "auto" else http2 != "false",
+            max_connections=int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60")),
+            timeout=float(os.getenv("HTTP_POOL_TIMEOUT", "600")),
+            connect_timeout=float(os.getenv("HTTP_POOL_CONNECT_TIMEOUT", "5")),
+            warm=os.getenv("HTTP_POOL_WARM", "true").lower() != "false",
+            warm_urls=tuple(url.strip() for url in os.getenv("HTTP_POOL_WARM_URLS", "").split(",") if url.strip()),
+            warm_connections=int(os.getenv("HTTP_POOL_WARM_CONNECTIONS", "1")),
+            rewarm_after=float(os.getenv("HTTP_POOL_REWARM_AFTER", "30")),
+        )
+
+    def litellm_args(self, model: str) -> dict[str, Any]:
+        """Extra LiteLlm arguments that put `model`'s requests on the pool."""
+        if not self.enabled:
+            return {}
+        url = provider_url(model)
+        if url is not None:
+            self._add_warm_url(url)
+        handler = self._install()
+        return {"client": handler} if model.startswith(_HANDLER_PREFIXES) else {}
+
+    def _install(self):
+        """Put the client behind LiteLLM's process-wide clients (the OpenAI
+        SDK session and the handler Gemini streaming calls use regardless of
+        `client`) and return the handler wrapping it."""
+        if self._handler is None:
+            import litellm
+            from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+            self._handler = AsyncHTTPHandler(timeout=self.timeout, client_alias="http_pool")
+            self._handler.client = self.client
+            litellm.aclient_session = self.client
+            litellm.module_level_aclient = self._handler
+        return self._handler
+
+    async def start(self) -> None:
+        """Warm the provider connections and keep them warm while idle.
+        Runs in the serving event loop; failures are logged, not raised."""
+        if not (self.enabled and self.warm and self.warm_urls):
+            return
+        await asyncio.gather(*(self._warm(host) for host in self.warm_urls))
+        if self.rewarm_after > 0 and self._keep_warm is None:
+            self._keep_warm = asyncio.create_task(self._keep_warm_loop())
+
+    async def close(self) -> None:
+        if self._keep_warm is not None:
+            self._keep_warm.cancel()
+            self._keep_warm = None
+        await self.client.aclose()
+
+    def _add_warm_url(self, url: str) -> None:
+        self.warm_urls.setdefault(httpx.URL(url).host, url)
+
+    async def _warm(self, host: str) -> None:
+        """Open `warm_connections` connections to `host` with HEAD requests;
+        any HTTP answer leaves a connection in the pool."""
+        start = time.perf_counter()
+
+        async def warm_one():
+            trace = _ConnectionTrace(host, warm=True)
+            response = await self.client.head(
+                self.warm_urls[host], extensions={"trace": trace}, timeout=self.connect_timeout
+            )
+            return response.http_version, trace.new_connection
+
+        results = await asyncio.gather(*(warm_one() for _ in range(self.warm_connections)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        opened = sum(1 for result in results if not isinstance(result, BaseException) and result[1])
+        if len(errors) < len(results):
+            PREWARMS.inc(len(results) - len(errors), host=host, outcome="ok")
+        if errors:
+            PREWARMS.inc(len(errors), host=host, outcome="error")
+            # Once per outage: the keep-warm loop retries every few seconds.
+            if host not in self._failing:
+                self._failing.add(host)
+                logger.warning(f"Warming connections to {host} failed: {errors[0]!r}")
+            return
+        message = f"Warmed {host} over {results[0][0]} in {(time.perf_counter() - start) * 1000:.0f}ms ({opened} opened)"
+        if host in self._failing or host not in self._warmed:
+            self._failing.discard(host)
+            self._warmed.add(host)
+            logger.info(message)
+        else:
+            logger.debug(message)
+
+    async def _keep_warm_loop(self) -> None:
+        """Re-warm hosts with no request for `rewarm_after` seconds, before
+        either side drops the idle connection."""
+        while True:
+            await asyncio.sleep(self.rewarm_after / 2)
+            now = time.monotonic()
+            idle = [host for host in self.warm_urls if now - self._last_used.get(host, 0.0) >= self.rewarm_after]
+            if idle:
+                await asyncio.gather(*(self._warm(host) for host in idle))
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self._last_used[request.url.host] = time.monotonic()
+        request.extensions.setdefault("trace", _ConnectionTrace(request.url.host))
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        trace = response.request.extensions.get("trace")
+        if isinstance(trace, _ConnectionTrace) and not trace.warm:
+            HTTP_REQUESTS.inc(
+                host=trace.host,
+                connection="new" if trace.new_connection else "reused",
+                http_version=response.http_version,
+            )
+
+
+_POOL: HttpPool | None = None
+
+
+def http_pool() -> HttpPool:
+    """The process-wide pool, built from the environment on first use."""
+    global _POOL
+    if _POOL is None:
+        _POOL = HttpPool.from_env()
+    return _POOL
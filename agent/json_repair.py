@@ -0,0 +1,163 @@
+# Tolerant JSON Repair
+# Fixes the small faults LLMs put in otherwise good JSON replies (markdown
+# fences, prose around the object, trailing commas, single quotes, raw
+# newlines in strings, missing closing braces) in one pass over the text,
+# so the agent does not spend an LLM round trip on "your JSON was invalid".
+#
+# Repairs never invent content: a reply cut off inside a string or after a
+# key is left broken, and the caller retries with the LLM as before.
+
+import json
+import re
+from typing import Any
+
+# Runs that need no rewriting, inside and outside strings.
+_STRING_RUN = re.compile(r"[^\\\"'\x00-\x1f]+")
+_OUTSIDE_RUN = re.compile(r"[^\"'{}\[\]]+")
+_FENCE = re.compile(r"```[a-zA-Z]*")
+_FENCED = re.compile(r"```[a-zA-Z]*\s*(.*?)\s*```", re.S)
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _last_significant(out: list[str]) -> tuple[int, str]:
+    """Index and text (right-stripped) of the last non-blank output piece."""
+    for index in range(len(out) - 1, -1, -1):
+        stripped = out[index].rstrip()
+        if stripped:
+            return index, stripped
+    return -1, ""
+
+
+def _drop_trailing_comma(out: list[str]) -> bool:
+    index, stripped = _last_significant(out)
+    if not stripped.endswith(","):
+        return False
+    out[index] = stripped[:-1] + out[index][len(stripped):]
+    return True
+
+
+def _closes_single_quote(text: str, index: int) -> bool:
+    """A ' ends a single-quoted string only before , : } ] or the end;
+    otherwise it is an apostrophe ('It's')."""
+    rest = text[index:].lstrip()
+    return not rest or rest[0] in ",:}]"
+
+
+def repair_json(text: str) -> tuple[Any, list[str]]:
+    """Parse an LLM JSON reply, repairing common faults.
+
+    Returns (value, faults) where faults names the fault classes that were
+    fixed, in order of discovery ([] when the text parsed as is): fence,
+    prose, trailing_comma, single_quotes, newline, missing_brace.
+    Raises json.JSONDecodeError (the original parse error) when the text
+    cannot be repaired.
+    """
+    text = text.strip()
+    try:
+        return json.loads(text), []
+    except json.JSONDecodeError as e:
+        error = e
+
+    # The most common case, a fenced but otherwise valid reply.
+    fenced = _FENCED.fullmatch(text)
+    if fenced:
+        try:
+            return json.loads(fenced.group(1)), ["fence"]
+        except json.JSONDecodeError:
+            pass
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise error
+    start = min(starts)
+    faults = []
+
+    def fault(name):
+        if name not in faults:
+            faults.append(name)
+
+    prefix = text[:start].strip()
+    if prefix:
+        fault("fence" if _FENCE.fullmatch(prefix) else "prose")
+
+    out = []
+    stack = []
+    quote = None
+    end = None
+    i = start
+    n = len(text)
+    while i < n:
+        if quote:
+            run = _STRING_RUN.match(text, i)
+            if run:
+                out.append(run.group())
+                i = run.end()
+                continue
+            c = text[i]
+            if c == "\\":
+                escaped = text[i + 1:i + 2]
+                # \' is not a JSON escape; a bare apostrophe is.
+                out.append("'" if escaped == "'" else c + escaped)
+                i += 2
+            elif c == quote and (quote == '"' or _closes_single_quote(text, i + 1)):
+                out.append('"')
+                quote = None
+                i += 1
+            elif c == '"':
+                out.append('\\"')
+                i += 1
+            elif c == "'":
+                out.append(c)
+                i += 1
+            else:
+                fault("newline")
+                out.append(_CONTROL_ESCAPES.get(c, f"\\u{ord(c):04x}"))
+                i += 1
+            continue
+
+        run = _OUTSIDE_RUN.match(text, i)
+        if run:
+            out.append(run.group())
+            i = run.end()
+            continue
+        c = text[i]
+        i += 1
+        if c == '"':
+            quote = c
+            out.append(c)
+        elif c == "'":
+            fault("single_quotes")
+            quote = c
+            out.append('"')
+        elif c in _CLOSERS:
+            stack.append(c)
+            out.append(c)
+        else:
+            if _drop_trailing_comma(out):
+                fault("trailing_comma")
+            if not stack or _CLOSERS[stack.pop()] != c:
+                raise error
+            out.append(c)
+            if not stack:
+                end = i
+                break
+
+    if end is None:
+        # Cut short: only complete values may be closed off.
+        if quote:
+            raise error
+        _drop_trailing_comma(out)
+        if _last_significant(out)[1].endswith(":"):
+            raise error
+        fault("missing_brace")
+        out.extend(_CLOSERS[opener] for opener in reversed(stack))
+    else:
+        suffix = text[end:].strip()
+        if suffix:
+            fault("fence" if _FENCE.fullmatch(suffix) else "prose")
+
+    try:
+        return json.loads("".join(out)), faults
+    except json.JSONDecodeError:
+        raise error from None
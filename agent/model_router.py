@@ -0,0 +1,298 @@
+# Model Router
+# Picks the LLM per turn between a fast model and the strong default one.
+# A small naive Bayes intent classifier (word unigrams and bigrams, trained
+# locally on the labeled test prompts and the template prompt's guidelines
+# and examples) predicts the template a query will need: text-only turns and
+# small templates go to the fast model, templates with large "data" to the
+# strong one. A turn the classifier is unsure about stays on the strong
+# (default) model. Live per-model latency moves turns off a model that is
+# currently over the latency budget.
+
+import logging
+import math
+import os
+import re
+import time
+import typing
+from collections import Counter
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from metrics import REGISTRY
+from prompt_builder import get_template_prompt
+from template_schemas import TEMPLATE_MODELS
+from test_prompts import LABELED_PROMPTS
+
+logger = logging.getLogger(__name__)
+
+ROUTE_DECISIONS = REGISTRY.counter(
+    "ui_builder_route_decisions_total",
+    "Turns sent to each model, by the reason for the choice.",
+    ("route", "reason"),
+)
+ROUTE_SECONDS = REGISTRY.histogram(
+    "ui_builder_route_seconds",
+    "LLM time of a turn, by the model it was routed to.",
+    ("route",),
+)
+ROUTE_PREDICTIONS = REGISTRY.counter(
+    "ui_builder_route_predictions_total",
+    "Predicted intents checked against the template of the reply.",
+    ("route", "outcome"),
+)
+
+FAST = "fast"
+STRONG = "strong"
+TEXT = "text"
+
+# Templates whose data is long lists of nested objects.
+DEFAULT_STRONG_INTENTS = ("policy_list", "policy_detail", "comparison", "info_list")
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Function words, which say nothing about the template.
+_STOPWORDS = frozenset(
+    "a an and are at be can do for i in is it me my of on or please "
+    "that the this to user what with you your".split()
+)
+_GUIDELINE = re.compile(r"^- (.+?) → (.+)$")
+_TEMPLATE_ENTRY = re.compile(r"^\d+\. (\w+) — (.+)$")
+_USER_LINE = re.compile(r'^User(?: action)?: "?(.+?)"?$')
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping, so "selects" and "selected" meet "select"."""
+    if len(word) > 4:
+        if word.endswith("ies"):
+            return word[:-3] + "y"
+        for suffix in ("ing", "ed", "es", "s"):
+            if word.endswith(suffix):
+                return word[: -len(suffix)]
+    return word
+
+
+def features(text: str) -> list[str]:
+    """Stemmed words and word bigrams of a query."""
+    words = [_stem(word) for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _field_words(model) -> str:
+    """The field names of a template's data, nested ones included, as words
+    ("maxCoverage" -> "max coverage")."""
+    words = []
+    for name, info in model.model_fields.items():
+        words.append(re.sub(r"(?<=[a-z])(?=[A-Z])", " ", name))
+        for arg in (info.annotation, *typing.get_args(info.annotation)):
+            for inner in (arg, *typing.get_args(arg)):
+                if isinstance(inner, type) and issubclass(inner, BaseModel):
+                    words.append(_field_words(inner))
+    return " ".join(words)
+
+
+def training_examples() -> list[tuple[str, str]]:
+    """(text, intent) pairs: the labeled test prompts plus what the template
+    prompt itself teaches (template descriptions, data fields, selection
+    guidelines and the user lines of its examples)."""
+    examples = list(LABELED_PROMPTS)
+    examples.extend((_field_words(model), name) for name, model in TEMPLATE_MODELS.items())
+    pending = None
+    for line in get_template_prompt().splitlines():
+        line = line.strip()
+        entry = _TEMPLATE_ENTRY.match(line)
+        if entry and entry.group(1) in TEMPLATE_MODELS:
+            examples.append((entry.group(2), entry.group(1)))
+            continue
+        guideline = _GUIDELINE.match(line)
+        if guideline:
+            target = guideline.group(2)
+            if target.startswith(TEXT):
+                examples.append((guideline.group(1), TEXT))
+            else:
+                named = [word for word in re.findall(r"\w+", target) if word in TEMPLATE_MODELS]
+                if named:
+                    examples.append((guideline.group(1), named[0]))
+            continue
+        user = _USER_LINE.match(line)
+        if user:
+            pending = user.group(1)
+        elif pending and line.startswith('{"message"'):
+            template = re.search(r'"template": "(\w+)"', line)
+            examples.append((pending, template.group(1) if template else TEXT))
+            pending = None
+    return examples
+
+
+class IntentClassifier:
+    """Multinomial naive Bayes over features(), with uniform class priors.
+
+    Unigrams and bigrams of the same words are far from independent, so the
+    raw posterior is near 1 even for wrong guesses; the log likelihoods are
+    divided by the square root of the number of known features to temper it
+    into something a confidence threshold can act on.
+    """
+
+    def __init__(self, examples: list[tuple[str, str]], alpha: float = 0.5):
+        self.alpha = alpha
+        self._counts: dict[str, Counter] = {}
+        for text, intent in examples:
+            self._counts.setdefault(intent, Counter()).update(set(features(text)))
+        self._vocabulary = set().union(*self._counts.values())
+        self._totals = {intent: sum(counts.values()) for intent, counts in self._counts.items()}
+
+    @classmethod
+    def default(cls) -> "IntentClassifier":
+        return cls(training_examples())
+
+    @property
+    def intents(self) -> list[str]:
+        return list(self._counts)
+
+    def posteriors(self, text: str) -> dict[str, float]:
+        """Tempered posterior probability of every intent. A query without a
+        single known word ("hello", "thanks") is text."""
+        tokens = [token for token in features(text) if token in self._vocabulary]
+        if not tokens:
+            return {TEXT: 1.0}
+        size = len(self._vocabulary)
+        temperature = math.sqrt(len(tokens))
+        scores = {}
+        for intent, counts in self._counts.items():
+            denominator = math.log(self._totals[intent] + self.alpha * size)
+            log_likelihood = sum(math.log(counts[token] + self.alpha) - denominator for token in tokens)
+            scores[intent] = log_likelihood / temperature
+        best = max(scores.values())
+        weights = {intent: math.exp(score - best) for intent, score in scores.items()}
+        total = sum(weights.values())
+        return {intent: weight / total for intent, weight in weights.items()}
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """Most likely intent and its posterior probability."""
+        posteriors = self.posteriors(text)
+        best = max(posteriors, key=posteriors.get)
+        return best, posteriors[best]
+
+
+@dataclass
+class Route:
+    """Where one turn goes and why (intent, uncertain, latency or retry).
+    `confidence` is the probability that the predicted intent is one the
+    fast model handles (or a strong one, on the strong model)."""
+
+    model: str
+    intent: str
+    confidence: float
+    reason: str
+
+
+class _Latency:
+    """Moving average of a model's LLM time, forgotten once it is stale."""
+
+    def __init__(self):
+        self.average: float | None = None
+        self.updated_at = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.average = seconds if self.average is None else 0.8 * self.average + 0.2 * seconds
+        self.updated_at = time.monotonic()
+
+    def estimate(self, max_age: float) -> float | None:
+        if self.average is None or time.monotonic() - self.updated_at > max_age:
+            return None
+        return self.average
+
+
+class ModelRouter:
+    """Chooses the fast or the strong model for each turn.
+
+    A turn goes to the fast model only when its predicted intent is not one
+    of `strong_intents` and the intents outside `strong_intents` together
+    hold at least `min_confidence` of the posterior; otherwise it stays on
+    the strong (default) model. When the chosen model's average LLM
+    time is over `latency_budget` seconds and the other model's is within
+    it, the turn goes to the other model instead. Averages older than
+    `latency_window` seconds are ignored, so a slow model gets traffic (and
+    a fresh measurement) again.
+    """
+
+    def __init__(
+        self,
+        fast_model: str,
+        strong_model: str,
+        strong_intents: tuple[str, ...] = DEFAULT_STRONG_INTENTS,
+        min_confidence: float = 0.7,
+        latency_budget: float = 15.0,
+        latency_window: float = 60.0,
+        classifier: IntentClassifier | None = None,
+    ):
+        self.models = {FAST: fast_model, STRONG: strong_model}
+        self.strong_intents = frozenset(strong_intents)
+        self.min_confidence = min_confidence
+        self.latency_budget = latency_budget
+        self.latency_window = latency_window
+        self.classifier = classifier or IntentClassifier.default()
+        self._latency = {FAST: _Latency(), STRONG: _Latency()}
+
+    @classmethod
+    def from_env(cls, strong_model: str) -> "ModelRouter | None":
+        """Build from LITELLM_FAST_MODEL, ROUTER_STRONG_TEMPLATES,
+        ROUTER_MIN_CONFIDENCE, ROUTER_LATENCY_BUDGET and ROUTER_LATENCY_WINDOW;
+        None (every turn on `strong_model`) when no fast model is set."""
+        fast_model = os.getenv("LITELLM_FAST_MODEL", "")
+        if not fast_model or fast_model == strong_model:
+            return None
+        strong_intents = os.getenv("ROUTER_STRONG_TEMPLATES", ",".join(DEFAULT_STRONG_INTENTS))
+        return cls(
+            fast_model=fast_model,
+            strong_model=strong_model,
+            strong_intents=tuple(name.strip() for name in strong_intents.split(",") if name.strip()),
+            min_confidence=float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.7")),
+            latency_budget=float(os.getenv("ROUTER_LATENCY_BUDGET", "15")),
+            latency_window=float(os.getenv("ROUTER_LATENCY_WINDOW", "60")),
+        )
+
+    def route(self, query: str) -> Route:
+        """Pick the model for a turn."""
+        posteriors = self.classifier.posteriors(query)
+        intent = max(posteriors, key=posteriors.get)
+        fast = sum(p for name, p in posteriors.items() if name not in self.strong_intents)
+        if intent in self.strong_intents:
+            model, reason, confidence = STRONG, "intent", 1.0 - fast
+        elif fast < self.min_confidence:
+            model, reason, confidence = STRONG, "uncertain", fast
+        else:
+            model, reason, confidence = FAST, "intent", fast
+
+        other = FAST if model == STRONG else STRONG
+        chosen = self._latency[model].estimate(self.latency_window)
+        alternative = self._latency[other].estimate(self.latency_window)
+        if (
+            chosen is not None
+            and chosen > self.latency_budget
+            and alternative is not None
+            and alternative <= self.latency_budget
+        ):
+            model, reason = other, "latency"
+
+        ROUTE_DECISIONS.inc(route=model, reason=reason)
+        logger.info(f"Routing to {model} model ({reason}): intent {intent} ({confidence:.2f})")
+        return Route(model=model, intent=intent, confidence=confidence, reason=reason)
+
+    def escalate(self, route: Route) -> Route:
+        """The route for a retry: always the strong model."""
+        if route.model != STRONG:
+            ROUTE_DECISIONS.inc(route=STRONG, reason="retry")
+        return Route(model=STRONG, intent=route.intent, confidence=route.confidence, reason="retry")
+
+    def observe(self, route: Route, seconds: float) -> None:
+        """Record the LLM time of a routed turn."""
+        ROUTE_SECONDS.observe(seconds, route=route.model)
+        self._latency[route.model].observe(seconds)
+
+    def record_outcome(self, route: Route, template: str | None) -> None:
+        """Check the predicted intent against the template actually replied."""
+        actual = template or TEXT
+        outcome = "correct" if actual == route.intent else "wrong"
+        ROUTE_PREDICTIONS.inc(route=route.model, outcome=outcome)
+        if outcome == "wrong":
+            logger.info(f"Route prediction missed: predicted {route.intent}, replied {actual}")
@@ -0,0 +1,69 @@
+# Pager Store
+# Full item sets of paginated lists, keyed by their content-hash listId. The
+# store is per process and bounded (LRU by count and total size), not part of
+# session state: page flips work for clients that send no contextId, and a
+# long list never grows the session history.
+
+import json
+import logging
+import os
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PAGER_REQUESTS = REGISTRY.counter(
+    "ui_builder_pager_store_requests_total",
+    "Pager lookups for page flips, by result (hit, miss).",
+    ("result",),
+)
+
+
+class PagerStore:
+    """LRU of pagers (see a2ui_templates.paginate) with a total size cap in bytes."""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # listId -> (size, pager)
+        self._entries: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+        self.bytes = 0
+
+    @classmethod
+    def from_env(cls) -> "PagerStore":
+        """Build from PAGER_STORE_MAX_COUNT and PAGER_STORE_MAX_BYTES."""
+        return cls(
+            max_entries=int(os.getenv("PAGER_STORE_MAX_COUNT", "1000")),
+            max_bytes=int(os.getenv("PAGER_STORE_MAX_BYTES", str(64 * 1024 * 1024))),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, list_id: str | None) -> dict | None:
+        entry = self._entries.get(list_id) if list_id else None
+        if entry is None:
+            PAGER_REQUESTS.inc(result="miss")
+            return None
+        PAGER_REQUESTS.inc(result="hit")
+        self._entries.move_to_end(list_id)
+        return entry[1]
+
+    def put(self, pager: dict) -> bool:
+        """Store a pager; False when it is too large to keep."""
+        list_id = pager["id"]
+        if list_id in self._entries:
+            # Same id, same content: just refresh its position.
+            self._entries.move_to_end(list_id)
+            return True
+        size = len(json.dumps(pager["data"], ensure_ascii=False, default=str))
+        if size > self.max_bytes:
+            logger.warning(f"Pager {list_id} ({size} bytes) exceeds PAGER_STORE_MAX_BYTES; not stored")
+            return False
+        self._entries[list_id] = (size, pager)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+        return True
@@ -1,6 +1,10 @@
 # Template-based Prompt Builder
 # The AI picks a template + provides structured data. No raw A2UI generation.
 
+from string import Template
+
+from template_schemas import TEMPLATE_MODELS, describe_data
+
 # Keep the schema for optional validation of template output
 A2UI_SCHEMA = r'''
 {
@@ -66,8 +70,12 @@ A2UI_SCHEMA = r'''
 
 
 def get_template_prompt() -> str:
-    """Prompt that tells the AI to return template name + data, not raw A2UI."""
-    return """
+    """Prompt that tells the AI to return template name + data, not raw A2UI.
+
+    The data descriptions are generated from template_schemas, the same
+    definition the structured-output schema comes from.
+    """
+    return Template("""
 
 RESPONSE FORMAT:
 Your entire response MUST be a single JSON object. No markdown, no backticks.
@@ -84,22 +92,22 @@ Two possible formats:
 AVAILABLE TEMPLATES:
 
 1. policy_list — Show a list of insurance policies with selection buttons.
-   data: {"title": "string", "policies": [{"name": "string", "price": number, "features": ["string"], "id": "string"}]}
+   data: $policy_list
 
 2. policy_detail — Detailed view of a single policy with coverages and action button.
-   data: {"name": "string", "type": "string", "price": number, "period": "month|year", "deductible": number, "maxCoverage": "string", "coverages": ["string"], "benefits": ["string"], "actionLabel": "string", "actionName": "string", "id": "string"}
+   data: $policy_detail
 
 3. comparison — Side-by-side plan comparison cards.
-   data: {"title": "string", "plans": [{"name": "string", "price": number, "period": "month|year", "features": ["string"], "highlighted": true/false, "id": "string"}]}
+   data: $comparison
 
 4. dashboard — KPI metrics cards in a row.
-   data: {"title": "string", "kpis": [{"label": "string", "value": "string", "description": "string"}]}
+   data: $dashboard
 
 5. form — Interactive form with input fields and submit button.
-   data: {"title": "string", "description": "string (optional)", "fields": [{"label": "string", "type": "text|email|phone|date|textarea|select", "placeholder": "string (optional)", "options": ["string (only for select)"]}], "submitLabel": "string", "submitAction": "string"}
+   data: $form
 
 6. info_list — List of items with detail rows and optional action buttons.
-   data: {"title": "string", "items": [{"title": "string", "subtitle": "string", "status": "string (optional)", "details": [{"label": "string", "value": "string"}], "actionLabel": "string (optional)", "actionName": "string (optional)", "id": "string (optional)"}]}
+   data: $info_list
 
 TEMPLATE SELECTION GUIDELINES:
 - User asks about available policies → policy_list
@@ -133,7 +141,7 @@ User action: select_policy with context policyName="Full Comprehensive"
 Example 5 — Form submission confirmation (ALWAYS update the canvas, NEVER re-show the form):
 User action: submit_claim with data {"incident_date": "2024-03-15", "type": "Collision", "description": "Rear-end collision at traffic light"}
 {"message": "Claim received! Here is a summary of your case.", "template": "info_list", "data": {"title": "Claim Report Submitted ✓", "items": [{"title": "Case #2024-1547", "subtitle": "Auto Claim — In progress", "status": "Received", "details": [{"label": "Incident date", "value": "March 15, 2024"}, {"label": "Type", "value": "Collision"}, {"label": "Description", "value": "Rear-end collision at traffic light"}, {"label": "Next step", "value": "Assessment within 48 hours"}], "actionLabel": "View case status", "actionName": "view_claim", "id": "claim-2024-1547"}]}}
-"""
+""").substitute({name: describe_data(model) for name, model in TEMPLATE_MODELS.items()})
 
 
 def get_text_prompt() -> str:
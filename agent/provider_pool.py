@@ -0,0 +1,412 @@
+# Provider Pool
+# Hedged requests and failover across LLM providers. HedgedLlm wraps one
+# model per provider (the primary first, then LLM_FALLBACK_MODELS). When the
+# primary has not answered by its p95 first-response time, a hedge request
+# goes to the next provider. The first reply that validates wins and the
+# other request is canceled. A provider that fails is replaced by the next
+# one at once instead of being retried, and a circuit breaker takes a
+# provider whose recent error rate spikes out of the pool for a cooldown.
+#
+# State (latency samples, breakers) is per process and shared by every
+# HedgedLlm, so the UI and text agents see the same provider health.
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Callable
+from contextlib import aclosing
+from typing import Any
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from api_keys import missing_api_key
+from metrics import REGISTRY
+from template_schemas import structured_output_enabled
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_REQUESTS = REGISTRY.counter(
+    "ui_builder_provider_requests_total",
+    "LLM requests per provider, by outcome (ok, error, invalid, canceled).",
+    ("provider", "outcome"),
+)
+PROVIDER_SECONDS = REGISTRY.histogram(
+    "ui_builder_provider_seconds",
+    "Time until a provider's first response item.",
+    ("provider",),
+)
+HEDGES = REGISTRY.counter(
+    "ui_builder_hedges_total",
+    "Extra provider requests: hedge (primary slow), failover (a provider failed) and won (the extra request answered first).",
+    ("outcome",),
+)
+BREAKER_TRANSITIONS = REGISTRY.counter(
+    "ui_builder_breaker_transitions_total",
+    "Circuit breaker state changes per provider.",
+    ("provider", "state"),
+)
+
+class CircuitBreaker:
+    """Closed, open or half-open, from the error rate of recent requests.
+
+    Opens when at least `min_requests` finished in the last `window`
+    seconds and `error_rate` of them failed. After `cooldown` seconds one
+    probe request is let through (half-open); its outcome closes the
+    breaker or opens it again.
+    """
+
+    def __init__(self, provider: str, error_rate: float = 0.5, min_requests: int = 5,
+                 window: float = 60.0, cooldown: float = 30.0):
+        self.provider = provider
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._probing = False
+        # (finished_at, ok) of recent requests, oldest first.
+        self._outcomes: deque[tuple[float, bool]] = deque()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to the provider now."""
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+            self._set("half_open")
+        if self.state == "half_open":
+            return not self._probing
+        return self.state == "closed"
+
+    def start(self) -> None:
+        """A request was sent; in half-open state it is the probe."""
+        if self.state == "half_open":
+            self._probing = True
+
+    def cancel(self) -> None:
+        """A request was canceled before its outcome was known."""
+        self._probing = False
+
+    def record(self, ok: bool) -> None:
+        now = time.monotonic()
+        if self.state == "half_open":
+            self._probing = False
+            self._outcomes.clear()
+            if ok:
+                self._set("closed")
+            else:
+                self._open(now)
+            return
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        failures = sum(1 for _, outcome in self._outcomes if not outcome)
+        if (
+            self.state == "closed"
+            and len(self._outcomes) >= self.min_requests
+            and failures >= self.error_rate * len(self._outcomes)
+        ):
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._outcomes.clear()
+        self._set("open")
+        logger.warning(f"Circuit breaker open for {self.provider} ({self.cooldown:.0f}s)")
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            BREAKER_TRANSITIONS.inc(provider=self.provider, state=state)
+
+
+class ProviderStats:
+    """First-response times and the circuit breaker of one provider."""
+
+    def __init__(self, provider: str, breaker: CircuitBreaker, samples: int = 200):
+        self.provider = provider
+        self.breaker = breaker
+        self._latencies: deque[float] = deque(maxlen=samples)
+
+    def observe(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+        PROVIDER_SECONDS.observe(seconds, provider=self.provider)
+
+    def percentile(self, q: float, min_samples: int = 10) -> float | None:
+        """The q-th percentile of recent first-response times (None until
+        `min_samples` are known)."""
+        if len(self._latencies) < min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class ProviderPool:
+    """Process-wide provider state and the hedging and breaker settings."""
+
+    def __init__(
+        self,
+        hedge: bool = True,
+        hedge_percentile: float = 95.0,
+        initial_hedge_delay: float = 2.0,
+        breaker_error_rate: float = 0.5,
+        breaker_min_requests: int = 5,
+        breaker_window: float = 60.0,
+        breaker_cooldown: float = 30.0,
+    ):
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self._breaker_settings = dict(
+            error_rate=breaker_error_rate,
+            min_requests=breaker_min_requests,
+            window=breaker_window,
+            cooldown=breaker_cooldown,
+        )
+        self._stats: dict[str, ProviderStats] = {}
+
+    @classmethod
+    def from_env(cls) -> "ProviderPool":
+        """Build from LLM_HEDGE, LLM_HEDGE_PERCENTILE, LLM_HEDGE_DELAY and the
+        BREAKER_ERROR_RATE, BREAKER_MIN_REQUESTS, BREAKER_WINDOW and
+        BREAKER_COOLDOWN variables."""
+        return cls(
+            hedge=os.getenv("LLM_HEDGE", "true").lower() != "false",
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            initial_hedge_delay=float(os.getenv("LLM_HEDGE_DELAY", "2")),
+            breaker_error_rate=float(os.getenv("BREAKER_ERROR_RATE", "0.5")),
+            breaker_min_requests=int(os.getenv("BREAKER_MIN_REQUESTS", "5")),
+            breaker_window=float(os.getenv("BREAKER_WINDOW", "60")),
+            breaker_cooldown=float(os.getenv("BREAKER_COOLDOWN", "30")),
+        )
+
+    def stats(self, provider: str) -> ProviderStats:
+        stats = self._stats.get(provider)
+        if stats is None:
+            stats = self._stats[provider] = ProviderStats(
+                provider, CircuitBreaker(provider, **self._breaker_settings)
+            )
+        return stats
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait for `provider` before hedging."""
+        delay = self.stats(provider).percentile(self.hedge_percentile)
+        return self.initial_hedge_delay if delay is None else delay
+
+    def available(self, models: list[BaseLlm]) -> list[BaseLlm]:
+        """`models` whose breaker lets a request through, in order; all of
+        them when every breaker is open (better a likely failure than none)."""
+        allowed = [model for model in models if self.stats(model.model).breaker.allow()]
+        return allowed or list(models)
+
+
+_POOL: ProviderPool | None = None
+
+
+def provider_pool() -> ProviderPool:
+    """The process-wide pool, built from the environment on first use."""
+    global _POOL
+    if _POOL is None:
+        _POOL = ProviderPool.from_env()
+    return _POOL
+
+
+def response_text(responses: list[LlmResponse]) -> str:
+    return "".join(
+        part.text
+        for response in responses
+        if response.content and response.content.parts
+        for part in response.content.parts
+        if part.text and not part.thought
+    )
+
+
+# custom_metadata key of the partial response HedgedLlm sends when a reply
+# that was partly streamed is replaced by another provider's: the caller
+# drops what it received so far.
+STREAM_RESTART = "streamRestart"
+
+
+def _restart_response() -> LlmResponse:
+    # Empty content rather than none: ADK drops responses without content.
+    return LlmResponse(
+        partial=True, content=types.Content(role="model", parts=[]), custom_metadata={STREAM_RESTART: True}
+    )
+
+
+class _Attempt:
+    """One provider request of a hedged call."""
+
+    def __init__(self, model: BaseLlm):
+        self.model = model
+        self.task: asyncio.Task | None = None
+        self.partials: list[LlmResponse] = []
+        self.done = False
+
+
+class HedgedLlm(BaseLlm):
+    """BaseLlm over an ordered list of provider models (primary first).
+
+    `usable(text)` decides whether a complete reply is usable; an invalid
+    reply counts as a failed attempt, but is still returned when no provider
+    does better.
+    """
+
+    models: list[BaseLlm]
+    usable: Callable[[str], bool] | None = None
+    pool: Any = None
+
+    @classmethod
+    def from_env(
+        cls,
+        model_name: str,
+        factory: Callable[[str], BaseLlm],
+        usable: Callable[[str], bool] | None = None,
+    ) -> BaseLlm:
+        """`factory(model_name)`, hedged with the LLM_FALLBACK_MODELS whose API
+        key is set; the plain model when there are none."""
+        names = [model_name]
+        for name in os.getenv("LLM_FALLBACK_MODELS", "").split(","):
+            name = name.strip()
+            if not name or name in names:
+                continue
+            reason = missing_api_key(name)
+            if reason:
+                logger.warning(f"Skipping fallback model: {reason}")
+                continue
+            names.append(name)
+        if len(names) == 1:
+            return factory(model_name)
+        logger.info(f"Provider pool for {model_name}: {', '.join(names)}")
+        return cls(model=model_name, models=[factory(name) for name in names], usable=usable)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        pool = self.pool or provider_pool()
+        candidates = pool.available(self.models)
+        events: asyncio.Queue = asyncio.Queue()
+        attempts: list[_Attempt] = []
+        # The attempt streaming to the caller live, if any; partials of the
+        # others are held until their reply validates.
+        live: _Attempt | None = None
+        fallback: list[LlmResponse] | None = None
+        error: Exception | None = None
+
+        def launch(outcome: str | None) -> None:
+            attempt = _Attempt(candidates[len(attempts)])
+            request = llm_request.model_copy(deep=True)
+            request.model = attempt.model.model
+            if request.config and not structured_output_enabled(attempt.model.model):
+                request.config.response_schema = None
+                request.config.response_mime_type = None
+            pool.stats(attempt.model.model).breaker.start()
+            attempt.task = asyncio.create_task(self._run(attempt, request, stream, pool, events))
+            attempts.append(attempt)
+            if outcome:
+                HEDGES.inc(outcome=outcome)
+                logger.info(f"{outcome.capitalize()} request to {attempt.model.model}")
+
+        launch(None)
+        hedge_at = None
+        if pool.hedge and len(candidates) > 1:
+            hedge_at = time.monotonic() + pool.hedge_delay(candidates[0].model)
+        try:
+            while True:
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                try:
+                    kind, attempt, payload = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    hedge_at = None
+                    if len(attempts) < len(candidates):
+                        launch("hedge")
+                    continue
+
+                if kind == "partial":
+                    if live is None and all(other.done for other in attempts if other is not attempt):
+                        # The only request running streams to the caller;
+                        # no hedge is sent once it has started.
+                        live, hedge_at = attempt, None
+                    if attempt is live:
+                        yield payload
+                    else:
+                        attempt.partials.append(payload)
+                    continue
+
+                if kind == "final":
+                    if self.usable is None or self.usable(response_text(payload)):
+                        PROVIDER_REQUESTS.inc(provider=attempt.model.model, outcome="ok")
+                        if attempt is not attempts[0]:
+                            HEDGES.inc(outcome="won")
+                        if attempt is not live:
+                            if live is not None:
+                                yield _restart_response()
+                            for partial in attempt.partials:
+                                yield partial
+                        for response in payload:
+                            yield response
+                        return
+                    PROVIDER_REQUESTS.inc(provider=attempt.model.model, outcome="invalid")
+                    logger.warning(f"Invalid reply from {attempt.model.model}")
+                    fallback = fallback or payload
+                else:
+                    error = payload
+                    if attempt is live:
+                        # Part of the reply is out; the caller retries.
+                        raise payload
+
+                # The attempt failed: wait for the others, or fail over.
+                if any(not other.done for other in attempts):
+                    continue
+                if len(attempts) < len(candidates):
+                    hedge_at = None
+                    launch("failover")
+                    continue
+                if fallback is not None:
+                    if live is None:
+                        for partial in attempt.partials:
+                            yield partial
+                    for response in fallback:
+                        yield response
+                    return
+                raise error
+        finally:
+            for attempt in attempts:
+                if not attempt.done:
+                    PROVIDER_REQUESTS.inc(provider=attempt.model.model, outcome="canceled")
+                    pool.stats(attempt.model.model).breaker.cancel()
+                    attempt.task.cancel()
+            await asyncio.gather(*(a.task for a in attempts), return_exceptions=True)
+
+    async def _run(
+        self, attempt: _Attempt, request: LlmRequest, stream: bool, pool: ProviderPool, events: asyncio.Queue
+    ) -> None:
+        """Forward one provider's responses as ("partial" | "final" | "error",
+        attempt, payload) events."""
+        stats = pool.stats(attempt.model.model)
+        start = time.monotonic()
+        first = True
+        final: list[LlmResponse] = []
+        try:
+            async with aclosing(attempt.model.generate_content_async(request, stream=stream)) as responses:
+                async for response in responses:
+                    if first:
+                        first = False
+                        stats.observe(time.monotonic() - start)
+                    if response.partial:
+                        events.put_nowait(("partial", attempt, response))
+                    else:
+                        final.append(response)
+        except Exception as e:
+            attempt.done = True
+            logger.warning(f"Provider {attempt.model.model} failed: {e}")
+            PROVIDER_REQUESTS.inc(provider=attempt.model.model, outcome="error")
+            stats.breaker.record(False)
+            events.put_nowait(("error", attempt, e))
+            return
+        attempt.done = True
+        stats.breaker.record(True)
+        events.put_nowait(("final", attempt, final))
@@ -0,0 +1,110 @@
+# Response Cache
+# Exact-match cache for UI actions. A button click by the same user with the
+# same action name and context, answered by the same agent mode and prompt,
+# produces the same rendered envelope, so a repeated click is served from
+# memory instead of spending another LLM call. Replies can hold the user's
+# own data, so entries are never shared between users.
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "ui_builder_response_cache_requests_total",
+    "Response cache lookups, by result.",
+    ("result",),
+)
+
+
+def cache_key(user: str, mode: str, action: str, context: Any, prompt_version: str) -> str:
+    """Canonical hash of (user, agent mode, action name, action context,
+    prompt version).
+
+    The context is serialized with sorted keys and no whitespace, so two
+    clicks with the same data hash the same regardless of key order.
+    """
+    canonical = json.dumps(
+        [user, mode, action, context, prompt_version],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of agent responses with a total size cap in bytes."""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: float = 600.0,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, value)
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "rejected": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Build from RESPONSE_CACHE (opt-in), RESPONSE_CACHE_MAX_COUNT,
+        RESPONSE_CACHE_TTL and RESPONSE_CACHE_MAX_BYTES; None when disabled."""
+        if os.getenv("RESPONSE_CACHE", "false").lower() != "true":
+            return None
+        return cls(
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_COUNT", "1000")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "600")),
+            max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._drop(key)
+            self.stats["expired"] += 1
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            CACHE_REQUESTS.inc(result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        CACHE_REQUESTS.inc(result="hit")
+        return entry[2]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """Store `value`, accounted as `size` bytes."""
+        if size > self.max_bytes:
+            self.stats["rejected"] += 1
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.stats["evicted"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
@@ -0,0 +1,196 @@
+# Turn Scheduler
+# Admission control around the LLM: one turn at a time per conversation,
+# a global cap on in-flight LLM turns, and a bounded wait queue served
+# round-robin per user, so one busy client cannot starve the others. A turn
+# whose expected (or actual) queue wait exceeds the deadline is shed and
+# answered with a short "busy" reply instead of piling up.
+#
+# Admission state is per process; with --workers each worker admits its own
+# share. Turn order per conversation also holds across workers, through a
+# lease in the shared session database.
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "ui_builder_llm_queue_depth",
+    "Turns waiting for an LLM slot.",
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "ui_builder_llm_in_flight",
+    "Turns holding an LLM slot.",
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "ui_builder_llm_queue_wait_seconds",
+    "Time admitted turns waited for an LLM slot.",
+)
+SHED = REGISTRY.counter(
+    "ui_builder_llm_shed_total",
+    "Turns answered with a busy reply instead of reaching the LLM.",
+    ("reason",),
+)
+
+BUSY_MESSAGE = "I'm handling a lot of requests right now. Please try again in a moment."
+
+
+class SchedulerBusy(Exception):
+    """Raised when a turn is shed; `reason` is queue_full or deadline."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TurnScheduler:
+    """Per-session serialization plus a fair, bounded LLM admission queue.
+
+    `max_concurrent` turns may hold an LLM slot at once. Up to `max_queue`
+    more wait; when a slot frees, it goes to the next user in round-robin
+    order (first come, first served within a user). A turn is shed at once
+    when the queue is full or its estimated wait (queue position times the
+    average slot hold time) exceeds `deadline` seconds, and while waiting
+    when the deadline actually passes.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 64, deadline: float = 15.0, leases=None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.deadline = deadline
+        self._in_flight = 0
+        # user -> waiters; the front user is served next, then moves back.
+        self._queues: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._waiting = 0
+        # Moving average of how long a turn holds its slot (None until known).
+        self._hold_time: float | None = None
+        # session -> [lock, turns holding or waiting for it]
+        self._sessions: dict[str, list] = {}
+        # session_store.SessionLeases when sessions are shared by workers.
+        self._leases = leases
+
+    @classmethod
+    def from_env(cls) -> "TurnScheduler":
+        """Build from LLM_MAX_CONCURRENCY, LLM_QUEUE_SIZE and LLM_QUEUE_DEADLINE;
+        with SESSION_SHARED, turns also take a lease in SESSION_DB_PATH."""
+        leases = None
+        if os.getenv("SESSION_SHARED", "false").lower() == "true" and os.getenv("SESSION_DB_PATH"):
+            from session_store import SessionLeases
+            leases = SessionLeases(os.environ["SESSION_DB_PATH"])
+        return cls(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("LLM_QUEUE_SIZE", "64")),
+            deadline=float(os.getenv("LLM_QUEUE_DEADLINE", "15")),
+            leases=leases,
+        )
+
+    @asynccontextmanager
+    async def session(self, session_id: str):
+        """Run the with-block alone among turns of the same session, in
+        every worker."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                if self._leases is None:
+                    yield
+                else:
+                    async with self._leases.hold(session_id):
+                        yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._sessions[session_id]
+
+    @asynccontextmanager
+    async def llm_slot(self, user_id: str):
+        """Hold one of the global LLM slots; raises SchedulerBusy when shed."""
+        start = time.monotonic()
+        await self._acquire(user_id)
+        admitted = time.monotonic()
+        QUEUE_WAIT_SECONDS.observe(admitted - start)
+        try:
+            yield
+        finally:
+            held = time.monotonic() - admitted
+            self._hold_time = held if self._hold_time is None else 0.8 * self._hold_time + 0.2 * held
+            self._release()
+
+    def estimated_wait(self) -> float:
+        """Seconds a turn arriving now would wait for a slot."""
+        if self._in_flight < self.max_concurrent and not self._waiting:
+            return 0.0
+        rounds = math.ceil((self._waiting + 1) / self.max_concurrent)
+        return rounds * (self._hold_time or 0.0)
+
+    async def _acquire(self, user_id: str) -> None:
+        if self._in_flight < self.max_concurrent and not self._waiting:
+            self._in_flight += 1
+            IN_FLIGHT.set(self._in_flight)
+            return
+        if self._waiting >= self.max_queue:
+            self._shed("queue_full")
+        if self.estimated_wait() > self.deadline:
+            self._shed("deadline")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user_id, deque()).append(future)
+        self._waiting += 1
+        QUEUE_DEPTH.set(self._waiting)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # The slot was handed over just as the wait ended.
+                if isinstance(e, asyncio.CancelledError):
+                    self._release()
+                    raise
+                return
+            self._forget(user_id, future)
+            future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._shed("deadline")
+
+    def _release(self) -> None:
+        """Hand the freed slot to the next user in turn, or give it back."""
+        while self._queues:
+            user_id, waiters = next(iter(self._queues.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            self._waiting -= 1
+            QUEUE_DEPTH.set(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+        IN_FLIGHT.set(self._in_flight)
+
+    def _forget(self, user_id: str, future: asyncio.Future) -> None:
+        waiters = self._queues.get(user_id)
+        if waiters is None or future not in waiters:
+            return
+        waiters.remove(future)
+        if not waiters:
+            del self._queues[user_id]
+        self._waiting -= 1
+        QUEUE_DEPTH.set(self._waiting)
+
+    def _shed(self, reason: str) -> None:
+        logger.warning(
+            f"Shedding turn ({reason}): {self._in_flight} in flight, {self._waiting} queued"
+        )
+        SHED.inc(reason=reason)
+        raise SchedulerBusy(reason)
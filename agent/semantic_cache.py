@@ -0,0 +1,294 @@
+# Semantic Response Cache
+# Serves template responses for free-text queries that are near-duplicates of
+# an earlier one ("show me auto policies" / "show me the auto policies") in
+# the same scope (see agent_executor for what the scope is made of).
+# Queries are embedded locally with hashed character n-grams and words, kept
+# in a NumPy matrix, and matched by top-k cosine similarity. No network calls.
+#
+# Requires NumPy (`uv sync --extra semantic-cache`).
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_REQUESTS = REGISTRY.counter(
+    "ui_builder_semantic_cache_requests_total",
+    "Semantic cache lookups, by result.",
+    ("result",),
+)
+
+# Words with an apostrophe-t stay whole, so "don't" is not "don" and "t".
+_WORD_PATTERN = re.compile(r"\w+(?:'t)?")
+
+# Filler words that should not make two requests look different.
+STOPWORDS = frozenset(
+    "a an the i me we you is are be to of for and or in on at please can could would "
+    "do does show give some any all what which there have has want see need like get".split()
+)
+# Words that flip whose data or which data a request means ("my claims" /
+# "your claims", "with" / "without roadside assistance"). Two queries only
+# match when they have the same ones.
+MARKERS = frozenset(
+    "no not never none nor without except excluding cannot can't don't doesn't isn't aren't won't "
+    "my mine your yours our ours his her hers their theirs".split()
+)
+# Markers that make a query about the asker's own data.
+PERSONAL = frozenset("my mine our ours".split())
+# Words the insurance prompts use for the same thing.
+SYNONYMS = {"insurance": "policy", "plan": "policy"}
+
+
+def _stem(word: str) -> str:
+    """Plural to singular, so "policies" meets "policy"."""
+    if len(word) > 4:
+        if word.endswith("ies"):
+            return word[:-3] + "y"
+        if word.endswith("s") and not word.endswith("ss"):
+            return word[:-2] if word.endswith("es") else word[:-1]
+    return word
+
+
+def _words(text: str) -> tuple[set[str], tuple[str, ...]]:
+    """Normalized content words and the sorted marker words of a query."""
+    words, markers = set(), set()
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if word in MARKERS:
+            markers.add(word)
+        elif word not in STOPWORDS:
+            word = _stem(word)
+            words.add(SYNONYMS.get(word, word))
+    return words, tuple(sorted(markers))
+
+
+def _signed(vector: np.ndarray, feature: str, weight: float) -> None:
+    h = zlib.crc32(feature.encode("utf-8"))
+    vector[h % len(vector)] += weight if h & 0x80000000 else -weight
+
+
+def embed(text: str, dim: int = 512) -> np.ndarray:
+    """Unit-length hashed set of words and character trigrams.
+
+    Each feature is hashed (CRC32) to a signed slot, so the vector needs no
+    vocabulary and is stable across processes. Stopwords are dropped, words
+    are stemmed and counted once, and words weigh more than trigrams, so a
+    different content word ("auto" vs "home") moves the vector further than
+    a different filler word. Marker words weigh most and add no trigrams
+    ("with" and "without" share most of theirs).
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words, markers = _words(text)
+    for word in markers:
+        _signed(vector, f"#{word}", 4.0)
+    for word in words:
+        _signed(vector, word, 2.0)
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            _signed(vector, padded[i:i + 3], 1.0)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def _key(scope: str, markers: tuple[str, ...]) -> int:
+    """64-bit id of a scope and a set of marker words; entries only match
+    queries with the same one."""
+    digest = hashlib.blake2b(f"{scope}\x00{' '.join(markers)}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class _Partition:
+    """Vectors of the entries that share a key, one row each, and the cache
+    slots those rows belong to."""
+
+    __slots__ = ("vectors", "slots", "size")
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((4, dim), dtype=np.float32)
+        self.slots = np.zeros(4, dtype=np.int64)
+        self.size = 0
+
+    def add(self, slot: int, vector: np.ndarray) -> int:
+        if self.size == len(self.slots):
+            self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+            self.slots = np.concatenate([self.slots, np.zeros_like(self.slots)])
+        row = self.size
+        self.vectors[row] = vector
+        self.slots[row] = slot
+        self.size += 1
+        return row
+
+    def remove(self, row: int) -> int | None:
+        """Drop a row by moving the last one into it; returns the slot of the
+        moved row, if any."""
+        self.size -= 1
+        last = self.size
+        if row == last:
+            return None
+        self.vectors[row] = self.vectors[last]
+        self.slots[row] = self.slots[last]
+        return int(self.slots[row])
+
+
+class SemanticCache:
+    """Fixed-capacity vector index of (query embedding -> cached response).
+
+    - lookup() returns the best live entry among the top-k most similar
+      queries of the same scope and marker words, if its cosine similarity
+      is at least `threshold`. The scope is the caller's: who asks and for
+      what kind of reply (see agent_executor).
+    - Entries are indexed per scope and marker words, so a lookup only
+      scans the entries it could match.
+    - Entries older than `ttl` seconds are never served.
+    - When full, put() evicts expired entries first, then the entry with the
+      lowest hit rate (hits per second since it was stored).
+
+    Calls are blocking and thread-safe; async callers should go through
+    asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        threshold: float = 0.9,
+        ttl: float = 3600.0,
+        dim: int = 512,
+        top_k: int = 4,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dim = dim
+        self.top_k = top_k
+        # Per-slot arrays are allocated on demand, doubling up to max_entries.
+        self._created = np.zeros(0, dtype=np.float64)
+        self._hits = np.zeros(0, dtype=np.float64)
+        self._keys: list[Optional[int]] = []
+        self._rows: list[int] = []
+        self._words: list[Optional[frozenset]] = []
+        self._queries: list[Optional[str]] = []
+        self._values: list[Any] = []
+        self._size = 0
+        self._partitions: dict[int, _Partition] = {}
+        # (key, content words) -> slot: a query with the same words refreshes
+        # its entry instead of adding another.
+        self._exact: dict[tuple[int, frozenset], int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        """Build from SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_COUNT,
+        SEMANTIC_CACHE_TTL and SEMANTIC_CACHE_DIM."""
+        return cls(
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_COUNT", "10000")),
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+            dim=int(os.getenv("SEMANTIC_CACHE_DIM", "512")),
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def is_personal(query: str) -> bool:
+        """Whether a query asks about the asker's own data ("show my claims")."""
+        return not PERSONAL.isdisjoint(_words(query)[1])
+
+    def search(self, vector: np.ndarray, k: int, key: int) -> list[tuple[float, int]]:
+        """Top-k (similarity, slot) pairs among the entries with `key`, most
+        similar first."""
+        partition = self._partitions.get(key)
+        if partition is None:
+            return []
+        scores = partition.vectors[: partition.size] @ vector
+        k = min(k, partition.size)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(float(scores[i]), int(partition.slots[i])) for i in top]
+
+    def lookup(self, query: str, scope: str = "") -> Any:
+        vector = embed(query, self.dim)
+        key = _key(scope, _words(query)[1])
+        with self._lock:
+            now = time.monotonic()
+            for score, slot in self.search(vector, self.top_k, key):
+                if score < self.threshold:
+                    break
+                if now - self._created[slot] > self.ttl:
+                    continue
+                self._hits[slot] += 1
+                self.stats["hits"] += 1
+                SEMANTIC_CACHE_REQUESTS.inc(result="hit")
+                logger.info(f"Semantic cache hit ({score:.3f}): '{query}' ~ '{self._queries[slot]}'")
+                return self._values[slot]
+            self.stats["misses"] += 1
+        SEMANTIC_CACHE_REQUESTS.inc(result="miss")
+        return None
+
+    def put(self, query: str, value: Any, scope: str = "") -> None:
+        vector = embed(query, self.dim)
+        words, markers = _words(query)
+        key = _key(scope, markers)
+        words = frozenset(words)
+        with self._lock:
+            slot = self._exact.get((key, words))
+            if slot is None:
+                if self._size < self.max_entries:
+                    if self._size == len(self._created):
+                        self._grow()
+                    slot = self._size
+                    self._size += 1
+                else:
+                    slot = self._victim()
+                    self._remove(slot)
+                    self.stats["evicted"] += 1
+                partition = self._partitions.get(key)
+                if partition is None:
+                    partition = self._partitions[key] = _Partition(self.dim)
+                self._rows[slot] = partition.add(slot, vector)
+                self._keys[slot] = key
+                self._words[slot] = words
+                self._exact[(key, words)] = slot
+            else:
+                self._partitions[key].vectors[self._rows[slot]] = vector
+            self._created[slot] = time.monotonic()
+            self._hits[slot] = 0
+            self._queries[slot] = query
+            self._values[slot] = value
+
+    def _remove(self, slot: int) -> None:
+        """Take an evicted entry out of its partition."""
+        key = self._keys[slot]
+        partition = self._partitions[key]
+        moved = partition.remove(self._rows[slot])
+        if moved is not None:
+            self._rows[moved] = self._rows[slot]
+        if partition.size == 0:
+            del self._partitions[key]
+        del self._exact[(key, self._words[slot])]
+
+    def _grow(self) -> None:
+        capacity = min(self.max_entries, max(64, 2 * len(self._created)))
+        extra = capacity - len(self._created)
+        self._created = np.concatenate([self._created, np.zeros(extra)])
+        self._hits = np.concatenate([self._hits, np.zeros(extra)])
+        for column in (self._keys, self._rows, self._words, self._queries, self._values):
+            column.extend([None] * extra)
+
+    def _victim(self) -> int:
+        age = time.monotonic() - self._created[: self._size]
+        expired = np.flatnonzero(age > self.ttl)
+        if expired.size:
+            return int(expired[0])
+        # +1 smooths fresh entries, which have had no chance to be hit yet.
+        return int(np.argmin((self._hits[: self._size] + 1.0) / (age + 1.0)))
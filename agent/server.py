@@ -0,0 +1,133 @@
+# Generic UI Builder - ASGI Application
+# Builds the A2A Starlette app. By default startup.LazyApp builds it in the
+# background after the port is bound; with --eager-startup `uv run .` builds
+# it in-process, and in multi-worker mode every uvicorn worker imports this
+# module and calls create_app().
+
+import contextlib
+import json
+import logging
+import os
+import sys
+
+# Add lib directory to path for local a2ui module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
+
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+from a2ui.extension import get_a2ui_agent_extension
+from agent import UIBuilderAgent
+from agent_executor import UIBuilderAgentExecutor
+from dotenv import load_dotenv
+from http_pool import http_pool
+from starlette.applications import Starlette
+from metrics import CONTENT_TYPE, REGISTRY
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from startup import SERVER_CONFIG_ENV
+from task_store import build_task_store
+
+logger = logging.getLogger(__name__)
+
+
+def build_agent_card(base_url: str) -> AgentCard:
+    capabilities = AgentCapabilities(
+        streaming=True,
+        extensions=[get_a2ui_agent_extension()],
+    )
+
+    skill = AgentSkill(
+        id="build_ui",
+        name="Generic UI Builder",
+        description="Creates any type of UI from natural language descriptions using A2UI.",
+        tags=["ui", "builder", "generator", "a2ui"],
+        examples=[
+            "Create a welcome headline for Basta conference",
+            "Build a KPI dashboard with user metrics",
+            "Make a comparison table between Product A and Product B",
+            "Generate a contact form",
+            "Add a stepper for user onboarding",
+        ],
+    )
+
+    return AgentCard(
+        name="UI Builder Agent",
+        description="A generic UI builder that creates rich, interactive interfaces from natural language using A2UI. Perfect for demos of Generative Frontend / Server-Driven UI.",
+        url=base_url,
+        version="1.0.0",
+        default_input_modes=UIBuilderAgent.SUPPORTED_CONTENT_TYPES,
+        default_output_modes=UIBuilderAgent.SUPPORTED_CONTENT_TYPES,
+        capabilities=capabilities,
+        skills=[skill],
+    )
+
+
+def build_app(
+    host: str,
+    port: int,
+    task_store: str = "bounded",
+    task_db: str = "data/tasks.db",
+    task_max: int = 10000,
+    task_ttl: float = 3600.0,
+    model_factory=None,
+) -> Starlette:
+    """Build the Starlette app serving the UI Builder agent over A2A.
+
+    `model_factory` replaces the LiteLLM model (see UIBuilderAgent); the load
+    test uses it to plug in a local fake.
+    """
+    base_url = f"http://{host}:{port}"
+    agent_executor = UIBuilderAgentExecutor(model_factory=model_factory)
+
+    request_handler = DefaultRequestHandler(
+        agent_executor=agent_executor,
+        task_store=build_task_store(task_store, task_db, task_max, task_ttl),
+    )
+
+    server = A2AStarletteApplication(
+        agent_card=build_agent_card(base_url), http_handler=request_handler
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Open the LLM provider connections before the first turn needs them.
+        await http_pool().start()
+        yield
+        # Runs once uvicorn has drained in-flight requests (e.g. on SIGTERM).
+        logger.info("Shutting down: flushing agent state.")
+        await agent_executor.close()
+        await http_pool().close()
+
+    async def metrics(request: Request) -> Response:
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    async def ready(request: Request) -> Response:
+        # Built eagerly: serving means ready (startup.LazyApp answers it
+        # itself during the warm-up).
+        return JSONResponse({"ready": True, "error": None})
+
+    app = server.build(
+        lifespan=lifespan,
+        routes=[Route("/metrics", metrics, methods=["GET"]), Route("/ready", ready, methods=["GET"])],
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origin_regex=r"http://localhost:\d+",
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
+
+
+def create_app() -> Starlette:
+    """App factory for uvicorn workers; options come from SERVER_CONFIG_ENV."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    config = json.loads(os.environ[SERVER_CONFIG_ENV])
+    logger.info(f"Worker {os.getpid()} starting with {config}")
+    return build_app(**config)
@@ -0,0 +1,360 @@
+# Bounded Session Store
+# Drop-in replacement for ADK's InMemorySessionService that keeps memory flat:
+# sessions are evicted by LRU and idle TTL, oversized histories are trimmed,
+# and an optional SQLite write-behind backend lets evicted conversations be
+# reloaded from disk instead of lost.
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+from sqlite_util import SqliteDatabase
+
+logger = logging.getLogger(__name__)
+
+SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    namespace TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (namespace, app_name, user_id, session_id)
+);
+"""
+
+
+class SqliteSessionStore:
+    """On-disk copy of sessions, one JSON row per session.
+
+    `namespace` keeps agents that share a database file (UI and text agent)
+    from overwriting each other's history for the same session id.
+    """
+
+    def __init__(self, path: str, namespace: str = "default"):
+        self.namespace = namespace
+        self._db = SqliteDatabase(path, SESSION_SCHEMA)
+
+    def save(self, rows: list[tuple[str, str, str, float, str]]) -> None:
+        """rows: (app_name, user_id, session_id, update_time, session_json)."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+            [(self.namespace, *row) for row in rows],
+        )
+
+    def load(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        rows = self._db.execute(
+            "SELECT data FROM sessions WHERE namespace = ? AND app_name = ? "
+            "AND user_id = ? AND session_id = ?",
+            (self.namespace, app_name, user_id, session_id),
+        )
+        return Session.model_validate_json(rows[0][0]) if rows else None
+
+    def delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        self._db.execute(
+            "DELETE FROM sessions WHERE namespace = ? AND app_name = ? "
+            "AND user_id = ? AND session_id = ?",
+            (self.namespace, app_name, user_id, session_id),
+        )
+
+    def close(self) -> None:
+        self._db.close()
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_leases (
+    session_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SessionLeases:
+    """Turn lock per session shared by the worker processes, kept in the
+    shared session database.
+
+    Shared sessions are written back whole after each event, so two workers
+    running turns of one session at once would overwrite each other's
+    events. A worker holds the session's lease for the whole turn; the
+    others poll until it is released. A lease that is not released (the
+    worker died) expires after `ttl` seconds.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0, poll_interval: float = 0.05):
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._db = SqliteDatabase(path, LEASE_SCHEMA)
+
+    def try_acquire(self, session_id: str, owner: str) -> bool:
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO session_leases VALUES (?, ?, ?) ON CONFLICT(session_id) "
+            "DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+            "WHERE session_leases.expires < ?",
+            (session_id, owner, now + self.ttl, now),
+        )
+        rows = self._db.execute("SELECT owner FROM session_leases WHERE session_id = ?", (session_id,))
+        return bool(rows) and rows[0][0] == owner
+
+    def release(self, session_id: str, owner: str) -> None:
+        self._db.execute("DELETE FROM session_leases WHERE session_id = ? AND owner = ?", (session_id, owner))
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        """Run the with-block holding the session's lease."""
+        owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        try:
+            while not await asyncio.to_thread(self.try_acquire, session_id, owner):
+                await asyncio.sleep(self.poll_interval)
+            yield
+        finally:
+            await asyncio.to_thread(self.release, session_id, owner)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class BoundedSessionService(InMemorySessionService):
+    """InMemorySessionService with LRU + idle-TTL eviction and size caps.
+
+    - At most `max_sessions` sessions are held in memory; the least recently
+      used one is evicted first.
+    - Sessions untouched for `idle_ttl` seconds are evicted.
+    - A session's history is trimmed (oldest events first) once its events
+      exceed `max_session_bytes` of serialized JSON.
+    - With a `store`, changed sessions are written behind every
+      `flush_interval` seconds and on eviction, and a session missing from
+      memory is reloaded from the store on the next get_session.
+    - With `shared=True` the store is the source of truth for several
+      processes: every change is written through immediately and
+      get_session always reloads, so any worker can continue any session.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_ttl: float = 1800.0,
+        max_session_bytes: int = 256 * 1024,
+        store: Optional[SqliteSessionStore] = None,
+        flush_interval: float = 2.0,
+        shared: bool = False,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_session_bytes = max_session_bytes
+        self.store = store
+        self.flush_interval = flush_interval
+        self.shared = shared and store is not None
+        self._lru: OrderedDict[tuple[str, str, str], float] = OrderedDict()
+        self._event_sizes: dict[tuple[str, str, str], deque[int]] = {}
+        self._bytes: dict[tuple[str, str, str], int] = {}
+        self._dirty: set[tuple[str, str, str]] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "evicted_lru": 0,
+            "evicted_idle": 0,
+            "trimmed_events": 0,
+            "reloaded": 0,
+            "flushed": 0,
+        }
+
+    @classmethod
+    def from_env(cls, namespace: str = "default") -> "BoundedSessionService":
+        """Build from SESSION_MAX_COUNT, SESSION_IDLE_TTL, SESSION_MAX_BYTES,
+        SESSION_DB_PATH (enables the SQLite backend when set) and
+        SESSION_SHARED (write-through for multi-worker mode)."""
+        db_path = os.getenv("SESSION_DB_PATH")
+        return cls(
+            max_sessions=int(os.getenv("SESSION_MAX_COUNT", "1000")),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+            max_session_bytes=int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024))),
+            store=SqliteSessionStore(db_path, namespace) if db_path else None,
+            shared=os.getenv("SESSION_SHARED", "false").lower() == "true",
+        )
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    # ── Session service API ──
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        await self._evict_idle()
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        self._event_sizes[key] = deque()
+        self._bytes[key] = 0
+        self._touch(key)
+        if self.shared:
+            await self.flush()
+        await self._enforce_capacity()
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._evict_idle()
+        key = (app_name, user_id, session_id)
+        if self.store is not None and (self.shared or key not in self._lru):
+            await self._reload(key)
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch(key, dirty=False)
+        return session
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        key = (app_name, user_id, session_id)
+        self._forget(key)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.delete, *key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        if event.partial or key not in self._lru:
+            return event
+        self._touch(key)
+        size = len(event.model_dump_json(exclude_none=True))
+        self._event_sizes[key].append(size)
+        self._bytes[key] += size
+        if self._bytes[key] > self.max_session_bytes:
+            self._trim(key)
+        if self.shared:
+            await self.flush()
+        return event
+
+    # ── Write-behind ──
+
+    async def flush(self) -> None:
+        """Write every changed session to the store."""
+        if self.store is None or not self._dirty:
+            return
+        rows = []
+        for key in list(self._dirty):
+            session = self._stored(key)
+            if session is not None:
+                rows.append((*key, session.last_update_time, session.model_dump_json()))
+        self._dirty.clear()
+        if rows:
+            await asyncio.to_thread(self.store.save, rows)
+            self.stats["flushed"] += len(rows)
+
+    async def close(self) -> None:
+        """Stop the write-behind task and flush what is still pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Session write-behind failed: {e}")
+
+    # ── Internals ──
+
+    def _stored(self, key) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _touch(self, key, dirty: bool = True):
+        self._lru[key] = time.monotonic()
+        self._lru.move_to_end(key)
+        if dirty and self.store is not None:
+            self._dirty.add(key)
+            if self.shared:
+                return
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def _forget(self, key):
+        self._lru.pop(key, None)
+        self._event_sizes.pop(key, None)
+        self._bytes.pop(key, None)
+        self._dirty.discard(key)
+
+    def _trim(self, key):
+        session = self._stored(key)
+        sizes = self._event_sizes[key]
+        dropped = 0
+        # Always keep the latest event so the conversation keeps its tail.
+        while self._bytes[key] > self.max_session_bytes and len(session.events) > 1:
+            session.events.pop(0)
+            self._bytes[key] -= sizes.popleft()
+            dropped += 1
+        self.stats["trimmed_events"] += dropped
+        logger.info(f"Trimmed {dropped} old events from session {key[2]}")
+
+    async def _evict(self, key, reason: str):
+        app_name, user_id, session_id = key
+        users = self.sessions.get(app_name, {})
+        session = users.get(user_id, {}).pop(session_id, None)
+        if user_id in users and not users[user_id]:
+            del users[user_id]
+        if session is not None and self.store is not None and key in self._dirty:
+            row = (*key, session.last_update_time, session.model_dump_json())
+            await asyncio.to_thread(self.store.save, [row])
+        self._forget(key)
+        self.stats[f"evicted_{reason}"] += 1
+        logger.info(f"Evicted session {session_id} ({reason})")
+
+    async def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_ttl
+        # The LRU is ordered by last access, so expired sessions are at the front.
+        while self._lru:
+            key, last_access = next(iter(self._lru.items()))
+            if last_access > deadline:
+                break
+            await self._evict(key, "idle")
+
+    async def _enforce_capacity(self):
+        while len(self._lru) > self.max_sessions:
+            await self._evict(next(iter(self._lru)), "lru")
+
+    async def _reload(self, key):
+        session = await asyncio.to_thread(self.store.load, *key)
+        if session is None:
+            return
+        app_name, user_id, session_id = key
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+        sizes = deque(len(e.model_dump_json(exclude_none=True)) for e in session.events)
+        self._event_sizes[key] = sizes
+        self._bytes[key] = sum(sizes)
+        self._touch(key, dirty=False)
+        self.stats["reloaded"] += 1
+        logger.info(f"Reloaded session {session_id} from disk")
+        await self._enforce_capacity()
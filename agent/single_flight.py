@@ -0,0 +1,95 @@
+# Single-Flight Requests
+# Coalesces duplicate requests of one conversation: the same A2A message
+# resent on retry, or the same action clicked twice. The first request
+# (the leader) runs the turn; duplicates arriving while it runs await its
+# final parts, and duplicates arriving shortly after replay them, instead of
+# starting another LLM generation.
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+DUPLICATE_REQUESTS = REGISTRY.counter(
+    "ui_builder_duplicate_requests_total",
+    "Duplicate requests answered with another request's final parts.",
+    ("outcome",),
+)
+
+
+def flight_key(context_id: str, message_id: str | None, action: dict | None, extra: dict) -> str:
+    """Hash of the conversation and either the canonical action payload or
+    the message id; `extra` carries whatever else changes the reply
+    (extension activation, rendering options)."""
+    if action is not None:
+        identity = ["action", action]
+    else:
+        identity = ["message", message_id]
+    payload = json.dumps(
+        [context_id, identity, extra], sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """In-flight turns by key, plus a short replay window of final parts."""
+
+    def __init__(self, replay_ttl: float = 10.0, max_count: int = 1000):
+        self.replay_ttl = replay_ttl
+        self.max_count = max_count
+        self._in_flight: dict[str, asyncio.Future] = {}
+        # key -> (expires_at, final parts), oldest first.
+        self._replay: OrderedDict[str, tuple[float, list]] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        """Build from DEDUP_REPLAY_TTL and DEDUP_REPLAY_MAX_COUNT."""
+        return cls(
+            replay_ttl=float(os.getenv("DEDUP_REPLAY_TTL", "10")),
+            max_count=int(os.getenv("DEDUP_REPLAY_MAX_COUNT", "1000")),
+        )
+
+    async def join(self, key: str) -> list | None:
+        """Final parts of an identical request, or None to run this one.
+
+        When None is returned the caller is the leader and must call
+        `finish(key, parts)` once its turn is over, even if it failed.
+        """
+        now = time.monotonic()
+        stored = self._replay.get(key)
+        if stored is not None:
+            if stored[0] > now:
+                DUPLICATE_REQUESTS.inc(outcome="replayed")
+                return stored[1]
+            del self._replay[key]
+
+        while True:
+            leader = self._in_flight.get(key)
+            if leader is None:
+                self._in_flight[key] = asyncio.get_running_loop().create_future()
+                return None
+            parts = await asyncio.shield(leader)
+            if parts is not None:
+                DUPLICATE_REQUESTS.inc(outcome="coalesced")
+                return parts
+            # The leader produced nothing reusable: lead (or follow) again.
+
+    def finish(self, key: str, parts: list | None) -> None:
+        """Release the followers of `key` and keep `parts` for replay."""
+        leader = self._in_flight.pop(key, None)
+        if leader is not None and not leader.done():
+            leader.set_result(parts)
+        if parts is None or self.replay_ttl <= 0:
+            return
+        now = time.monotonic()
+        self._replay[key] = (now + self.replay_ttl, parts)
+        self._replay.move_to_end(key)
+        while self._replay:
+            oldest_key, (expires_at, _) = next(iter(self._replay.items()))
+            if expires_at > now and len(self._replay) <= self.max_count:
+                break
+            del self._replay[oldest_key]
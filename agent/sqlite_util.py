@@ -0,0 +1,44 @@
+# SQLite helpers shared by the on-disk stores (sessions, tasks).
+
+import os
+import sqlite3
+import threading
+
+
+class SqliteDatabase:
+    """A single SQLite connection guarded by a lock.
+
+    The connection is opened in WAL mode so readers never block the writer,
+    which also makes the same file safe to share between processes.
+    Calls are blocking; async callers should go through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str, schema: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        with self._lock:
+            self._conn.executescript(schema)
+
+    def execute(self, sql: str, params=()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql: str, rows) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,136 @@
+# Lazy Startup
+# The ASGI app uvicorn serves first. It imports nothing heavy, so the port is
+# bound at once; google-adk, a2a, the agents and LiteLLM are loaded, and the
+# LLM provider connections opened (http_pool), by a background warm-up task.
+# GET /ready answers 503 until the warm-up is done and 200 after; other
+# requests wait for it and are then served by the A2A app from
+# server.build_app().
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import AsyncExitStack
+
+from metrics import CONTENT_TYPE, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Environment variable carrying the server options to uvicorn worker processes.
+SERVER_CONFIG_ENV = "UI_BUILDER_SERVER_CONFIG"
+
+# Reference point for time-to-ready: this module loads first at startup.
+_LOADED_AT = time.monotonic()
+
+STARTUP_SECONDS = REGISTRY.histogram(
+    "ui_builder_startup_seconds",
+    "Startup phases: build (imports and agents), warm (app startup: LLM provider connections) and ready (since the server module loaded).",
+    ("phase",),
+)
+READY = REGISTRY.gauge(
+    "ui_builder_ready",
+    "1 once the warm-up is done and requests are served.",
+)
+
+
+def _build(config: dict):
+    """Import the A2A stack (LiteLLM with it) and build the app (runs in a thread)."""
+    start = time.monotonic()
+    from server import build_app
+
+    app = build_app(**config)
+    STARTUP_SECONDS.observe(time.monotonic() - start, phase="build")
+    return app
+
+
+async def _send_json(send, status: int, body: dict) -> None:
+    payload = json.dumps(body).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+class LazyApp:
+    """ASGI app that serves /ready and /metrics at once and everything else
+    through the app built by the warm-up, once it exists.
+
+    The built app's own lifespan (state flushing on shutdown) is run inside
+    this one's.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self._app = None
+        self._error: str | None = None
+        self._ready = asyncio.Event()
+        self._warm_up: asyncio.Task | None = None
+        self._exit_stack = AsyncExitStack()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        path = scope.get("path")
+        if scope["type"] == "http" and path == "/ready":
+            status = 200 if self._app is not None else 503
+            await _send_json(send, status, {"ready": self._app is not None, "error": self._error})
+            return
+        if scope["type"] == "http" and path == "/metrics":
+            payload = REGISTRY.render().encode("utf-8")
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", CONTENT_TYPE.encode())]})
+            await send({"type": "http.response.body", "body": payload})
+            return
+        # Requests that arrive during the warm-up wait for it.
+        await self._ready.wait()
+        if self._app is None:
+            await _send_json(send, 503, {"error": f"Startup failed: {self._error}"})
+            return
+        await self._app(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        await receive()  # lifespan.startup
+        self._warm_up = asyncio.create_task(self._start())
+        await send({"type": "lifespan.startup.complete"})
+        await receive()  # lifespan.shutdown
+        try:
+            await self._warm_up
+            await self._exit_stack.aclose()
+        except Exception as e:
+            logger.exception("Shutdown failed")
+            await send({"type": "lifespan.shutdown.failed", "message": str(e)})
+            return
+        await send({"type": "lifespan.shutdown.complete"})
+
+    async def _start(self) -> None:
+        try:
+            app = await asyncio.to_thread(_build, self.config)
+            # The app's startup opens the LLM provider connections.
+            start = time.monotonic()
+            await self._exit_stack.enter_async_context(app.router.lifespan_context(app))
+            STARTUP_SECONDS.observe(time.monotonic() - start, phase="warm")
+            self._app = app
+            READY.set(1)
+            ready = time.monotonic() - _LOADED_AT
+            STARTUP_SECONDS.observe(ready, phase="ready")
+            logger.info(f"Ready after {ready:.2f}s")
+        except Exception as e:
+            self._error = str(e)
+            logger.exception("Warm-up failed; requests are answered with 503")
+        finally:
+            self._ready.set()
+
+
+def create_app() -> LazyApp:
+    """App factory for uvicorn workers; options come from SERVER_CONFIG_ENV."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    config = json.loads(os.environ[SERVER_CONFIG_ENV])
+    logger.info(f"Worker {os.getpid()} starting with {config}")
+    return LazyApp(config)
@@ -0,0 +1,212 @@
+# Incremental Envelope Parser
+# Parses the {"message": ..., "template": ..., "data": ...} envelope while the
+# LLM is still streaming it, so the message text and the template data can be
+# used before the whole response has arrived.
+
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\r\n"
+
+
+class EnvelopeStreamParser:
+    """Character-level state machine over the top-level envelope object.
+
+    Feed it text chunks as they arrive; each call returns the events that
+    became available:
+
+    - ("message", delta): newly decoded characters of the "message" string
+    - ("template", name): the "template" string has closed
+    - ("data", obj): the "data" object has closed and parsed
+    - ("field", (key, value)): any other top-level field has closed
+
+    Anything before the first "{" (markdown fences, stray prose) is skipped.
+    Malformed values are ignored here; the caller still parses the complete
+    text once the final response arrives.
+
+    Each chunk is scanned once and only the text of the top-level key or
+    value still open is kept, as a list of chunk slices joined when it
+    closes, so feeding a long reply costs time linear in its length.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = None
+        self._surrogate = ""
+        self._expect = "key"
+        self._key = None
+        # Earlier chunks' text of the open top-level token (None when none
+        # is open) and where it starts in the current chunk.
+        self._token_parts: list[str] | None = None
+        self._token_from = 0
+        self._delta = []
+        self.fields: dict[str, Any] = {}
+        self.message = ""
+
+    @property
+    def template(self) -> str | None:
+        value = self.fields.get("template")
+        return value if isinstance(value, str) else None
+
+    @property
+    def data(self) -> dict | None:
+        value = self.fields.get("data")
+        return value if isinstance(value, dict) else None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consume a chunk of raw LLM text and return the new events."""
+        events: list[tuple[str, Any]] = []
+        if self._done or not chunk:
+            return events
+        text = chunk
+        i = 0
+        n = len(text)
+        self._token_from = 0
+
+        while i < n and not self._done:
+            c = text[i]
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._expect = "key"
+                i += 1
+                continue
+
+            if self._in_string:
+                streaming = self._is_streaming_message()
+                if self._escape is not None:
+                    self._escape += c
+                    if self._escape[0] == "u" and len(self._escape) < 5:
+                        i += 1
+                        continue
+                    if streaming:
+                        self._decode_escape(self._escape)
+                    self._escape = None
+                elif c == "\\":
+                    self._escape = ""
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_string(text, i, events)
+                elif streaming:
+                    self._delta.append(c)
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect in ("key", "value"):
+                    self._open_token(i)
+            elif self._depth > 1:
+                if c in "{[":
+                    self._depth += 1
+                elif c in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._close_value(self._close_token(text, i + 1), events)
+            elif self._expect == "key":
+                if c == "}":
+                    self._done = True
+            elif self._expect == "colon":
+                if c == ":":
+                    self._expect = "value"
+            elif self._expect == "value":
+                if c in "{[":
+                    self._depth += 1
+                    self._open_token(i)
+                    self._expect = "nested"
+                elif c not in _WHITESPACE:
+                    self._open_token(i)
+                    self._expect = "scalar"
+            elif self._expect == "scalar":
+                if c in ",}":
+                    self._close_value(self._close_token(text, i).strip(), events)
+                    if c == "}":
+                        self._done = True
+            i += 1
+
+        if self._token_parts is not None:
+            self._token_parts.append(text[self._token_from:])
+        self._flush_delta(events)
+        return events
+
+    # ── Internals ──
+
+    def _open_token(self, start: int):
+        self._token_parts = []
+        self._token_from = start
+
+    def _close_token(self, chunk: str, end: int) -> str:
+        """The open token's text, ending at `end` in the current chunk."""
+        parts = self._token_parts or []
+        self._token_parts = None
+        return "".join(parts) + chunk[self._token_from:end]
+
+    def _is_streaming_message(self) -> bool:
+        return self._depth == 1 and self._expect == "value" and self._key == "message"
+
+    def _decode_escape(self, escape: str):
+        try:
+            decoded = json.loads(f'"\\{escape}"')
+        except json.JSONDecodeError:
+            return
+        if "\ud800" <= decoded <= "\udbff":
+            self._surrogate = escape
+            return
+        if self._surrogate and "\udc00" <= decoded <= "\udfff":
+            decoded = json.loads(f'"\\{self._surrogate}\\{escape}"')
+        self._surrogate = ""
+        self._delta.append(decoded)
+
+    def _close_string(self, chunk: str, end: int, events: list):
+        if self._expect not in ("key", "value"):
+            return
+        raw = self._close_token(chunk, end + 1)
+        if self._expect == "key":
+            try:
+                self._key = json.loads(raw)
+            except json.JSONDecodeError:
+                self._key = None
+            self._expect = "colon"
+        elif self._expect == "value":
+            self._close_value(raw, events)
+
+    def _close_value(self, raw: str, events: list):
+        key = self._key
+        self._key = None
+        self._expect = "key"
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Streamed field '{key}' is not valid JSON yet: {e}")
+            return
+        self.fields[key] = value
+        self._flush_delta(events)
+        if key == "message":
+            if isinstance(value, str):
+                self.message = value
+        elif key == "template":
+            events.append(("template", value))
+        elif key == "data":
+            events.append(("data", value))
+        else:
+            events.append(("field", (key, value)))
+
+    def _flush_delta(self, events: list):
+        if self._delta:
+            delta = "".join(self._delta)
+            self._delta = []
+            self.message += delta
+            events.append(("message", delta))
@@ -0,0 +1,172 @@
+# Progressive Surface Delivery
+# Splits a large surface render into ordered batches so a streaming client
+# can paint the top of the surface (root, title and the first cards) before
+# the rest has been serialized, sent and parsed. Later batches add the
+# remaining cards and re-send the containers whose children grew.
+#
+# Only useful for clients that read intermediate (working) updates; the
+# executor enables it per request (see README, "Progressive Delivery").
+
+import logging
+import os
+
+from a2ui_templates import _child_refs
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SURFACE_BATCHES = REGISTRY.counter(
+    "ui_builder_surface_batches_total",
+    "surfaceUpdate batches sent by progressive delivery.",
+)
+
+
+def _props(entry: dict) -> dict:
+    (props,) = entry["component"].values()
+    return props
+
+
+def _explicit_children(entry: dict) -> list | None:
+    children = _props(entry).get("children")
+    if isinstance(children, dict):
+        return children.get("explicitList")
+    return None
+
+
+def _with_children(entry: dict, children: list) -> dict:
+    """Copy of a container entry showing only `children` (original untouched)."""
+    (type_name, props), = entry["component"].items()
+    props = dict(props, children={"explicitList": children})
+    return {"id": entry["id"], "component": {type_name: props}}
+
+
+class SurfaceBatcher:
+    """Cuts surfaceUpdates larger than `batch_size` components into batches.
+
+    The render is walked from the root. Containers with an explicit child
+    list (Column, Row, List) are the spine; every other child is a unit
+    that travels whole, so no component ever references a child the client
+    has not received yet. The first batch ends after `first_cards` Card
+    units (or `batch_size` components); each following one after
+    `batch_size` components.
+    """
+
+    def __init__(self, batch_size: int = 100, first_cards: int = 3):
+        self.batch_size = max(1, batch_size)
+        self.first_cards = max(1, first_cards)
+
+    @classmethod
+    def from_env(cls) -> "SurfaceBatcher":
+        """Build from A2UI_BATCH_SIZE and A2UI_FIRST_CARDS."""
+        return cls(
+            batch_size=int(os.getenv("A2UI_BATCH_SIZE", "100")),
+            first_cards=int(os.getenv("A2UI_FIRST_CARDS", "3")),
+        )
+
+    def split(self, messages: list[dict]) -> list[list[dict]]:
+        """Ordered message lists; a single list when nothing needs batching.
+
+        Only a surface rendered with its beginRendering and exactly one
+        surfaceUpdate is split; the first batch also carries every other
+        message (beginRendering, dataModelUpdates, other surfaces).
+        """
+        roots = {}
+        updates = {}
+        for index, message in enumerate(messages):
+            if "beginRendering" in message:
+                body = message["beginRendering"]
+                roots[body.get("surfaceId")] = body.get("root")
+            elif "surfaceUpdate" in message:
+                surface_id = message["surfaceUpdate"].get("surfaceId")
+                # None: more than one surfaceUpdate, leave the surface alone.
+                updates[surface_id] = None if surface_id in updates else index
+
+        for surface_id, index in updates.items():
+            if index is None or surface_id not in roots:
+                continue
+            components = messages[index]["surfaceUpdate"].get("components", [])
+            if len(components) <= self.batch_size:
+                continue
+            batches = self._batches(components, roots[surface_id])
+            if len(batches) > 1:
+                logger.info(f"Progressive delivery: {len(components)} components in {len(batches)} batches")
+                SURFACE_BATCHES.inc(len(batches))
+                first = list(messages)
+                first[index] = {"surfaceUpdate": {"surfaceId": surface_id, "components": batches[0]}}
+                return [first] + [
+                    [{"surfaceUpdate": {"surfaceId": surface_id, "components": batch}}]
+                    for batch in batches[1:]
+                ]
+        return [messages]
+
+    def _batches(self, components: list[dict], root_id: str) -> list[list[dict]]:
+        by_id = {entry["id"]: entry for entry in components}
+        if root_id not in by_id:
+            return [components]
+
+        # Units in pre-order: (is_card, [entries]); spine containers alone.
+        units = []
+        spine = []
+        seen = set()
+        stack = [root_id]
+        while stack:
+            cid = stack.pop()
+            if cid in seen or cid not in by_id:
+                continue
+            entry = by_id[cid]
+            if _explicit_children(entry) is not None:
+                seen.add(cid)
+                spine.append(entry)
+                units.append((False, [entry]))
+                stack.extend(reversed(_explicit_children(entry)))
+                continue
+            subtree = []
+            pending = [cid]
+            while pending:
+                sub_id = pending.pop()
+                if sub_id in seen or sub_id not in by_id:
+                    continue
+                seen.add(sub_id)
+                subtree.append(by_id[sub_id])
+                pending.extend(container[key] for container, key in _child_refs(_props(by_id[sub_id])))
+            units.append(("Card" in entry["component"], subtree))
+        unreached = [entry for entry in components if entry["id"] not in seen]
+        if unreached:
+            units.append((False, unreached))
+
+        batches = [[]]
+        cards = 0
+        for is_card, unit in units:
+            batch = batches[-1]
+            batch.extend(unit)
+            cards += is_card
+            limit_reached = len(batch) >= self.batch_size
+            if len(batches) == 1 and cards >= self.first_cards:
+                limit_reached = True
+            if limit_reached:
+                batches.append([])
+        if not batches[-1]:
+            batches.pop()
+        if len(batches) == 1:
+            return batches
+
+        # Containers only list the children delivered so far, and are sent
+        # again whenever that list grows; the last batch restores them all.
+        delivered = set()
+        shown = {}
+        out = []
+        for batch in batches:
+            delivered.update(entry["id"] for entry in batch)
+            containers = []
+            for entry in spine:
+                if entry["id"] not in delivered:
+                    continue
+                children = _explicit_children(entry)
+                visible = [c for c in children if c in delivered]
+                if shown.get(entry["id"]) == visible:
+                    continue
+                shown[entry["id"]] = visible
+                containers.append(entry if len(visible) == len(children) else _with_children(entry, visible))
+            spine_ids = {entry["id"] for entry in containers}
+            out.append([entry for entry in batch if entry["id"] not in spine_ids] + containers)
+        return out
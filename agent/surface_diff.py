@@ -0,0 +1,219 @@
+# Surface Diff Engine
+# Keeps a per-session mirror of what each client surface already holds and
+# turns a freshly rendered set of A2UI messages into the smallest update:
+# only added or changed components, dataModelUpdates scoped to changed
+# paths, and beginRendering only when the root changes.
+#
+# Only valid for clients that keep their surfaces between turns; the
+# executor enables it per request (see README, "Surface Diffs").
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SURFACE_RENDERS = REGISTRY.counter(
+    "ui_builder_surface_renders_total",
+    "Surface renders sent to clients, by mode (full or diff).",
+    ("mode",),
+)
+SURFACE_BYTES = REGISTRY.counter(
+    "ui_builder_surface_bytes_total",
+    "A2UI payload bytes: 'full' as rendered, 'sent' after diffing.",
+    ("kind",),
+)
+
+_VALUE_KEYS = ("valueString", "valueNumber", "valueBoolean")
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _join(path: str, key: str) -> str:
+    if key == ".":
+        return path
+    return path.rstrip("/") + "/" + key
+
+
+def flatten_contents(path: str, contents: list[dict], out: dict[str, tuple]) -> None:
+    """Flatten dataModelUpdate contents into {leaf path: (value key, value)}.
+
+    Empty maps are kept as leaves so that the path still gets created.
+    """
+    for entry in contents:
+        entry_path = _join(path, entry["key"])
+        if "valueMap" in entry:
+            if entry["valueMap"]:
+                flatten_contents(entry_path, entry["valueMap"], out)
+            else:
+                out[entry_path] = ("valueMap", [])
+        else:
+            for value_key in _VALUE_KEYS:
+                if value_key in entry:
+                    out[entry_path] = (value_key, entry[value_key])
+                    break
+
+
+class _SurfaceState:
+    """What the client holds for one surface."""
+
+    __slots__ = ("begin", "components", "data")
+
+    def __init__(self):
+        self.begin: str | None = None
+        # id -> compact JSON of the component entry
+        self.components: dict[str, str] = {}
+        # leaf path -> (value key, value)
+        self.data: dict[str, tuple] = {}
+
+
+class _SurfaceRender:
+    """One surface's share of a freshly rendered message list."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+        self.begin: dict | None = None
+        self.components: list[tuple[str, dict, str]] = []  # (id, entry, json)
+        self.data_messages: list[dict] = []
+        self.data: dict[str, tuple] = {}
+        self.replaces_data = False
+        self.other: list[dict] = []
+
+
+class SurfaceDiffer:
+    """Per-session surface mirrors (LRU-bounded) and the diff between turns."""
+
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, dict[str, _SurfaceState]] = OrderedDict()
+        self.stats = {"full": 0, "diff": 0, "bytes_full": 0, "bytes_sent": 0}
+
+    @classmethod
+    def from_env(cls) -> "SurfaceDiffer":
+        """Build from SURFACE_DIFF_MAX_SESSIONS."""
+        return cls(max_sessions=int(os.getenv("SURFACE_DIFF_MAX_SESSIONS", "1000")))
+
+    def reset(self, session_id: str) -> None:
+        """Forget the mirror, e.g. when the client starts from a clean canvas."""
+        self._sessions.pop(session_id, None)
+
+    def diff(self, session_id: str, messages: list[dict], commit: bool = True) -> list[dict]:
+        """Return the messages the client still needs.
+
+        With `commit` the mirror is updated to the new render. Pass
+        commit=False for intermediate updates that a blocking (non-streaming)
+        client never receives.
+        """
+        surfaces = self._sessions.get(session_id)
+        if surfaces is None:
+            surfaces = {}
+            if commit:
+                self._sessions[session_id] = surfaces
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+
+        out = []
+        for surface_id, render in self._split(messages).items():
+            state = surfaces.get(surface_id)
+            if render.other:
+                # deleteSurface or unknown messages: start over for this surface.
+                surfaces.pop(surface_id, None)
+                state = None
+            full = render.messages
+            full_bytes = sum(len(_dumps(m)) for m in full)
+            sent, sent_bytes = full, full_bytes
+            if state is not None:
+                delta = self._delta(surface_id, state, render)
+                delta_bytes = sum(len(_dumps(m)) for m in delta)
+                # Fall back to the full render when the delta is not smaller.
+                if delta_bytes < full_bytes:
+                    sent, sent_bytes = delta, delta_bytes
+            if not commit:
+                out.extend(sent)
+                continue
+            if sent is full:
+                self.stats["full"] += 1
+                SURFACE_RENDERS.inc(mode="full")
+            else:
+                self.stats["diff"] += 1
+                SURFACE_RENDERS.inc(mode="diff")
+            self.stats["bytes_full"] += full_bytes
+            self.stats["bytes_sent"] += sent_bytes
+            SURFACE_BYTES.inc(full_bytes, kind="full")
+            SURFACE_BYTES.inc(sent_bytes, kind="sent")
+            if not render.other:
+                self._apply(surfaces.setdefault(surface_id, _SurfaceState()), render)
+            out.extend(sent)
+        if out and len(out) < len(messages):
+            logger.info(f"Surface diff: sending {len(out)} of {len(messages)} messages")
+        return out
+
+    # ── Internals ──
+
+    def _split(self, messages: list[dict]) -> dict[str, _SurfaceRender]:
+        renders: dict[str, _SurfaceRender] = {}
+        for message in messages:
+            if len(message) != 1:
+                raise ValueError("A2UI message must have exactly one action.")
+            (kind, body), = message.items()
+            render = renders.setdefault(body.get("surfaceId"), _SurfaceRender())
+            render.messages.append(message)
+            if kind == "beginRendering":
+                render.begin = message
+            elif kind == "surfaceUpdate":
+                for entry in body.get("components", []):
+                    render.components.append((entry["id"], entry, _dumps(entry)))
+            elif kind == "dataModelUpdate":
+                path = body.get("path") or "/"
+                if path == "/":
+                    render.replaces_data = True
+                    render.data.clear()
+                render.data_messages.append(message)
+                flatten_contents(path, body.get("contents", []), render.data)
+            else:
+                render.other.append(message)
+        return renders
+
+    def _delta(self, surface_id: str, state: _SurfaceState, render: _SurfaceRender) -> list[dict]:
+        out = []
+        if render.begin and _dumps(render.begin) != state.begin:
+            out.append(render.begin)
+        changed = [
+            entry for cid, entry, encoded in render.components
+            if state.components.get(cid) != encoded
+        ]
+        if changed:
+            out.append({"surfaceUpdate": {"surfaceId": surface_id, "components": changed}})
+        if render.data_messages:
+            removed = render.replaces_data and any(p not in render.data for p in state.data)
+            if removed:
+                # Paths cannot be deleted one by one; replace the whole model.
+                out.extend(render.data_messages)
+            else:
+                for path, (value_key, value) in render.data.items():
+                    if state.data.get(path) != (value_key, value):
+                        out.append({"dataModelUpdate": {
+                            "surfaceId": surface_id,
+                            "path": path,
+                            "contents": [{"key": ".", value_key: value}],
+                        }})
+        return out
+
+    @staticmethod
+    def _apply(state: _SurfaceState, render: _SurfaceRender) -> None:
+        if render.begin:
+            state.begin = _dumps(render.begin)
+        for cid, _, encoded in render.components:
+            state.components[cid] = encoded
+        if render.replaces_data:
+            state.data = dict(render.data)
+        else:
+            state.data.update(render.data)
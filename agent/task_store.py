@@ -0,0 +1,172 @@
+# Bounded Task Stores
+# Every UI Builder turn ends in TaskState.input_required with final=False, so
+# A2A tasks are never closed. These stores cap how many tasks are kept, evict
+# idle input_required (and terminal) tasks by age, and optionally keep tasks
+# on disk instead of in process memory.
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import Task, TaskState
+
+from sqlite_util import SqliteDatabase
+
+logger = logging.getLogger(__name__)
+
+# States in which a task is only waiting on the client and can be evicted by age.
+IDLE_STATES = frozenset({
+    TaskState.input_required,
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+})
+
+TASK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_time ON tasks (update_time);
+"""
+
+
+def _trim_history(task: Task, max_history: int) -> Task:
+    if max_history and task.history and len(task.history) > max_history:
+        task = task.model_copy(update={"history": task.history[-max_history:]})
+    return task
+
+
+class BoundedTaskStore(TaskStore):
+    """In-memory task store with a capacity limit and idle-age eviction.
+
+    - At most `max_tasks` tasks are kept; the least recently saved goes first.
+    - Tasks in an idle state (see IDLE_STATES) that have not been saved for
+      `idle_ttl` seconds are evicted.
+    - Each task keeps at most `max_history` messages of history.
+    """
+
+    def __init__(self, max_tasks: int = 10000, idle_ttl: float = 3600.0, max_history: int = 20):
+        self.max_tasks = max_tasks
+        self.idle_ttl = idle_ttl
+        self.max_history = max_history
+        self.tasks: OrderedDict[str, tuple[Task, float]] = OrderedDict()
+        self.lock = asyncio.Lock()
+        self.evicted = 0
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        async with self.lock:
+            self.tasks[task.id] = (_trim_history(task, self.max_history), time.monotonic())
+            self.tasks.move_to_end(task.id)
+            self._evict()
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        async with self.lock:
+            self._evict()
+            entry = self.tasks.get(task_id)
+            return entry[0] if entry else None
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        async with self.lock:
+            self.tasks.pop(task_id, None)
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def _evict(self):
+        while len(self.tasks) > self.max_tasks:
+            self.tasks.popitem(last=False)
+            self.evicted += 1
+        # Saves are appended at the end, so the front holds the oldest tasks.
+        deadline = time.monotonic() - self.idle_ttl
+        expired = []
+        for task_id, (task, saved_at) in self.tasks.items():
+            if saved_at > deadline:
+                break
+            if task.status.state in IDLE_STATES:
+                expired.append(task_id)
+        for task_id in expired:
+            del self.tasks[task_id]
+        self.evicted += len(expired)
+
+
+class SqliteTaskStore(TaskStore):
+    """Task store kept entirely in SQLite, so memory stays flat.
+
+    Applies the same limits as BoundedTaskStore: idle tasks older than
+    `idle_ttl` and tasks beyond `max_tasks` (oldest first) are purged at
+    most every `purge_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_tasks: int = 100000,
+        idle_ttl: float = 24 * 3600.0,
+        max_history: int = 20,
+        purge_interval: float = 60.0,
+    ):
+        self.max_tasks = max_tasks
+        self.idle_ttl = idle_ttl
+        self.max_history = max_history
+        self.purge_interval = purge_interval
+        self._db = SqliteDatabase(path, TASK_SCHEMA)
+        self._last_purge = 0.0
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        task = _trim_history(task, self.max_history)
+        row = (task.id, task.context_id, task.status.state.value, time.time(), task.model_dump_json())
+        await asyncio.to_thread(
+            self._db.execute, "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)", row
+        )
+        await self._maybe_purge()
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        rows = await asyncio.to_thread(
+            self._db.execute, "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+        )
+        return Task.model_validate_json(rows[0][0]) if rows else None
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        await asyncio.to_thread(self._db.execute, "DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    async def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        await asyncio.to_thread(self.purge, now)
+
+    def purge(self, now: float | None = None) -> None:
+        """Delete idle tasks past their TTL and anything beyond capacity."""
+        now = now or time.time()
+        idle_states = [state.value for state in IDLE_STATES]
+        placeholders = ", ".join("?" for _ in idle_states)
+        self._db.execute(
+            f"DELETE FROM tasks WHERE update_time < ? AND state IN ({placeholders})",
+            (now - self.idle_ttl, *idle_states),
+        )
+        self._db.execute(
+            "DELETE FROM tasks WHERE task_id IN (SELECT task_id FROM tasks "
+            "ORDER BY update_time DESC LIMIT -1 OFFSET ?)",
+            (self.max_tasks,),
+        )
+
+
+def build_task_store(kind: str, path: str, max_tasks: int, idle_ttl: float) -> TaskStore:
+    """Create the task store selected on the command line."""
+    if kind == "sqlite":
+        logger.info(f"Using SQLite task store at {path}")
+        return SqliteTaskStore(path, max_tasks=max_tasks, idle_ttl=idle_ttl)
+    if kind == "bounded":
+        logger.info(f"Using bounded in-memory task store (max {max_tasks} tasks)")
+        return BoundedTaskStore(max_tasks=max_tasks, idle_ttl=idle_ttl)
+    logger.info("Using unbounded in-memory task store")
+    return InMemoryTaskStore()
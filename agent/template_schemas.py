@@ -0,0 +1,203 @@
+# Template Data Schemas
+# The single typed definition of what each template's "data" looks like.
+# From it come the data descriptions in the template prompt, the envelope
+# schema handed to the provider as structured output (LiteLLM
+# response_format) where that is supported, and the local validation of
+# every reply before its template is rendered. Whatever the renderers fill
+# in when it is missing is optional here too, with the same default, so
+# validation never rejects a reply the templates would render.
+
+import os
+import types
+import typing
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, RootModel, create_model
+from pydantic.json_schema import SkipJsonSchema
+
+
+class PolicyOption(BaseModel):
+    name: str
+    price: float
+    features: list[str]
+    id: str | None = Field(None, description="optional, defaults to the name")
+
+
+class PolicyListData(BaseModel):
+    title: str
+    policies: list[PolicyOption]
+
+
+class PolicyDetailData(BaseModel):
+    name: str
+    type: str
+    price: float
+    period: Literal["month", "year"] = "month"
+    deductible: float | None = None
+    maxCoverage: str | None = Field(None, coerce_numbers_to_str=True)
+    coverages: list[str]
+    benefits: list[str] | None = None
+    actionLabel: str = "Activate this policy"
+    actionName: str = "activate_policy"
+    id: str = ""
+
+
+class ComparisonPlan(BaseModel):
+    name: str
+    price: float
+    period: Literal["month", "year"] = "month"
+    features: list[str]
+    highlighted: bool = False
+    id: str | None = Field(None, description="optional, defaults to the name")
+
+
+class ComparisonData(BaseModel):
+    title: str
+    plans: list[ComparisonPlan]
+
+
+class Kpi(BaseModel):
+    label: str
+    value: str = Field("—", coerce_numbers_to_str=True)
+    description: str | None = None
+
+
+class DashboardData(BaseModel):
+    title: str
+    kpis: list[Kpi]
+
+
+class FormField(BaseModel):
+    label: str
+    type: Literal["text", "email", "phone", "date", "textarea", "select"] = "text"
+    placeholder: str | None = None
+    options: list[str] | None = Field(None, description="only for select")
+
+
+class FormData(BaseModel):
+    title: str
+    description: str | None = None
+    fields: list[FormField]
+    submitLabel: str
+    submitAction: str
+
+
+class Detail(BaseModel):
+    label: str
+    value: str = Field(coerce_numbers_to_str=True)
+
+
+class InfoItem(BaseModel):
+    title: str
+    subtitle: str | None = None
+    status: str | None = None
+    details: list[Detail]
+    actionLabel: str | None = None
+    actionName: str | None = None
+    id: str | None = None
+
+
+class InfoListData(BaseModel):
+    title: str
+    items: list[InfoItem]
+
+
+TEMPLATE_MODELS: dict[str, type[BaseModel]] = {
+    "policy_list": PolicyListData,
+    "policy_detail": PolicyDetailData,
+    "comparison": ComparisonData,
+    "dashboard": DashboardData,
+    "form": FormData,
+    "info_list": InfoListData,
+}
+
+
+class TextEnvelope(BaseModel):
+    """A reply without a template."""
+
+    message: str
+    template: SkipJsonSchema[None] = None
+    # Stray data without a template is ignored, as it always was.
+    data: SkipJsonSchema[Any] = None
+
+
+def _template_envelope(name: str, model: type[BaseModel]) -> type[BaseModel]:
+    """A reply rendered with template `name`, whose data must be `model`."""
+    return create_model(
+        model.__name__.removesuffix("Data") + "Envelope",
+        __doc__=f"A reply with the {name} template.",
+        message=(str, ...),
+        # Single-value enum rather than const: Gemini schemas have no const.
+        template=(Literal[name], Field(json_schema_extra={"enum": [name]})),
+        data=(model, ...),
+    )
+
+
+TEMPLATE_ENVELOPES: dict[str, type[BaseModel]] = {
+    name: _template_envelope(name, model) for name, model in TEMPLATE_MODELS.items()
+}
+
+
+class Envelope(RootModel[typing.Union[(TextEnvelope, *TEMPLATE_ENVELOPES.values())]]):
+    """The agent's reply: a message alone, or a message with a template and
+    that template's data. Handed to the provider as structured output."""
+
+
+def validate_envelope(envelope: dict) -> BaseModel:
+    """Check a parsed reply against the envelope of the template it names
+    (the text-only one without a template), before anything is rendered.
+
+    Raises pydantic.ValidationError, a ValueError, with only that
+    envelope's errors.
+    """
+    name = envelope.get("template")
+    model = TEMPLATE_ENVELOPES.get(name, TextEnvelope) if isinstance(name, str) else TextEnvelope
+    return model.model_validate(envelope)
+
+
+# ── Prompt descriptions ──
+
+def _describe_type(annotation, note: str | None) -> str:
+    """Compact, JSON-like notation used in the prompt ("string", [...], {...})."""
+    args = typing.get_args(annotation)
+    if isinstance(annotation, types.UnionType) or typing.get_origin(annotation) is typing.Union:
+        (annotation,) = [arg for arg in args if arg is not type(None)]
+        return _describe_type(annotation, note)
+    if typing.get_origin(annotation) is list:
+        return f"[{_describe_type(args[0], note)}]"
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return describe_data(annotation)
+    if typing.get_origin(annotation) is Literal:
+        text = "|".join(str(arg) for arg in args)
+    elif annotation is bool:
+        return "true/false"
+    elif annotation in (int, float):
+        return f"number ({note})" if note else "number"
+    else:
+        text = "string"
+    return f'"{text} ({note})"' if note else f'"{text}"'
+
+
+def describe_data(model: type[BaseModel]) -> str:
+    """A model as the prompt shows it, e.g. {"title": "string", "kpis": [...]}."""
+    fields = []
+    for name, info in model.model_fields.items():
+        note = info.description
+        if note is None and not info.is_required():
+            note = "optional"
+        fields.append(f'"{name}": {_describe_type(info.annotation, note)}')
+    return "{" + ", ".join(fields) + "}"
+
+
+# ── Structured output ──
+
+def structured_output_enabled(model_name: str) -> bool:
+    """Whether to constrain the LLM with the envelope schema.
+
+    LLM_STRUCTURED_OUTPUT=true|false forces it; the default (auto) enables
+    it for Gemini models, whose JSON mode accepts this schema as is.
+    """
+    setting = os.getenv("LLM_STRUCTURED_OUTPUT", "auto").lower()
+    if setting in ("true", "false"):
+        return setting == "true"
+    return model_name.startswith(("gemini/", "vertex_ai/"))
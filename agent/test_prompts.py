@@ -1,49 +1,53 @@
 # Test prompts for the Insurance Assistant agent
 # Usage: copy-paste any prompt into the chat to verify rendering and interactions
-# Prompts exercise both text-only responses and A2UI interactive components
+# Prompts exercise both text-only responses and A2UI interactive components.
+# Each prompt is paired with the template it should produce ("text" for
+# none); the model router trains on these pairs.
 
-TEST_PROMPTS = [
+LABELED_PROMPTS = [
     # ── Text-only (no UI) ──
-    "Hi, what can you do?",
-    "What types of insurance do you offer?",
+    ("Hi, what can you do?", "text"),
+    ("What types of insurance do you offer?", "text"),
 
     # ── Policy browsing ──
-    "I want to see the available auto insurance policies.",
-    "Show me a comparison between home insurance policies: Base, Plus, and Premium.",
-    "What are the life insurance options?",
+    ("I want to see the available auto insurance policies.", "policy_list"),
+    ("Show me a comparison between home insurance policies: Base, Plus, and Premium.", "comparison"),
+    ("What are the life insurance options?", "policy_list"),
 
     # ── KPI Dashboard ──
-    "Show me a dashboard with the status of my active policies, premiums paid, and expiration dates.",
-    "Create a summary of my insurance portfolio with 4 KPIs.",
+    ("Show me a dashboard with the status of my active policies, premiums paid, and expiration dates.", "dashboard"),
+    ("Create a summary of my insurance portfolio with 4 KPIs.", "dashboard"),
 
     # ── Policy selection (button interaction) ──
-    "I want to change my auto insurance. What policies are available?",
-    "Compare health plans: Bronze, Silver, and Gold with prices and coverage.",
+    ("I want to change my auto insurance. What policies are available?", "policy_list"),
+    ("Compare health plans: Bronze, Silver, and Gold with prices and coverage.", "comparison"),
 
     # ── Claims ──
-    "I want to file a claim for my auto insurance.",
-    "Show me a wizard to file a claim: date, incident type, and description.",
+    ("I want to file a claim for my auto insurance.", "form"),
+    ("Show me a wizard to file a claim: date, incident type, and description.", "form"),
 
     # ── Forms ──
-    "I want to request a quote for home insurance. Show me a form.",
-    "Create a form to update my contact details: name, email, phone, address.",
+    ("I want to request a quote for home insurance. Show me a form.", "form"),
+    ("Create a form to update my contact details: name, email, phone, address.", "form"),
 
     # ── Complex interactions ──
-    "Show me my active policies in a list with status, expiration, and a button for details.",
-    "Create a comparative table of 3 auto insurance plans with premium, deductible, and maximum coverage.",
+    ("Show me my active policies in a list with status, expiration, and a button for details.", "info_list"),
+    ("Create a comparative table of 3 auto insurance plans with premium, deductible, and maximum coverage.", "comparison"),
 
     # ── Cards + details ──
-    "Show me the details of the Premium Auto policy with coverage, deductible, and monthly premium.",
-    "Create a card with a claim summary: case number, status, date, and amount.",
+    ("Show me the details of the Premium Auto policy with coverage, deductible, and monthly premium.", "policy_detail"),
+    ("Create a card with a claim summary: case number, status, date, and amount.", "info_list"),
 
     # ── Tabs ──
-    "Create a page with 3 tabs: My Policies, Open Claims, Payments.",
+    ("Create a page with 3 tabs: My Policies, Open Claims, Payments.", "info_list"),
 
     # ── Edge cases ──
-    "What is the difference between comprehensive and third-party insurance?",
-    "Tell me the tech conference not to miss this year.",
+    ("What is the difference between comprehensive and third-party insurance?", "text"),
+    ("Tell me the tech conference not to miss this year.", "text"),
 ]
 
+TEST_PROMPTS = [prompt for prompt, _ in LABELED_PROMPTS]
+
 if __name__ == "__main__":
     print(f"Available test prompts: {len(TEST_PROMPTS)}\n")
     for i, prompt in enumerate(TEST_PROMPTS, 1):
@@ -0,0 +1,52 @@
+from model_router import (
+    DEFAULT_STRONG_INTENTS,
+    FAST,
+    STRONG,
+    IntentClassifier,
+    ModelRouter,
+    training_examples,
+)
+from test_prompts import LABELED_PROMPTS
+
+# Leave-one-out intent accuracy over LABELED_PROMPTS when the floor was set;
+# raise it when the classifier improves.
+MIN_INTENT_ACCURACY = 0.5
+
+
+def leave_one_out():
+    """(label, route) of every labeled prompt, routed by a classifier trained
+    on every other example (LABELED_PROMPTS come first in the examples)."""
+    examples = training_examples()
+    results = []
+    for index, (prompt, label) in enumerate(LABELED_PROMPTS):
+        classifier = IntentClassifier([e for i, e in enumerate(examples) if i != index])
+        results.append((label, ModelRouter(FAST, STRONG, classifier=classifier).route(prompt)))
+    return results
+
+
+def test_leave_one_out_accuracy_does_not_drop():
+    results = leave_one_out()
+    correct = sum(route.intent == label for label, route in results)
+    assert correct / len(results) >= MIN_INTENT_ACCURACY
+
+
+def test_turns_for_strong_templates_never_go_fast():
+    results = leave_one_out()
+    assert not [label for label, route in results if label in DEFAULT_STRONG_INTENTS and route.model == FAST]
+    assert any(route.model == FAST for _, route in results)
+
+
+def test_unsure_turn_stays_on_default_model():
+    query = "I want to request a quote for home insurance. Show me a form."
+    classifier = IntentClassifier.default()
+    assert classifier.predict(query)[0] == "form"
+    sure = ModelRouter(FAST, STRONG, min_confidence=0.0, classifier=classifier).route(query)
+    assert (sure.model, sure.reason) == (FAST, "intent")
+    unsure = ModelRouter(FAST, STRONG, min_confidence=1.0, classifier=classifier).route(query)
+    assert (unsure.model, unsure.reason) == (STRONG, "uncertain")
+
+
+def test_posteriors_are_tempered():
+    posteriors = IntentClassifier.default().posteriors("Show me the auto insurance policies")
+    assert abs(sum(posteriors.values()) - 1.0) < 1e-9
+    assert max(posteriors.values()) < 0.999
@@ -0,0 +1,67 @@
+import json
+
+from a2ui_templates import page_count, paginate, render_page
+from a2ui_validator import validate_a2ui_messages
+from pager_store import PagerStore
+
+
+def claims(title, count=30):
+    return {
+        "title": title,
+        "items": [
+            {"title": f"Case #{i}", "details": [{"label": "Status", "value": "Open"}]}
+            for i in range(count)
+        ],
+    }
+
+
+def page_actions(messages):
+    """(action name, context) of every button in the rendered messages."""
+    actions = []
+    for message in messages:
+        for component in message.get("surfaceUpdate", {}).get("components", []):
+            button = component["component"].get("Button")
+            if button:
+                context = {c["key"]: c["value"] for c in button["action"].get("context", [])}
+                actions.append((button["action"]["name"], context))
+    return actions
+
+
+def test_pages_render_bound():
+    pager = paginate("info_list", claims("Your claims"), page_size=10)
+    assert page_count(pager) == 3
+    messages = render_page(pager, 1)
+    validate_a2ui_messages(messages)
+    assert "dataModelUpdate" in messages[-1]
+
+
+def test_json_looking_value_falls_back_to_literal_pages():
+    pager = paginate("info_list", claims("[Claims]"), page_size=10)
+    assert pager is not None
+    for page in range(page_count(pager)):
+        messages = render_page(pager, page)
+        validate_a2ui_messages(messages)
+        assert not any("dataModelUpdate" in message for message in messages)
+        text = json.dumps(messages)
+        assert "[Claims]" in text
+        assert f"Case #{page * 10}" in text and f"Case #{page * 10 + 9}" in text
+        assert f"Page {page + 1} of 3" in text
+        assert ("next_page", {
+            "listId": {"literalString": pager["id"]}, "page": {"literalString": str(page)},
+        }) in page_actions(messages)
+
+
+def test_page_label_counts_hidden_items():
+    pager = paginate("info_list", claims("Your claims"), page_size=10)
+    first = json.dumps(render_page(pager, 0), ensure_ascii=False)
+    assert "items 1–10 of 30 (+20 more)" in first
+    last = json.dumps(render_page(pager, 2), ensure_ascii=False)
+    assert "items 21–30 of 30" in last and "more)" not in last
+
+
+def test_store_refuses_pager_it_cannot_keep():
+    pager = paginate("info_list", claims("Your claims"), page_size=10)
+    assert PagerStore(max_bytes=64).put(pager) is False
+    store = PagerStore()
+    assert store.put(pager) is True and store.put(pager) is True
+    assert store.get(pager["id"]) is pager
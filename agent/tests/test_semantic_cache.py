@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from semantic_cache import SemanticCache
+
+
+def test_paraphrase_hits_only_in_its_scope():
+    cache = SemanticCache(max_entries=8)
+    cache.put("Show me auto insurance policies", "auto", ":ui:v1")
+    assert cache.lookup("show me the auto insurance policies", ":ui:v1") == "auto"
+    assert cache.lookup("show me the auto insurance policies", "alice:ui:v1") is None
+    assert cache.lookup("show me the auto insurance policies", ":ui+diff:v1") is None
+    assert cache.lookup("Show me home insurance policies", ":ui:v1") is None
+
+
+def test_same_words_refresh_their_entry():
+    cache = SemanticCache(max_entries=8)
+    cache.put("show me auto policies", "old")
+    cache.put("Show me the auto policies!", "new")
+    assert len(cache) == 1
+    assert cache.lookup("show me auto policies") == "new"
+
+
+def test_eviction_keeps_every_scope_searchable():
+    cache = SemanticCache(max_entries=4)
+    queries = [(f"{kind} policies for {size} families", f"user-{i % 3}")
+               for i, (kind, size) in enumerate((k, s) for k in ("auto", "home", "pet") for s in ("small", "large"))]
+    for query, scope in queries:
+        cache.put(query, query, scope)
+    assert len(cache) == 4
+    assert sum(cache.lookup(query, scope) == query for query, scope in queries) == 4
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from a2ui_templates import render_template
+from a2ui_validator import validate_a2ui_messages
+from prompt_builder import get_template_prompt
+from template_schemas import TEMPLATE_MODELS, validate_envelope
+
+# The fewest fields each template renders with; everything else has a
+# renderer default.
+MINIMAL_DATA = {
+    "policy_list": {"title": "Auto", "policies": [{"name": "Basic", "price": 29, "features": []}]},
+    "policy_detail": {"name": "Basic", "type": "Auto", "price": 29, "coverages": []},
+    "comparison": {"title": "Plans", "plans": [{"name": "Basic", "price": 29, "features": []}]},
+    "dashboard": {"title": "Portfolio", "kpis": [{"label": "Active Policies"}]},
+    "form": {"title": "Quote", "fields": [{"label": "Name"}], "submitLabel": "Send", "submitAction": "submit_quote"},
+    "info_list": {"title": "Claims", "items": [{"title": "Case #1", "details": []}]},
+}
+
+
+def prompt_examples():
+    return [json.loads(line) for line in get_template_prompt().splitlines() if line.startswith("{")]
+
+
+def test_minimal_data_covers_every_template():
+    assert MINIMAL_DATA.keys() == TEMPLATE_MODELS.keys()
+
+
+def test_prompt_examples_validate():
+    examples = prompt_examples()
+    assert len(examples) == 5
+    for envelope in examples:
+        validate_envelope(envelope)
+
+
+@pytest.mark.parametrize("mode", ["literal", "bound"])
+@pytest.mark.parametrize("name", list(MINIMAL_DATA))
+def test_minimal_envelopes_validate_and_render(name, mode):
+    envelope = {"message": "ok", "template": name, "data": MINIMAL_DATA[name]}
+    validate_envelope(envelope)
+    validate_a2ui_messages(render_template(name, envelope["data"], mode))
+
+
+def test_numbers_are_accepted_as_strings():
+    dashboard = validate_envelope({
+        "message": "ok", "template": "dashboard",
+        "data": {"title": "Portfolio", "kpis": [{"label": "Active Policies", "value": 3}]},
+    })
+    assert dashboard.data.kpis[0].value == "3"
+    detail = validate_envelope({
+        "message": "ok", "template": "policy_detail",
+        "data": {**MINIMAL_DATA["policy_detail"], "maxCoverage": 500000},
+    })
+    assert detail.data.maxCoverage == "500000"
+
+
+def test_text_envelope_ignores_stray_data():
+    validate_envelope({"message": "Hello", "data": {"anything": 1}})
+
+
+def test_wrong_data_for_template_is_rejected():
+    with pytest.raises(ValidationError):
+        validate_envelope({"message": "ok", "template": "dashboard", "data": MINIMAL_DATA["form"]})